@@ -6,7 +6,7 @@ from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.html import format_html
 
-from .models import Answer, Candidate, Invitation, QuestionFeedback
+from .models import Answer, AwayInterval, Candidate, Invitation, QuestionFeedback
 from .utils import send_test_invitation_email
 
 
@@ -59,6 +59,17 @@ class QuestionFeedbackInline(admin.TabularInline):
         return request.user.is_tech_lead and obj and obj.interview_type == "technical"
 
 
+class AwayIntervalInline(admin.TabularInline):
+    model = AwayInterval
+    extra = 0
+    fields = ("started_at", "duration")
+    readonly_fields = ("started_at", "duration")
+    can_delete = False
+
+    def has_add_permission(self, request, obj):
+        return False
+
+
 @admin.register(Invitation)
 class InvitationAdmin(admin.ModelAdmin):
     form = InvitationAdminForm
@@ -72,8 +83,9 @@ class InvitationAdmin(admin.ModelAdmin):
         "completed",
         "assigned_tech_lead",
         "total_score",
-        "tab_switches_hidden_count",
-        "tab_switches_visible_count",
+        "tab_hidden_count",
+        "tab_visible_count",
+        "time_away",
         "view_answers",
         "resend_invitation",
     )
@@ -92,12 +104,13 @@ class InvitationAdmin(admin.ModelAdmin):
     readonly_fields = ("unique_link",)
     inlines = [
         QuestionFeedbackInline,
+        AwayIntervalInline,
     ]
 
     def get_inlines(self, request, obj):
         inlines = super().get_inlines(request, obj)
         if obj and obj.interview_type == "general":
-            return []
+            return [AwayIntervalInline]
         return inlines
 
     def unique_link_short(self, obj):
@@ -166,16 +179,6 @@ class InvitationAdmin(admin.ModelAdmin):
 
     send_selected_invitations.short_description = "Отправить приглашения по email"
 
-    def tab_switches_hidden_count(self, obj):
-        return obj.tab_switches.filter(event_type="hidden").count()
-
-    tab_switches_hidden_count.short_description = "Уходов с вкладки"
-
-    def tab_switches_visible_count(self, obj):
-        return obj.tab_switches.filter(event_type="visible").count()
-
-    tab_switches_visible_count.short_description = "Возвратов на вкладку"
-
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         if request.user.is_tech_lead and not request.user.is_hr:
@@ -212,11 +215,17 @@ class AnswerAdmin(admin.ModelAdmin):
         "question_truncated",
         "response_truncated",
         "score",
+        "grading_status",
         "correct_answer_truncated",
     )
-    list_filter = ("invitation__test_template", "invitation__candidate", "score")
+    list_filter = (
+        "invitation__test_template",
+        "invitation__candidate",
+        "score",
+        "grading_status",
+    )
     search_fields = ("invitation__candidate__email", "question__text", "response")
-    readonly_fields = ("invitation", "question", "response", "score")
+    readonly_fields = ("invitation", "question", "response", "score", "grading_status")
 
     def question_truncated(self, obj):
         return (
@@ -0,0 +1,214 @@
+import logging
+from contextlib import nullcontext
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from config.redis_client import get_redis
+
+from .models import Answer, Invitation
+
+logger = logging.getLogger(__name__)
+
+# Черновики ответов: hash question_id -> ответ на каждое приглашение
+# и множество приглашений с несохранёнными черновиками.
+# Ключи без TTL, поэтому не вытесняются при volatile-lru
+DRAFTS_KEY = "answers:drafts:{invitation_id}"
+DIRTY_KEY = "answers:dirty"
+# Блокировка черновиков приглашения: срок жизни и сколько её ждёт
+# завершение теста (секунды)
+LOCK_KEY = "answers:lock:{invitation_id}"
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+
+
+def save_answer(invitation, question_id, response):
+    return save_answers(invitation, {question_id: response})
+
+
+def save_answers(invitation, responses):
+    """
+    Сохраняет ответы кандидата {question_id: ответ}. С ANSWER_WRITE_BEHIND
+    ответы пишутся в Redis (последняя запись побеждает) и переносятся
+    в БД пакетно, иначе — одним bulk upsert. Возвращает False, если тест
+    уже завершён
+    """
+
+    if invitation.completed:
+        return False
+
+    if settings.ANSWER_WRITE_BEHIND:
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hset(DRAFTS_KEY.format(invitation_id=invitation.id), mapping=responses)
+            pipe.sadd(DIRTY_KEY, invitation.id)
+            pipe.execute()
+            return True
+        except redis.RedisError:
+            logger.exception(
+                f"Answer buffer unavailable for invitation {invitation.id}"
+            )
+
+    with transaction.atomic():
+        upsert_answers(invitation.id, responses)
+        invitation.touch_answers()
+    return True
+
+
+def upsert_answers(invitation_id, responses):
+    Answer.objects.bulk_create(
+        [
+            Answer(
+                invitation_id=invitation_id,
+                question_id=int(question_id),
+                response=response,
+            )
+            for question_id, response in responses.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["invitation", "question"],
+        update_fields=["response"],
+    )
+
+
+def get_drafts(invitation_id):
+    """
+    Несохранённые в БД черновики {question_id: ответ}
+    """
+
+    if not settings.ANSWER_WRITE_BEHIND:
+        return {}
+    try:
+        drafts = get_redis().hgetall(DRAFTS_KEY.format(invitation_id=invitation_id))
+    except redis.RedisError:
+        logger.exception(f"Answer buffer unavailable for invitation {invitation_id}")
+        return {}
+    return {int(question_id): response for question_id, response in drafts.items()}
+
+
+def get_answers(invitation_id):
+    """
+    Текущие ответы приглашения с учётом черновиков
+    """
+
+    answers = dict(
+        Answer.objects.filter(invitation_id=invitation_id).values_list(
+            "question_id", "response"
+        )
+    )
+    answers.update(get_drafts(invitation_id))
+    return answers
+
+
+def drafts_lock(invitation_id):
+    return get_redis().lock(
+        LOCK_KEY.format(invitation_id=invitation_id),
+        timeout=LOCK_TIMEOUT,
+        blocking_timeout=LOCK_WAIT,
+    )
+
+
+def finish_lock(invitation_id):
+    """
+    Блокировка черновиков на всё завершение теста, включая фиксацию
+    транзакции: фоновый перенос не запишет ответы после постановки
+    в очередь проверки
+    """
+
+    if not settings.ANSWER_WRITE_BEHIND:
+        return nullcontext()
+    return drafts_lock(invitation_id)
+
+
+def claim_drafts(client, invitation_id):
+    """
+    Забирает черновики из Redis атомарно вместе с отметкой в DIRTY_KEY,
+    поэтому ответ, пришедший во время переноса, попадёт в следующий
+    """
+
+    pipe = client.pipeline()
+    pipe.hgetall(DRAFTS_KEY.format(invitation_id=invitation_id))
+    pipe.delete(DRAFTS_KEY.format(invitation_id=invitation_id))
+    pipe.srem(DIRTY_KEY, invitation_id)
+    return pipe.execute()[0]
+
+
+def transfer_drafts(client, invitation_id):
+    drafts = claim_drafts(client, invitation_id)
+    if not drafts:
+        return 0
+
+    try:
+        upsert_answers(invitation_id, drafts)
+    except Exception:
+        # Возвращаем черновики, не перетирая более новые
+        key = DRAFTS_KEY.format(invitation_id=invitation_id)
+        pipe = client.pipeline()
+        for question_id, response in drafts.items():
+            pipe.hsetnx(key, question_id, response)
+        pipe.sadd(DIRTY_KEY, invitation_id)
+        pipe.execute()
+        raise
+    return len(drafts)
+
+
+def flush_invitation(invitation_id):
+    """
+    Переносит черновики приглашения в БД одним bulk upsert. Проверка
+    завершённости и перенос идут под блокировкой черновиков, поэтому
+    не пересекаются с завершением теста. Если блокировку держит
+    завершение, приглашение пропускается: черновики заберёт оно
+    """
+
+    client = get_redis()
+    lock = drafts_lock(invitation_id)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        if Invitation.objects.filter(id=invitation_id, completed=True).exists():
+            # Завершение уже перенесло черновики, эти записаны после него
+            if claim_drafts(client, invitation_id):
+                logger.warning(
+                    f"Dropped answers saved after finish for {invitation_id}"
+                )
+            return 0
+        return transfer_drafts(client, invitation_id)
+    finally:
+        lock.release()
+
+
+def flush_all():
+    """
+    Переносит в БД черновики всех приглашений
+    """
+
+    flushed = 0
+    for invitation_id in get_redis().smembers(DIRTY_KEY):
+        try:
+            flushed += flush_invitation(int(invitation_id))
+        except Exception:
+            logger.exception(f"Failed to flush answers for invitation {invitation_id}")
+    return flushed
+
+
+def finish_invitation(invitation):
+    """
+    Синхронный перенос черновиков при завершении теста, под finish_lock.
+    Черновики удаляются из Redis только после фиксации транзакции:
+    при откате они остаются для повторной попытки
+    """
+
+    if not settings.ANSWER_WRITE_BEHIND:
+        return
+    drafts = get_redis().hgetall(DRAFTS_KEY.format(invitation_id=invitation.id))
+    if drafts:
+        upsert_answers(invitation.id, drafts)
+    transaction.on_commit(lambda: clear_drafts(invitation.id), robust=True)
+
+
+def clear_drafts(invitation_id):
+    pipe = get_redis().pipeline()
+    pipe.delete(DRAFTS_KEY.format(invitation_id=invitation_id))
+    pipe.srem(DIRTY_KEY, invitation_id)
+    pipe.execute()
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from interviewer_interface.models import Choice, Question
 
 from ..models import Answer, Invitation
+from ..template_snapshot import get_invitation_snapshot
 
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -20,6 +21,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         many=True, 
         read_only=True,
         )
+    examples = serializers.SerializerMethodField()
 
     class Meta:
         model = Question
@@ -30,8 +32,16 @@ class QuestionSerializer(serializers.ModelSerializer):
             "complexity", 
             "choices", 
             "stdin",
+            "examples",
             )
 
+    def get_examples(self, obj):
+        return [
+            {"stdin": case.stdin, "expected_output": case.expected_output}
+            for case in obj.test_cases.all()
+            if not case.is_hidden
+        ]
+
 
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -69,29 +79,14 @@ class TestSessionSerializer(serializers.ModelSerializer):
         )
 
     def get_questions(self, obj):
-        ordered = obj.test_template.testtemplatequestion_set.all().order_by("order")
-        return QuestionSerializer([tq.question for tq in ordered], many=True).data
+        return get_invitation_snapshot(obj).questions
 
     def get_remaining_time(self, obj):
-        request = self.context.get("request")
-        if not request:
-            return None
-
-        template = obj.test_template
-        time_limit_seconds = template.time_limit * 60
-        if time_limit_seconds <= 0:
+        if obj.test_template.time_limit <= 0:
             return None
-
-        session_key = f"test_start_{obj.unique_link}"
-        if session_key not in request.session:
-            return time_limit_seconds
-
-        from django.utils import timezone
-
-        start_timestamp = request.session[session_key]
-        elapsed = timezone.now().timestamp() - start_timestamp
-        remaining = int(time_limit_seconds - elapsed)
-        return max(0, remaining)
+        if obj.deadline is None:
+            return obj.test_template.time_limit * 60
+        return obj.remaining_seconds()
 
 
 class QuestionDetailSerializer(serializers.Serializer):
@@ -118,7 +113,7 @@ class QuestionDetailSerializer(serializers.Serializer):
 
     def to_representation(self, instance):
         return {
-            "question": QuestionSerializer(instance["question"]).data,
+            "question": instance["question"],
             "current_answer": (
                 AnswerSerializer(instance["current_answer"]).data
                 if instance.get("current_answer")
@@ -156,5 +151,4 @@ class InvitationSerializer(serializers.ModelSerializer):
             )
 
     def get_questions(self, obj):
-        ordered = obj.test_template.testtemplatequestion_set.all().order_by("order")
-        return QuestionSerializer([tq.question for tq in ordered], many=True).data
+        return get_invitation_snapshot(obj).questions
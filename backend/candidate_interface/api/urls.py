@@ -3,9 +3,13 @@ from django.urls import path
 from .views import (
     FinishTestView,
     InterviewSessionView,
+    Judge0CallbackView,
     LogTabSwitchView,
+    ProctoringEventsView,
     QuestionDetailView,
+    SubmitAnswersBatchView,
     SubmitAnswerView,
+    TestBootstrapView,
     TestSessionView,
     TestResultsListView,
     TestResultDetailView,
@@ -18,6 +22,11 @@ urlpatterns = [
         TestSessionView.as_view(),
         name="test_session",
     ),
+    path(
+        "test/<uuid:unique_link>/bootstrap/",
+        TestBootstrapView.as_view(),
+        name="test_bootstrap",
+    ),
     path(
         "test/<uuid:unique_link>/question/<int:question_id>/",
         QuestionDetailView.as_view(),
@@ -28,16 +37,31 @@ urlpatterns = [
         SubmitAnswerView.as_view(),
         name="submit_answer",
     ),
+    path(
+        "test/<uuid:unique_link>/answers/",
+        SubmitAnswersBatchView.as_view(),
+        name="submit_answers_batch",
+    ),
     path(
         "test/<uuid:unique_link>/finish/",
         FinishTestView.as_view(),
         name="finish_test",
     ),
+    path(
+        "judge0/callback/<str:signature>/",
+        Judge0CallbackView.as_view(),
+        name="judge0_callback",
+    ),
     path(
         "log-switch/<uuid:unique_link>/",
         LogTabSwitchView.as_view(),
         name="log_tab_switch",
     ),
+    path(
+        "test/<uuid:unique_link>/events/",
+        ProctoringEventsView.as_view(),
+        name="proctoring_events",
+    ),
     path(
         "session/<uuid:unique_link>/",
         InterviewSessionView.as_view(),
@@ -1,6 +1,15 @@
+import hashlib
 import json
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 
+import redis
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from config.permissions import IsHROrTechLead
 from rest_framework.response import Response
@@ -8,15 +17,40 @@ from rest_framework.views import APIView
 
 from interviewer_interface.models import Question
 
+from .. import answer_buffer, tab_switch_buffer
 from ..api.serializers import (
     InvitationSerializer,
     QuestionDetailSerializer,
     TestSessionSerializer,
 )
-from ..models import Answer, Invitation
+from ..expiry import complete_invitation
+from ..grading import apply_judge0_callback
+from ..invitation_cache import get_invitation
+from ..models import Answer, Invitation, QuestionFeedback, TabSwitchLog
+from ..template_snapshot import get_invitation_snapshot
 
+MAX_BATCH_ANSWERS = 200
+MAX_PROCTORING_EVENTS = 500
+MAX_PROCTORING_EVENT_AGE = timedelta(hours=1)
+PROCTORING_EVENT_TYPES = {event_type for event_type, _ in TabSwitchLog.EVENT_TYPES}
 
-class TestSessionView(APIView):
+
+class CandidateAPIView(APIView):
+    """
+    Базовый класс API кандидата. Кандидат анонимен, а таймер хранится
+    в приглашении, поэтому при CANDIDATE_API_SESSIONLESS аутентификация
+    отключена и сессия не читается и не создаётся
+    """
+
+    permission_classes = [AllowAny]
+
+    def get_authenticators(self):
+        if settings.CANDIDATE_API_SESSIONLESS:
+            return []
+        return super().get_authenticators()
+
+
+class TestSessionView(CandidateAPIView):
     """
     Выполнение теста
     """
@@ -25,7 +59,7 @@ class TestSessionView(APIView):
 
     def get(self, request, unique_link):
         try:
-            invitation = Invitation.objects.get(unique_link=unique_link)
+            invitation = get_invitation(unique_link)
         except Invitation.DoesNotExist:
             return Response({"error": "Приглашение не найдено"}, status=404)
 
@@ -34,79 +68,135 @@ class TestSessionView(APIView):
                 {"error": "Тест уже завершён", "completed": True}, status=400
             )
 
-        template = invitation.test_template
-        time_limit_seconds = template.time_limit * 60
-
-        if time_limit_seconds > 0:
-            session_key = f"test_start_{unique_link}"
-            if session_key not in request.session:
-                request.session[session_key] = timezone.now().timestamp()
-                request.session.modified = True
-
-            start_timestamp = request.session[session_key]
-            elapsed = timezone.now().timestamp() - start_timestamp
-
-            if elapsed >= time_limit_seconds:
-                invitation.completed = True
-                invitation.save()
-                return Response(
-                    {"error": "Время истекло", "completed": True}, status=400
-                )
+        invitation.start()
+        if invitation.is_expired():
+            # Завершение и проверку выполняет expire_invitations
+            return Response({"error": "Время истекло", "completed": True}, status=400)
 
         serializer = TestSessionSerializer(invitation, context={"request": request})
         return Response(serializer.data)
 
 
-class QuestionDetailView(APIView):
+class TestBootstrapView(CandidateAPIView):
     """
-    Представление конкретного вопроса в наборе 
+    Весь тест одним запросом: вопросы, варианты, текущие ответы и время.
+    Поддерживает If-None-Match. Оставшееся время меняется каждую секунду,
+    поэтому отдаётся в заголовке X-Remaining-Time, а в теле — срок окончания
     """
 
     permission_classes = [AllowAny]
 
-    def get(self, request, unique_link, question_id):
+    def get(self, request, unique_link):
         try:
-            invitation = Invitation.objects.get(unique_link=unique_link)
+            invitation = get_invitation(unique_link)
         except Invitation.DoesNotExist:
             return Response({"error": "Приглашение не найдено"}, status=404)
 
         if invitation.completed:
-            return Response({"error": "Тест уже завершён"}, status=400)
+            return Response(
+                {"error": "Тест уже завершён", "completed": True}, status=400
+            )
+
+        invitation.start()
+        if invitation.is_expired():
+            return Response({"error": "Время истекло", "completed": True}, status=400)
+
+        headers = {"Cache-Control": "private, no-cache"}
+        if invitation.deadline is not None:
+            headers["X-Remaining-Time"] = str(invitation.remaining_seconds())
 
-        template_questions = (
-            invitation.test_template.testtemplatequestion_set.all().order_by("order")
+        answers = answer_buffer.get_answers(invitation.id)
+        etag = bootstrap_etag(invitation, answers)
+        headers["ETag"] = etag
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=304, headers=headers)
+
+        template = invitation.test_template
+        return Response(
+            {
+                "id": invitation.id,
+                "unique_link": str(invitation.unique_link),
+                "candidate_name": invitation.candidate.full_name,
+                "template_name": template.name,
+                "interview_type": invitation.interview_type,
+                "questions": get_invitation_snapshot(invitation).questions,
+                "answers": {str(question_id): response for question_id, response in answers.items()},
+                "time_limit": template.time_limit * 60 or None,
+                "deadline": invitation.deadline,
+            },
+            headers=headers,
         )
-        questions = [tq.question for tq in template_questions]
 
+
+def bootstrap_etag(invitation, answers):
+    """
+    Тело ответа меняется только вместе с версией теста, ответами
+    или данными приглашения. Ответы входят в хеш целиком: счётчики
+    ревизий в Redis сбрасываются при удалении ключа и могут повторить
+    значение с другими ответами
+    """
+
+    template = invitation.test_template
+    payload = json.dumps(
+        [
+            invitation.id,
+            invitation.candidate.full_name,
+            invitation.interview_type,
+            template.id,
+            template.version,
+            sorted(answers.items()),
+            invitation.deadline.isoformat() if invitation.deadline else None,
+        ]
+    )
+    return f'"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+
+class QuestionDetailView(CandidateAPIView):
+    """
+    Представление конкретного вопроса в наборе 
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, unique_link, question_id):
         try:
-            current_index = next(
-                i for i, q in enumerate(questions) if q.id == question_id
-            )
-            current_question = questions[current_index]
-        except StopIteration:
+            invitation = get_invitation(unique_link)
+        except Invitation.DoesNotExist:
+            return Response({"error": "Приглашение не найдено"}, status=404)
+
+        if invitation.completed:
+            return Response({"error": "Тест уже завершён"}, status=400)
+        if invitation.is_expired(grace=settings.TEST_DEADLINE_GRACE):
+            return Response({"error": "Время истекло", "completed": True}, status=400)
+
+        snapshot = get_invitation_snapshot(invitation)
+        current_index = snapshot.position(question_id)
+        if current_index is None:
             return Response({"error": "Вопрос не найден в этом тесте"}, status=404)
 
-        try:
-            current_answer = Answer.objects.get(
-                invitation=invitation, question=current_question
+        current_answer = Answer.objects.filter(
+            invitation=invitation, question_id=question_id
+        ).first()
+        draft = answer_buffer.get_drafts(invitation.id).get(question_id)
+        if draft is not None:
+            current_answer = Answer(
+                invitation=invitation, question_id=question_id, response=draft
             )
-        except Answer.DoesNotExist:
-            current_answer = None
 
         serializer = QuestionDetailSerializer(
             {
-                "question": current_question,
+                "question": snapshot.questions[current_index],
                 "current_answer": current_answer,
                 "is_first": current_index == 0,
-                "is_last": current_index == len(questions) - 1,
+                "is_last": current_index == len(snapshot) - 1,
                 "current_index": current_index + 1,
-                "total_questions": len(questions),
+                "total_questions": len(snapshot),
             }
         )
         return Response(serializer.data)
 
 
-class SubmitAnswerView(APIView):
+class SubmitAnswerView(CandidateAPIView):
     """
     Отправка ответа кандидата
     """
@@ -115,73 +205,115 @@ class SubmitAnswerView(APIView):
 
     def post(self, request, unique_link, question_id):
         try:
-            invitation = Invitation.objects.get(unique_link=unique_link)
+            invitation = get_invitation(unique_link)
         except Invitation.DoesNotExist:
             return Response({"error": "Приглашение не найдено"}, status=404)
 
         if invitation.completed:
             return Response({"error": "Тест уже завершён"}, status=400)
+        if invitation.is_expired(grace=settings.TEST_DEADLINE_GRACE):
+            return Response({"error": "Время истекло", "completed": True}, status=400)
 
-        try:
-            current_question = Question.objects.get(id=question_id)
-        except Question.DoesNotExist:
+        snapshot = get_invitation_snapshot(invitation)
+        position = snapshot.position(question_id)
+        if position is None:
             return Response({"error": "Вопрос не найден"}, status=404)
+        current_question = snapshot.questions[position]
 
-        response_value = request.data.get("response", "")
-        if isinstance(response_value, str):
-            response_value = response_value.strip()
-        else:
-            try:
-                response_value = json.dumps(response_value)
-            except Exception:
-                response_value = str(response_value)
-
-        switches = request.data.get("switches", 0)
-
-        if current_question.question_type == "multiple_choice":
-            try:
-                json.loads(response_value)
-            except (json.JSONDecodeError, TypeError):
-                return Response({"error": "Неверный формат ответа"}, status=400)
-
-        answer_obj, created = Answer.objects.update_or_create(
-            invitation=invitation,
-            question=current_question,
-            defaults={"response": response_value},
+        response_value, error = clean_response(
+            request.data.get("response", ""), current_question
         )
+        if error:
+            return Response({"error": error}, status=400)
+
+        if not answer_buffer.save_answer(invitation, question_id, response_value):
+            return Response({"error": "Тест уже завершён"}, status=400)
 
-        return Response({"status": "ok", "answer_id": answer_obj.id})
+        return Response({"status": "ok"})
 
 
-class FinishTestView(APIView):
+class SubmitAnswersBatchView(CandidateAPIView):
     """
-    Окончание теста
+    Отправка нескольких ответов одним запросом: [{question_id, response}].
+    Корректные ответы сохраняются вместе, для каждого возвращается статус
     """
 
     permission_classes = [AllowAny]
 
     def post(self, request, unique_link):
         try:
-            invitation = Invitation.objects.get(unique_link=unique_link)
+            invitation = get_invitation(unique_link)
         except Invitation.DoesNotExist:
             return Response({"error": "Приглашение не найдено"}, status=404)
 
         if invitation.completed:
             return Response({"error": "Тест уже завершён"}, status=400)
+        if invitation.is_expired(grace=settings.TEST_DEADLINE_GRACE):
+            return Response({"error": "Время истекло", "completed": True}, status=400)
+
+        items = request.data.get("answers")
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Нет ответов"}, status=400)
+        if len(items) > MAX_BATCH_ANSWERS:
+            return Response({"error": "Слишком много ответов"}, status=400)
+
+        snapshot = get_invitation_snapshot(invitation)
+        results = []
+        responses = {}
+        for item in items:
+            question_id = item.get("question_id") if isinstance(item, dict) else None
+            # bool — подкласс int: true не должен стать вопросом с id 1
+            is_id = isinstance(question_id, int) and not isinstance(question_id, bool)
+            position = snapshot.position(question_id) if is_id else None
+            if position is None:
+                results.append(
+                    {"question_id": question_id, "status": "error", "error": "Вопрос не найден"}
+                )
+                continue
+
+            response_value, error = clean_response(
+                item.get("response", ""), snapshot.questions[position]
+            )
+            if error:
+                results.append(
+                    {"question_id": question_id, "status": "error", "error": error}
+                )
+                continue
 
-        invitation.completed = True
-        invitation.save()
+            # Повторы одного вопроса: сохраняется последний
+            responses[question_id] = response_value
+            results.append({"question_id": question_id, "status": "ok"})
 
-        for answer in invitation.answers.all():
-            answer.auto_evaluate()
-            answer.save()
+        if responses and not answer_buffer.save_answers(invitation, responses):
+            return Response({"error": "Тест уже завершён"}, status=400)
 
-        return Response({"status": "ok", "message": "Тест успешно завершён"})
+        return Response({"status": "ok", "results": results})
 
 
-class LogTabSwitchView(APIView):
+def clean_response(response_value, question):
     """
-    Логирование переходов по вкладкам
+    Приводит ответ к строке; возвращает (ответ, ошибка)
+    """
+
+    if isinstance(response_value, str):
+        response_value = response_value.strip()
+    else:
+        try:
+            response_value = json.dumps(response_value)
+        except Exception:
+            response_value = str(response_value)
+
+    if question["question_type"] == "multiple_choice":
+        try:
+            json.loads(response_value)
+        except (json.JSONDecodeError, TypeError):
+            return response_value, "Неверный формат ответа"
+    return response_value, None
+
+
+class FinishTestView(CandidateAPIView):
+    """
+    Окончание теста
     """
 
     permission_classes = [AllowAny]
@@ -192,17 +324,119 @@ class LogTabSwitchView(APIView):
         except Invitation.DoesNotExist:
             return Response({"error": "Приглашение не найдено"}, status=404)
 
+        try:
+            if not complete_invitation(invitation):
+                # Повторное или одновременное завершение: проверка уже запущена
+                invitation.refresh_from_db(fields=["grading_status"])
+        except redis.RedisError:
+            # Ответы не перенесены, тест остаётся открытым до повтора
+            return Response(
+                {"error": "Не удалось завершить тест, повторите попытку"},
+                status=503,
+            )
+
+        return Response(
+            {
+                "status": "ok",
+                "message": "Тест успешно завершён",
+                "grading_status": invitation.grading_status,
+            }
+        )
+
+
+class Judge0CallbackView(APIView):
+    """
+    Приём результатов проверки кода от Judge0
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def put(self, request, signature):
+        if not apply_judge0_callback(signature, request.data):
+            return Response({"error": "Неизвестная проверка"}, status=404)
+        return Response({"status": "ok"})
+
+
+class LogTabSwitchView(CandidateAPIView):
+    """
+    Логирование переходов по вкладкам
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request, unique_link):
+        try:
+            invitation = get_invitation(unique_link)
+        except Invitation.DoesNotExist:
+            return Response({"error": "Приглашение не найдено"}, status=404)
+
         event_type = request.data.get("state")
         if event_type not in ["hidden", "visible"]:
             return Response({"error": "Неверный тип события"}, status=400)
 
-        from ..models import TabSwitchLog
-
-        TabSwitchLog.objects.create(invitation=invitation, event_type=event_type)
-        count = invitation.tab_switches.count()
+        count = tab_switch_buffer.log_switch(invitation, event_type)
         return Response({"status": "ok", "count": count})
 
 
+class ProctoringEventsView(CandidateAPIView):
+    """
+    Пакет событий прокторинга: {client_id, events: [{seq, type, timestamp}]},
+    timestamp — миллисекунды Unix. Клиент копит события и отправляет их
+    раз в несколько секунд или через sendBeacon при закрытии страницы.
+    Повторно отправленные события отбрасываются по (client_id, seq)
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request, unique_link):
+        try:
+            invitation = get_invitation(unique_link)
+        except Invitation.DoesNotExist:
+            return Response({"error": "Приглашение не найдено"}, status=404)
+
+        client_id = request.data.get("client_id")
+        items = request.data.get("events")
+        if not isinstance(client_id, str) or not 0 < len(client_id) <= 64:
+            return Response({"error": "Неверный client_id"}, status=400)
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Нет событий"}, status=400)
+        if len(items) > MAX_PROCTORING_EVENTS:
+            return Response({"error": "Слишком много событий"}, status=400)
+
+        now = timezone.now()
+        events = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            seq, event_type = item.get("seq"), item.get("type")
+            if not isinstance(seq, int) or event_type not in PROCTORING_EVENT_TYPES:
+                continue
+            events.append((seq, event_type, client_timestamp(item.get("timestamp"), now)))
+
+        accepted = (
+            tab_switch_buffer.log_client_events(invitation, client_id, events)
+            if events
+            else 0
+        )
+        return Response({"status": "ok", "accepted": accepted})
+
+
+def client_timestamp(value, now):
+    """
+    Время события по часам клиента. Время в будущем или старше
+    MAX_PROCTORING_EVENT_AGE заменяется временем приёма
+    """
+
+    try:
+        timestamp = datetime.fromtimestamp(float(value) / 1000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    if timestamp > now or now - timestamp > MAX_PROCTORING_EVENT_AGE:
+        return now
+    return timestamp
+
+
 class InterviewSessionView(APIView):
     """
     Доступ сотрудников к интервью
@@ -223,53 +457,77 @@ class InterviewSessionView(APIView):
         serializer = InvitationSerializer(invitation)
         return Response(serializer.data)
 
+class TestResultsPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-id"
+
+
+def subquery_total(model, field, function=Sum):
+    """
+    Агрегат по строкам приглашения подзапросом: соединение ответов
+    и оценок в одном GROUP BY размножило бы строки и исказило суммы
+    """
+
+    return Subquery(
+        model.objects.filter(invitation=OuterRef("pk"))
+        .order_by()
+        .values("invitation")
+        .annotate(total=function(field))
+        .values("total")
+    )
+
+
 class TestResultsListView(APIView):
     """
-    Вывод результатов всех завершенных тестов
+    Вывод результатов всех завершенных тестов. Страница строится одним
+    запросом: баллы и последний ответ считаются подзапросами, число уходов
+    со вкладки хранится в приглашении
     """
 
     permission_classes = [IsAuthenticated]
+    pagination_class = TestResultsPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        invitations = Invitation.objects.filter(completed=True)
+        if getattr(user, 'is_hr', False):
+            pass
+        elif getattr(user, 'is_tech_lead', False):
+            invitations = invitations.filter(assigned_tech_lead=user)
+        elif not user.is_staff:
+            invitations = invitations.none()
+
+        return invitations.select_related('candidate', 'test_template').annotate(
+            auto_score=Coalesce(subquery_total(Answer, 'score'), 0),
+            manual_score=Coalesce(subquery_total(QuestionFeedback, 'score'), 0),
+            last_answer_id=subquery_total(Answer, 'id', Max),
+        )
 
     def get(self, request):
-        if hasattr(request.user, 'is_hr') and request.user.is_hr:
-            invitations = Invitation.objects.filter(completed=True).select_related(
-                'candidate', 'test_template', 'assigned_tech_lead'
-            ).order_by('-id')
-        elif hasattr(request.user, 'is_tech_lead') and request.user.is_tech_lead:
-            invitations = Invitation.objects.filter(
-                assigned_tech_lead=request.user,
-                completed=True
-            ).select_related('candidate', 'test_template').order_by('-id')
-        elif request.user.is_staff:
-            invitations = Invitation.objects.filter(completed=True).select_related(
-                'candidate', 'test_template', 'assigned_tech_lead'
-            ).order_by('-id')
-        else:
-            invitations = Invitation.objects.none()
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(self.get_queryset(), request, view=self)
 
-        results = []
-        for invitation in invitations:
-            answers = invitation.answers.all()
-            auto_score = sum(a.score for a in answers) if answers else 0
-            
-            feedbacks = invitation.feedbacks.all()
-            manual_score = sum(f.score for f in feedbacks if f.score is not None) if feedbacks else 0
-            
-            results.append({
+        results = [
+            {
                 'id': invitation.id,
                 'candidate_id': invitation.candidate.id,
                 'candidate_name': invitation.candidate.full_name,
                 'candidate_email': invitation.candidate.email,
                 'test_template': invitation.test_template.name,
                 'interview_type': invitation.get_interview_type_display(),
-                'auto_score': auto_score,
-                'manual_score': manual_score,
-                'completed_at': invitation.answers.latest('id').id if answers else None,  # Use as timestamp proxy
-                'tab_switches': invitation.tab_switches.filter(event_type='hidden').count(),
+                'auto_score': invitation.auto_score,
+                'manual_score': invitation.manual_score,
+                'completed_at': invitation.last_answer_id,  # Use as timestamp proxy
+                'grading_status': invitation.grading_status,
+                'tab_switches': invitation.tab_hidden_count,
+                'time_away': invitation.time_away.total_seconds(),
                 'unique_link': str(invitation.unique_link),
-            })
-
-        return Response(results)
+            }
+            for invitation in page
+        ]
+        return paginator.get_paginated_response(results)
 
 
 class TestResultDetailView(APIView):
@@ -292,7 +550,11 @@ class TestResultDetailView(APIView):
             else:
                 return Response({"error": "Доступ запрещён"}, status=403)
 
-        answers = invitation.answers.all().select_related('question')
+        answers = (
+            invitation.answers.all()
+            .select_related('question')
+            .prefetch_related('test_results')
+        )
         feedbacks = {f.question_id: f for f in invitation.feedbacks.all()}
 
         answer_details = []
@@ -316,6 +578,15 @@ class TestResultDetailView(APIView):
                 'auto_score': auto_score,
                 'manual_score': manual_score,
                 'feedback': feedback.comment if feedback else '',
+                'test_results': [
+                    {
+                        'status': r.status,
+                        'verdict': r.verdict,
+                        'time': r.time,
+                        'weight': r.weight,
+                    }
+                    for r in answer.test_results.all()
+                ],
             })
 
         return Response({
@@ -324,6 +595,7 @@ class TestResultDetailView(APIView):
                 'email': invitation.candidate.email,
             },
             'test_template': invitation.test_template.name,
+            'grading_status': invitation.grading_status,
             'total_auto_score': total_auto,
             'total_manual_score': total_manual if total_manual > 0 else None,
             'answers': answer_details,
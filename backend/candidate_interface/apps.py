@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CandidateInterfaceConfig(AppConfig):
     name = "candidate_interface"
+
+    def ready(self):
+        from . import signals  # noqa: F401
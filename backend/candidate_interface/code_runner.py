@@ -0,0 +1,62 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from . import execution_cache, judge0, sandbox
+
+TIME_LIMIT_EXCEEDED = 5
+
+
+def case_key(source_code, case):
+    return execution_cache.execution_key(source_code, case.stdin, case.expected_output)
+
+
+def run_cases(source_code, cases):
+    """
+    Параллельный прогон программы на тестовых случаях. После превышения
+    лимита времени оставшиеся случаи не запускаются (результат None)
+    """
+
+    results = [None] * len(cases)
+    keys = [case_key(source_code, case) for case in cases]
+    to_run = []
+    for index, key in enumerate(keys):
+        results[index] = execution_cache.get_result(key)
+        if results[index] is None:
+            to_run.append(index)
+    if not to_run or any(is_time_limit(r) for r in results if r is not None):
+        return results
+
+    backend = sandbox.get_backend()
+    executor = ThreadPoolExecutor(max_workers=settings.JUDGE0_MAX_CONCURRENCY)
+    try:
+        futures = {
+            executor.submit(backend.run, source_code, cases[i].stdin): i for i in to_run
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                results[index] = future.result()
+                execution_cache.store_result(keys[index], results[index])
+                if is_time_limit(results[index]):
+                    for rest in pending:
+                        rest.cancel()
+                    return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def is_time_limit(result):
+    return result["status"]["id"] == TIME_LIMIT_EXCEEDED
+
+
+def case_passed(case, result):
+    if result is None or result.get("stderr"):
+        return False
+    if result["status"]["id"] in judge0.PENDING_STATUSES:
+        return False
+    output = (result.get("stdout") or "").strip()
+    return output == case.expected_output.strip()
@@ -1,11 +1,65 @@
+import asyncio
 import json
 import logging
+import uuid
+
+import redis
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
+from config.redis_client import get_redis
+
+from . import sandbox
+
 logger = logging.getLogger(__name__)
 
+REVIEWERS_GROUP = "grading_reviewers"
+TECH_LEAD_GROUP = "grading_tech_lead_{user_id}"
+
+# Текущий запуск кода в комнате — run_id в Redis, общий для всех процессов
+# Daphne. Новый run_code заменяет его и отменяет незавершённый прежний
+ROOM_RUN_KEY = "interview:run:{room}"
+# Задачи запусков этого процесса по run_id
+run_tasks = {}
+
+
+def replace_run(room, run_id):
+    """
+    Делает run_id текущим запуском комнаты. Возвращает прежний запуск,
+    если он ещё не завершился
+    """
+
+    return get_redis().set(
+        ROOM_RUN_KEY.format(room=room),
+        run_id,
+        ex=int(settings.CODE_RUN_TIMEOUT) + 60,
+        get=True,
+    )
+
+
+def finish_run(room, run_id):
+    """
+    Снимает run_id с комнаты. False, если запуск уже заменён новым:
+    его результат не нужен, об отмене сообщил заменивший запуск
+    """
+
+    key = ROOM_RUN_KEY.format(room=room)
+    with get_redis().pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != run_id:
+                    return False
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                continue
+
 
 class InterviewConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -64,14 +118,7 @@ class InterviewConsumer(AsyncWebsocketConsumer):
                     }))
                     return
 
-                result = await self.execute_code(data.get("code", ""))
-                await self.channel_layer.group_send(self.room_group_name, {
-                    "type": "code_result",
-                    "stdout": result.get("stdout", ""),
-                    "stderr": result.get("stderr", ""),
-                    "time": result.get("time", "0s"),
-                    "status": result.get("status", "error"),
-                })
+                await self.schedule_run(data.get("code", ""), data.get("question_id"))
         except json.JSONDecodeError:
             await self.send(text_data=json.dumps({
                 "type": "error",
@@ -93,13 +140,21 @@ class InterviewConsumer(AsyncWebsocketConsumer):
             "sender": event.get("sender", ""),
         }))
 
+    async def cancel_run(self, event):
+        # Рассылается всей комнате, задачу отменяет процесс, в котором она идёт
+        task = run_tasks.get(event["run_id"])
+        if task is not None:
+            task.cancel()
+
     async def code_result(self, event):
         await self.send(text_data=json.dumps({
             "type": "code_result",
+            "run_id": event.get("run_id"),
             "stdout": event.get("stdout", ""),
             "stderr": event.get("stderr", ""),
             "time": event.get("time", "0s"),
             "status": event.get("status", "error"),
+            "verdict": event.get("verdict", ""),
         }))
 
     @database_sync_to_async
@@ -125,12 +180,17 @@ class InterviewConsumer(AsyncWebsocketConsumer):
     def get_initial_data(self):
         from .models import Invitation
 
+        from .template_snapshot import get_invitation_snapshot
+
         invitation = Invitation.objects.get(unique_link=self.unique_link)
-        questions = list(
-            invitation.test_template.testtemplatequestion_set.all()
-            .order_by("order")
-            .values("question__id", "question__text", "question__question_type")
-        )
+        questions = [
+            {
+                "question__id": question["id"],
+                "question__text": question["text"],
+                "question__question_type": question["question_type"],
+            }
+            for question in get_invitation_snapshot(invitation).questions
+        ]
         return {
             "questions": questions,
             "current_question_id": questions[0]["question__id"] if questions else None,
@@ -144,28 +204,119 @@ class InterviewConsumer(AsyncWebsocketConsumer):
         data = await self.get_initial_data()
         await self.send(text_data=json.dumps({"type": "initial_data", **data}))
 
-    async def execute_code(self, code_text):
+    @database_sync_to_async
+    def get_question_stdin(self, question_id):
+        from interviewer_interface.models import Question
+
+        if not question_id:
+            return ""
+        return (
+            Question.objects.filter(id=question_id)
+            .values_list("stdin", flat=True)
+            .first()
+            or ""
+        )
+
+    async def schedule_run(self, code_text, question_id):
+        run_id = uuid.uuid4().hex[:8]
+        try:
+            previous = await sync_to_async(replace_run, thread_sensitive=False)(
+                self.room_group_name, run_id
+            )
+        except redis.RedisError:
+            # Без Redis запуски не заменяют друг друга
+            logger.exception(f"Failed to replace the run in {self.room_group_name}")
+            previous = None
+        if previous:
+            await self.channel_layer.group_send(
+                self.room_group_name, {"type": "cancel_run", "run_id": previous}
+            )
+            # Участники, следящие за прежним запуском, не должны ждать его результата
+            await self.send_code_result(
+                previous, "cancelled", stderr="Superseded by a new run"
+            )
+
+        await self.send_code_result(run_id, "queued")
         if not code_text or not code_text.strip():
-            return {
-                "stdout": "",
-                "stderr": "Empty code",
-                "time": "0s",
-                "status": "error"
-            }
+            await self.send_final_result(run_id, "error", stderr="Empty code")
+            return
+
+        stdin = await self.get_question_stdin(question_id)
+        task = asyncio.create_task(self.execute_code(run_id, code_text, stdin))
+        run_tasks[run_id] = task
+        task.add_done_callback(lambda _: run_tasks.pop(run_id, None))
+
+    async def send_code_result(self, run_id, status, **fields):
+        await self.channel_layer.group_send(self.room_group_name, {
+            "type": "code_result",
+            "run_id": run_id,
+            "status": status,
+            **fields,
+        })
 
+    async def send_final_result(self, run_id, status, **fields):
+        # Итог отправляется, только если запуск не заменён новым
         try:
-            logger.warning("Code execution - Judge0 integration pending")
-            return {
-                "stdout": "Mock output (Judge0 integration pending)",
-                "stderr": "",
-                "time": "0.1s",
-                "status": "success"
-            }
+            current = await sync_to_async(finish_run, thread_sensitive=False)(
+                self.room_group_name, run_id
+            )
+        except redis.RedisError:
+            logger.exception(f"Failed to finish run {run_id}")
+            current = True
+        if current:
+            await self.send_code_result(run_id, status, **fields)
+
+    async def execute_code(self, run_id, code_text, stdin):
+        backend = sandbox.get_backend()
+        try:
+            token = await backend.asubmit(code_text, stdin)
+            await self.send_code_result(run_id, "running")
+            # Отмена задачи доходит до песочницы: опрос прекращается,
+            # локальная программа завершается
+            result = await backend.await_result(token)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Code execution error: {str(e)}")
-            return {
-                "stdout": "",
-                "stderr": f"Error: {str(e)}",
-                "time": "0s",
-                "status": "error"
-            }
+            await self.send_final_result(run_id, "error", stderr=f"Error: {str(e)}")
+            return
+
+        await self.send_final_result(
+            run_id,
+            "finished",
+            stdout=result.get("stdout") or "",
+            stderr=result.get("stderr") or result.get("compile_output") or "",
+            time=f"{result.get('time') or 0}s",
+            verdict=result["status"].get("description", ""),
+        )
+
+
+class GradingConsumer(AsyncWebsocketConsumer):
+    """
+    События автопроверки для проверяющих: HR и администраторы получают
+    все приглашения, техлид — только назначенные ему
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            await self.close(code=4003, reason="Unauthorized")
+            return
+
+        if user.is_staff or getattr(user, "is_hr", False):
+            self.group_name = REVIEWERS_GROUP
+        elif getattr(user, "is_tech_lead", False):
+            self.group_name = TECH_LEAD_GROUP.format(user_id=user.id)
+        else:
+            await self.close(code=4003, reason="Unauthorized")
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def grading_event(self, event):
+        await self.send(text_data=json.dumps(event["payload"]))
@@ -0,0 +1,72 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import judge0
+
+HITS_KEY = "judge0:cache:hits"
+MISSES_KEY = "judge0:cache:misses"
+RESULT_FIELDS = (
+    "stdout",
+    "stderr",
+    "compile_output",
+    "message",
+    "status",
+    "time",
+    "memory",
+)
+
+
+def normalize_source(source_code):
+    """
+    Нормализация кода: переводы строк, хвостовые пробелы и пустые строки по краям
+    """
+
+    lines = source_code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def execution_key(source_code, stdin="", expected_output="", language_id=None):
+    payload = json.dumps(
+        [
+            normalize_source(source_code),
+            language_id or judge0.PYTHON_LANGUAGE_ID,
+            stdin or "",
+            (expected_output or "").strip(),
+        ]
+    )
+    return "judge0:result:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_result(key):
+    result = cache.get(key)
+    _count(HITS_KEY if result is not None else MISSES_KEY)
+    return result
+
+
+def store_result(key, result):
+    # Незавершённые проверки и сбои песочницы (Internal Error,
+    # Exec Format Error) не кешируем: повторный запуск может их не дать
+    if result["status"]["id"] not in judge0.VERDICT_STATUSES:
+        return
+    cached = {field: result.get(field) for field in RESULT_FIELDS}
+    cache.set(key, cached, timeout=settings.JUDGE0_CACHE_TTL)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 3) if total else None,
+    }
+
+
+def _count(key):
+    # Счётчики без TTL, поэтому не вытесняются при volatile-lru
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
@@ -0,0 +1,53 @@
+import logging
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import answer_buffer
+from .grading import enqueue_grading
+from .models import Invitation
+
+logger = logging.getLogger(__name__)
+
+
+def complete_invitation(invitation):
+    """
+    Завершает тест ровно один раз: условное обновление completed, перенос
+    черновиков и постановка в очередь проверки в одной транзакции под
+    блокировкой черновиков. Возвращает False, если тест уже завершён другим
+    запросом. Если черновики перенести не удалось, бросает redis.RedisError:
+    тест остаётся незавершённым, чтобы не проверять его без части ответов
+    """
+
+    with answer_buffer.finish_lock(invitation.id), transaction.atomic():
+        if not invitation.complete():
+            return False
+        answer_buffer.finish_invitation(invitation)
+        enqueue_grading(invitation)
+    return True
+
+
+def expire_invitations(batch_size=500):
+    """
+    Завершает приглашения с истёкшим сроком. Каждое завершается условным
+    UPDATE, поэтому приглашение, завершённое кандидатом одновременно
+    со сборщиком, не проверяется дважды
+    """
+
+    cutoff = timezone.now() - timedelta(seconds=settings.TEST_DEADLINE_GRACE)
+    expired = Invitation.objects.filter(
+        completed=False, deadline__lte=cutoff
+    ).values_list("id", "unique_link")[:batch_size]
+
+    completed = 0
+    for invitation_id, unique_link in expired:
+        invitation = Invitation(id=invitation_id, unique_link=unique_link)
+        try:
+            completed += complete_invitation(invitation)
+        except redis.RedisError:
+            # Повторим при следующем проходе
+            logger.exception(f"Failed to flush answers for invitation {invitation_id}")
+    return completed
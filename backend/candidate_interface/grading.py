@@ -0,0 +1,355 @@
+import logging
+from datetime import timedelta
+
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from config.redis_client import get_redis
+
+from . import code_runner, execution_cache, judge0, sandbox
+from .consumers import REVIEWERS_GROUP, TECH_LEAD_GROUP
+from .models import Answer, AnswerTestResult, Invitation
+
+logger = logging.getLogger(__name__)
+
+GRADING_QUEUE = "grading:queue"
+GRADING_PROCESSING = "grading:processing:{worker}"
+JUDGE0_CALLBACK_SALT = "candidate_interface.judge0_callback"
+
+
+def enqueue_grading(invitation):
+    """
+    Ставит приглашение в очередь автопроверки
+    """
+
+    Invitation.objects.filter(id=invitation.id).update(grading_status="queued")
+    invitation.grading_status = "queued"
+    publish_progress(invitation.id, "queued")
+
+    if settings.GRADING_EAGER:
+        grade_invitation(invitation.id)
+        invitation.refresh_from_db(fields=["grading_status", "graded_at"])
+        return
+
+    # Воркер должен увидеть завершённый тест и перенесённые ответы
+    transaction.on_commit(lambda: push_grading(invitation.id))
+
+
+def push_grading(invitation_id):
+    try:
+        get_redis().lpush(GRADING_QUEUE, invitation_id)
+    except redis.RedisError:
+        # Статус остаётся "queued", воркер подхватит приглашение при старте
+        logger.exception(f"Failed to enqueue grading for invitation {invitation_id}")
+
+
+GRADED_FIELDS = ["score", "grading_status", "graded_fingerprint"]
+
+
+def grade_invitation(invitation_id):
+    """
+    Автопроверка ответов приглашения. Ответы, не изменившиеся с прошлой
+    проверки, пропускаются
+    """
+
+    updated = Invitation.objects.filter(id=invitation_id).update(
+        grading_status="running"
+    )
+    if not updated:
+        return
+
+    try:
+        answers = (
+            Answer.objects.filter(invitation_id=invitation_id)
+            .select_related("question")
+            .prefetch_related("question__test_cases")
+        )
+        to_grade = [answer for answer in answers if answer.needs_grading()]
+        Answer.objects.filter(id__in=[a.id for a in to_grade]).update(
+            grading_status="running"
+        )
+
+        total = len(answers)
+        done = total - len(to_grade)
+        publish_progress(invitation_id, "running", graded=done, total=total)
+
+        use_callbacks = (
+            settings.JUDGE0_CALLBACK_URL and sandbox.get_backend().supports_callbacks
+        )
+        code_answers = []
+        graded = []
+        for answer in to_grade:
+            if use_callbacks and answer.question.question_type == "code":
+                code_answers.append(answer)
+                continue
+            answer.auto_evaluate()
+            graded.append(answer)
+            done += 1
+            publish_progress(invitation_id, "running", graded=done, total=total)
+        Answer.objects.bulk_update(graded, GRADED_FIELDS)
+
+        if code_answers:
+            submit_code_answers(code_answers)
+    except Exception:
+        logger.exception(f"Grading failed for invitation {invitation_id}")
+        Answer.objects.filter(
+            invitation_id=invitation_id, grading_status="running"
+        ).update(grading_status="failed")
+        Invitation.objects.filter(id=invitation_id).update(grading_status="failed")
+        publish_finished(invitation_id, "failed")
+        return
+
+    finish_grading(invitation_id)
+
+
+def submit_code_answers(answers):
+    """
+    Отправка всех тестовых случаев всех ответов с кодом одним пакетом,
+    результаты придут на callback. Случаи с известным результатом
+    выполнения берутся из кеша
+    """
+
+    AnswerTestResult.objects.filter(answer__in=answers).delete()
+
+    test_results = []
+    for answer in answers:
+        source = answer.response.strip()
+        cases = answer.question.grading_cases()
+        results = [
+            execution_cache.get_result(code_runner.case_key(source, case))
+            for case in cases
+        ]
+        # Превышение лимита времени уже известно — остальное не запускаем
+        timed_out = any(r is not None and code_runner.is_time_limit(r) for r in results)
+        test_results.extend(
+            AnswerTestResult.from_result(
+                answer, case, result, pending=result is None and not timed_out
+            )
+            for case, result in zip(cases, results)
+        )
+    test_results = AnswerTestResult.objects.bulk_create(test_results)
+
+    finished = []
+    pending = []
+    for answer in answers:
+        rows = [r for r in test_results if r.answer_id == answer.id]
+        if any(r.status == "pending" for r in rows):
+            pending.extend((answer, r) for r in rows if r.status == "pending")
+        else:
+            answer.score_test_results(rows)
+            finished.append(answer)
+    Answer.objects.bulk_update(finished, GRADED_FIELDS)
+
+    if not pending:
+        return
+
+    submissions = [
+        judge0.build_submission(
+            answer.response.strip(),
+            row.get_case().stdin,
+            callback_url=judge0_callback_url(row),
+        )
+        for answer, row in pending
+    ]
+    tokens = sandbox.get_backend().submit_batch(submissions)
+    submitted_at = timezone.now()
+    rows = [row for _, row in pending]
+    for row, token in zip(rows, tokens):
+        row.judge0_token = token
+        row.submitted_at = submitted_at
+    AnswerTestResult.objects.bulk_update(rows, ["judge0_token", "submitted_at"])
+
+
+def judge0_callback_url(test_result):
+    signature = signing.dumps(test_result.id, salt=JUDGE0_CALLBACK_SALT)
+    path = reverse("judge0_callback", kwargs={"signature": signature})
+    return f"{settings.JUDGE0_CALLBACK_URL.rstrip('/')}{path}"
+
+
+def apply_judge0_callback(signature, result):
+    """
+    Обработка результата Judge0, возвращает False для чужих/устаревших callback
+    """
+
+    try:
+        test_result_id = signing.loads(signature, salt=JUDGE0_CALLBACK_SALT)
+    except signing.BadSignature:
+        return False
+
+    try:
+        test_result = AnswerTestResult.objects.select_related(
+            "answer__question", "test_case"
+        ).get(id=test_result_id)
+    except AnswerTestResult.DoesNotExist:
+        return False
+
+    token = test_result.judge0_token
+    if not token or token != result.get("token"):
+        return False
+
+    try:
+        result = judge0.decode_result(result)
+    except ValueError:
+        logger.warning(f"Malformed Judge0 callback for test result {test_result_id}")
+        return False
+
+    answer = test_result.answer
+    case = test_result.get_case()
+    execution_cache.store_result(
+        code_runner.case_key(answer.response.strip(), case), result
+    )
+    test_result.apply_result(case, result)
+    test_result.save()
+
+    rows = answer.test_results.all()
+    if code_runner.is_time_limit(result):
+        # Досрочное завершение: результаты остальных случаев не ждём
+        rows.filter(status="pending").update(status="skipped", judge0_token="")
+    if not rows.filter(status="pending").exists():
+        answer.score_test_results(list(rows))
+        answer.save(update_fields=GRADED_FIELDS)
+        publish_progress(answer.invitation_id, "running")
+        finish_grading(answer.invitation_id)
+    return True
+
+
+def finish_grading(invitation_id):
+    """
+    Закрывает проверку приглашения, если не осталось ответов в работе
+    """
+
+    answers = Answer.objects.filter(invitation_id=invitation_id)
+    if answers.filter(grading_status="running").exists():
+        return
+
+    status = "failed" if answers.filter(grading_status="failed").exists() else "done"
+    Invitation.objects.filter(id=invitation_id).update(
+        grading_status=status, graded_at=timezone.now()
+    )
+    publish_finished(invitation_id, status)
+
+
+def reap_lost_callbacks():
+    """
+    Случаи, по которым callback Judge0 не пришёл за JUDGE0_CALLBACK_TIMEOUT,
+    считаются ошибкой проверки: ответ получает статус "failed"
+    и проверка приглашения завершается. Возвращает число таких случаев
+    """
+
+    cutoff = timezone.now() - timedelta(seconds=settings.JUDGE0_CALLBACK_TIMEOUT)
+    lost = AnswerTestResult.objects.filter(status="pending", submitted_at__lt=cutoff)
+    answer_ids = set(lost.values_list("answer_id", flat=True))
+    if not answer_ids:
+        return 0
+
+    # Сброс токена отклоняет callback, если он всё же придёт
+    reaped = lost.update(status="failed", verdict="Callback timeout", judge0_token="")
+    answers = Answer.objects.filter(id__in=answer_ids, grading_status="running")
+    invitation_ids = set()
+    for answer in answers.select_related("question"):
+        answer.score_test_results(list(answer.test_results.all()))
+        answer.grading_status = "failed"
+        answer.save(update_fields=GRADED_FIELDS)
+        invitation_ids.add(answer.invitation_id)
+    for invitation_id in invitation_ids:
+        finish_grading(invitation_id)
+    return reaped
+
+
+def publish_progress(invitation_id, status, graded=None, total=None):
+    if total is None:
+        counts = Answer.objects.filter(invitation_id=invitation_id).aggregate(
+            total=Count("id"),
+            graded=Count("id", filter=Q(grading_status__in=["graded", "failed"])),
+        )
+        graded, total = counts["graded"], counts["total"]
+    publish_grading_event(
+        invitation_id, "grading_progress", status=status, graded=graded, total=total
+    )
+
+
+def publish_finished(invitation_id, status):
+    auto_score = Answer.objects.filter(invitation_id=invitation_id).aggregate(
+        total=Sum("score")
+    )["total"]
+    publish_grading_event(
+        invitation_id, "grading_finished", status=status, auto_score=auto_score or 0
+    )
+
+
+def publish_grading_event(invitation_id, event_type, **fields):
+    """
+    Рассылает событие проверки проверяющим через channel layer.
+    Ошибка доставки не влияет на саму проверку
+    """
+
+    tech_lead_id = (
+        Invitation.objects.filter(id=invitation_id)
+        .values_list("assigned_tech_lead_id", flat=True)
+        .first()
+    )
+    groups = [REVIEWERS_GROUP]
+    if tech_lead_id:
+        groups.append(TECH_LEAD_GROUP.format(user_id=tech_lead_id))
+
+    message = {
+        "type": "grading_event",
+        "payload": {"type": event_type, "invitation_id": invitation_id, **fields},
+    }
+    try:
+        channel_layer = get_channel_layer()
+        for group in groups:
+            async_to_sync(channel_layer.group_send)(group, message)
+    except Exception:
+        logger.exception(
+            f"Failed to publish {event_type} for invitation {invitation_id}"
+        )
+
+
+def recover_grading_jobs(worker):
+    """
+    Возвращает в очередь задачи, не завершённые воркером до остановки,
+    и приглашения, которые не удалось поставить в очередь
+    """
+
+    client = get_redis()
+    processing = GRADING_PROCESSING.format(worker=worker)
+    recovered = 0
+    # В начало очереди со стороны воркеров, старшие задачи — первыми
+    while client.lmove(processing, GRADING_QUEUE, "LEFT", "RIGHT") is not None:
+        recovered += 1
+
+    queued_ids = Invitation.objects.filter(grading_status="queued").values_list(
+        "id", flat=True
+    )
+    for invitation_id in queued_ids:
+        if client.lpos(GRADING_QUEUE, invitation_id) is None:
+            client.lpush(GRADING_QUEUE, invitation_id)
+            recovered += 1
+    return recovered
+
+
+def next_grading_job(worker, timeout):
+    """
+    Забирает следующую задачу, оставляя её копию в списке воркера до подтверждения
+    """
+
+    job = get_redis().blmove(
+        GRADING_QUEUE,
+        GRADING_PROCESSING.format(worker=worker),
+        timeout,
+        "RIGHT",
+        "LEFT",
+    )
+    return int(job) if job is not None else None
+
+
+def ack_grading_job(worker, invitation_id):
+    get_redis().lrem(GRADING_PROCESSING.format(worker=worker), 1, invitation_id)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import cache
+
+INVITATION_KEY = "invitation:state:{unique_link}"
+
+# Поля, которые читает API кандидата. Остальные поля отложены
+# и при обращении загружаются отдельным запросом
+STATE_FIELDS = (
+    "id",
+    "unique_link",
+    "completed",
+    "interview_type",
+    "answers_revision",
+    "started_at",
+    "deadline",
+    "question_ids",
+    "candidate__full_name",
+    "test_template__name",
+    "test_template__time_limit",
+    "test_template__version",
+)
+
+
+def get_invitation(unique_link):
+    """
+    Приглашение по ссылке для API кандидата: из кеша или одним запросом
+    вместе с кандидатом и шаблоном. Версия шаблона фиксируется на время
+    жизни записи, поэтому тест не меняется у кандидата посреди прохождения.
+    Бросает Invitation.DoesNotExist
+    """
+
+    from .models import Invitation
+
+    key = INVITATION_KEY.format(unique_link=unique_link)
+    invitation = cache.get(key)
+    if invitation is None:
+        invitation = (
+            Invitation.objects.select_related("candidate", "test_template")
+            .only(*STATE_FIELDS)
+            .get(unique_link=unique_link)
+        )
+        cache.set(key, invitation, timeout=settings.INVITATION_CACHE_TTL)
+    return invitation
+
+
+def invalidate(*unique_links):
+    if unique_links:
+        cache.delete_many(
+            [INVITATION_KEY.format(unique_link=link) for link in unique_links]
+        )
@@ -0,0 +1,229 @@
+import asyncio
+import base64
+import logging
+import threading
+import time
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PYTHON_LANGUAGE_ID = 71
+PENDING_STATUSES = (1, 2)  # In Queue, Processing
+# Вердикты, зависящие только от кода и входа: Accepted .. Runtime Error (Other)
+VERDICT_STATUSES = range(3, 13)
+# Запрос не дошёл до Judge0 — повторяется любой метод
+RETRY_STATUSES = (429, 503)
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# Обрыв ответа и ошибки шлюза возможны, когда Judge0 уже принял POST:
+# повтор создал бы вторую программу, поэтому повторяются только GET
+IDEMPOTENT_RETRY_STATUSES = RETRY_STATUSES + (502, 504)
+IDEMPOTENT_RETRY_ERRORS = RETRY_ERRORS + (httpx.RemoteProtocolError,)
+# Текстовые поля результата, которые Judge0 кодирует в base64
+ENCODED_FIELDS = ("stdout", "stderr", "compile_output", "message")
+
+
+class Judge0Error(Exception):
+    pass
+
+
+def retry_policy(method):
+    """
+    Ошибки и статусы ответа, при которых запрос можно повторить
+    """
+
+    if method == "GET":
+        return IDEMPOTENT_RETRY_ERRORS, IDEMPOTENT_RETRY_STATUSES
+    return RETRY_ERRORS, RETRY_STATUSES
+
+
+class Judge0Client:
+    """
+    Клиент Judge0 с пулом keep-alive соединений, ограничением числа
+    одновременных запросов и повтором с экспоненциальной задержкой.
+    Синхронные методы — для воркера проверки, async — для WebSocket
+    """
+
+    def __init__(
+        self,
+        base_url,
+        max_connections=10,
+        max_concurrency=10,
+        timeout=30.0,
+        retries=3,
+        backoff=0.5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+
+        self._client = httpx.Client(
+            base_url=self.base_url, limits=self.limits, timeout=self.timeout
+        )
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._async_client = None
+        self._async_semaphore = None
+        self._loop = None
+
+    def request(self, method, path, **kwargs):
+        retry_errors, retry_statuses = retry_policy(method)
+        for attempt in range(self.retries + 1):
+            try:
+                with self._semaphore:
+                    resp = self._client.request(method, path, **kwargs)
+            except IDEMPOTENT_RETRY_ERRORS as e:
+                if not isinstance(e, retry_errors) or attempt == self.retries:
+                    raise Judge0Error(f"Judge0 unavailable: {e}") from e
+            else:
+                if resp.status_code not in retry_statuses or attempt == self.retries:
+                    return resp
+            delay = self.backoff * 2**attempt
+            logger.warning(f"Judge0 {method} {path} failed, retry in {delay}s")
+            time.sleep(delay)
+
+    async def arequest(self, method, path, **kwargs):
+        client, semaphore = self._get_async_client()
+        retry_errors, retry_statuses = retry_policy(method)
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    resp = await client.request(method, path, **kwargs)
+            except IDEMPOTENT_RETRY_ERRORS as e:
+                if not isinstance(e, retry_errors) or attempt == self.retries:
+                    raise Judge0Error(f"Judge0 unavailable: {e}") from e
+            else:
+                if resp.status_code not in retry_statuses or attempt == self.retries:
+                    return resp
+            delay = self.backoff * 2**attempt
+            logger.warning(f"Judge0 {method} {path} failed, retry in {delay}s")
+            await asyncio.sleep(delay)
+
+    def _get_async_client(self):
+        # AsyncClient и asyncio.Semaphore привязаны к циклу событий
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url, limits=self.limits, timeout=self.timeout
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._async_client, self._async_semaphore
+
+    def run_submission(self, source_code, stdin=""):
+        """
+        Синхронное выполнение одной программы (Judge0 отвечает после завершения)
+        """
+
+        resp = self.request(
+            "POST",
+            "/submissions",
+            params={"base64_encoded": "false", "wait": "true"},
+            json=build_submission(source_code, stdin),
+        )
+        if resp.status_code not in (200, 201):
+            raise Judge0Error(f"Judge0 returned {resp.status_code}")
+        return resp.json()
+
+    def submit_batch(self, submissions):
+        """
+        Отправка пакета программ, возвращает токены в том же порядке.
+        Пакеты больше лимита Judge0 делятся на части
+        """
+
+        tokens = []
+        for start in range(0, len(submissions), settings.JUDGE0_BATCH_SIZE):
+            chunk = submissions[start : start + settings.JUDGE0_BATCH_SIZE]
+            resp = self.request(
+                "POST",
+                "/submissions/batch",
+                params={"base64_encoded": "false"},
+                json={"submissions": chunk},
+            )
+            if resp.status_code != 201:
+                raise Judge0Error(f"Judge0 returned {resp.status_code}")
+
+            for item in resp.json():
+                if "token" not in item:
+                    raise Judge0Error(f"Judge0 rejected submission: {item}")
+                tokens.append(item["token"])
+        return tokens
+
+    async def asubmit(self, source_code, stdin=""):
+        resp = await self.arequest(
+            "POST",
+            "/submissions",
+            params={"base64_encoded": "false"},
+            json=build_submission(source_code, stdin),
+        )
+        if resp.status_code != 201:
+            raise Judge0Error(f"Judge0 returned {resp.status_code}")
+        return resp.json()["token"]
+
+    async def aget_submission(self, token):
+        resp = await self.arequest(
+            "GET", f"/submissions/{token}", params={"base64_encoded": "false"}
+        )
+        if resp.status_code != 200:
+            raise Judge0Error(f"Judge0 returned {resp.status_code}")
+        return resp.json()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Judge0Client(
+                settings.JUDGE0_URL,
+                max_connections=settings.JUDGE0_MAX_CONNECTIONS,
+                max_concurrency=settings.JUDGE0_MAX_CONCURRENCY,
+                timeout=settings.JUDGE0_TIMEOUT,
+                retries=settings.JUDGE0_RETRIES,
+                backoff=settings.JUDGE0_RETRY_BACKOFF,
+            )
+    return _client
+
+
+def build_submission(source_code, stdin="", callback_url=None):
+    submission = {
+        "source_code": source_code,
+        "language_id": PYTHON_LANGUAGE_ID,
+        "stdin": stdin or "",
+    }
+    if callback_url:
+        submission["callback_url"] = callback_url
+    return submission
+
+
+def run_submission(source_code, stdin=""):
+    return get_client().run_submission(source_code, stdin)
+
+
+def submit_batch(submissions):
+    return get_client().submit_batch(submissions)
+
+
+def decode_result(result):
+    """
+    Декодирует результат из callback: Judge0 всегда присылает текстовые
+    поля в base64, независимо от base64_encoded при отправке.
+    Бросает ValueError для некорректного base64
+    """
+
+    decoded = dict(result)
+    for field in ENCODED_FIELDS:
+        if decoded.get(field):
+            decoded[field] = base64.b64decode(decoded[field], validate=True).decode(
+                errors="replace"
+            )
+    return decoded
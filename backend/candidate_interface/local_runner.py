@@ -0,0 +1,422 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import select
+import signal
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import warm_worker
+from .sandbox import ExecutionBackend
+
+logger = logging.getLogger(__name__)
+
+# Коды статусов совпадают с Judge0
+STATUS_QUEUED = {"id": 1, "description": "In Queue"}
+STATUS_ACCEPTED = {"id": 3, "description": "Accepted"}
+STATUS_TIME_LIMIT = {"id": 5, "description": "Time Limit Exceeded"}
+STATUS_BY_SIGNAL = {
+    signal.SIGSEGV: {"id": 7, "description": "Runtime Error (SIGSEGV)"},
+    signal.SIGXFSZ: {"id": 8, "description": "Runtime Error (SIGXFSZ)"},
+    signal.SIGFPE: {"id": 9, "description": "Runtime Error (SIGFPE)"},
+    signal.SIGABRT: {"id": 10, "description": "Runtime Error (SIGABRT)"},
+}
+STATUS_NZEC = {"id": 11, "description": "Runtime Error (NZEC)"}
+STATUS_OTHER = {"id": 12, "description": "Runtime Error (Other)"}
+STATUS_INTERNAL = {"id": 13, "description": "Internal Error"}
+RESULT_TTL = 300
+# Запас сверх лимита времени на ответ прогретого процесса
+WORKER_REPLY_GRACE = 2.0
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def is_private(path):
+    """
+    Путь недоступен другим пользователям: какой-то каталог на нём нельзя пройти
+    """
+
+    path = os.path.realpath(path)
+    while True:
+        if not os.stat(path).st_mode & stat.S_IXOTH:
+            return True
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+def check_isolation(uid):
+    """
+    Предупреждает, если код кандидата сможет прочитать проект (процесс
+    не может сменить пользователя или каталог с db.sqlite3 и настройками
+    открыт) или пользователю песочницы недоступен интерпретатор
+    """
+
+    if os.getuid() != 0:
+        logger.warning(
+            f"Local sandbox runs as uid {os.getuid()}: "
+            "candidate code can read the project and database"
+        )
+        return
+    if not is_private(settings.BASE_DIR):
+        logger.warning(
+            f"{settings.BASE_DIR} is accessible to sandbox uid {uid}: "
+            "make the project directory private (chmod 700)"
+        )
+    if is_private(sys.executable):
+        logger.warning(f"{sys.executable} is not accessible to sandbox uid {uid}")
+
+
+class WarmInterpreter:
+    """
+    Один прогретый процесс warm_worker: интерпретатор уже запущен,
+    частые модули импортированы, каждая программа выполняется в fork
+    """
+
+    def __init__(self, limits, wall_time, user):
+        self.wall_time = wall_time
+        self.user = user
+        self.runs = 0
+        self._write_lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-I",
+                "-S",
+                warm_worker.__file__,
+                *map(str, limits),
+                str(wall_time),
+                *map(str, user),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env={"PYTHONIOENCODING": "utf-8", "PYTHONDONTWRITEBYTECODE": "1"},
+            start_new_session=True,
+        )
+        self.ready = False
+
+    def run(self, source_code, stdin="", track=None):
+        if not self.ready:
+            self.read_message(WORKER_REPLY_GRACE * 5)
+            self.ready = True
+        self.send({"source_code": source_code, "stdin": stdin or ""})
+        self.runs += 1
+        if track is not None:
+            track(self.cancel)
+        return self.read_message(self.wall_time + WORKER_REPLY_GRACE)
+
+    def send(self, message):
+        data = json.dumps(message).encode()
+        with self._write_lock:
+            try:
+                self.proc.stdin.write(warm_worker.HEADER.pack(len(data)) + data)
+                self.proc.stdin.flush()
+            except OSError as e:
+                raise WorkerCrashed(str(e)) from e
+
+    def cancel(self):
+        """
+        Отмена выполняющейся программы: прогретый процесс завершает её
+        и отвечает результатом как обычно
+        """
+
+        try:
+            self.send({"cancel": True})
+        except (WorkerCrashed, ValueError):
+            # Процесс уже заменён
+            pass
+
+    def read_message(self, timeout):
+        header = self.read_exactly(warm_worker.HEADER.size, timeout)
+        return json.loads(
+            self.read_exactly(warm_worker.HEADER.unpack(header)[0], timeout)
+        )
+
+    def read_exactly(self, size, timeout):
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        chunks = []
+        while size:
+            ready, _, _ = select.select(
+                [fd], [], [], max(0, deadline - time.monotonic())
+            )
+            chunk = os.read(fd, size) if ready else b""
+            if not chunk:
+                raise WorkerCrashed("Warm interpreter did not respond")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.proc.wait()
+        self.proc.stdin.close()
+        self.proc.stdout.close()
+
+
+class InterpreterPool:
+    """
+    Пул прогретых интерпретаторов, по одному на пользователя песочницы.
+    Процесс заменяется новым после LOCAL_RUNNER_RECYCLE_AFTER запусков
+    или после любого нарушения лимитов
+    """
+
+    def __init__(self, users, limits, wall_time, recycle_after):
+        self.limits = limits
+        self.wall_time = wall_time
+        self.recycle_after = recycle_after
+        self._idle = queue.Queue()
+        for user in users:
+            self._idle.put(self.spawn(user))
+
+    def spawn(self, user):
+        return WarmInterpreter(self.limits, self.wall_time, user)
+
+    def run(self, source_code, stdin="", track=None):
+        interpreter = self._idle.get()
+        recycle = True
+        try:
+            result = interpreter.run(source_code, stdin, track)
+            recycle = (
+                result["timed_out"]
+                or result["returncode"] < 0
+                or interpreter.runs >= self.recycle_after
+            )
+            return result
+        finally:
+            if track is not None:
+                track(None)
+            if recycle:
+                interpreter.close()
+                interpreter = self.spawn(interpreter.user)
+            self._idle.put(interpreter)
+
+
+class LocalBackend(ExecutionBackend):
+    """
+    Локальная песочница без внешних сервисов: каждая программа запускается
+    отдельным процессом Python с лимитами CPU, памяти, размера файлов,
+    числа процессов и времени. Число одновременных запусков ограничено
+    пулом воркеров, у каждого воркера свой непривилегированный uid.
+    Для тестов и небольших установок на Linux
+    """
+
+    def __init__(self):
+        self.cpu_time = settings.LOCAL_RUNNER_CPU_TIME
+        self.wall_time = settings.LOCAL_RUNNER_WALL_TIME
+        self.memory_bytes = settings.LOCAL_RUNNER_MEMORY_MB * 1024 * 1024
+        self.output_limit = settings.LOCAL_RUNNER_OUTPUT_LIMIT
+        self.limits = (self.cpu_time, self.memory_bytes, self.output_limit)
+        users = [
+            (settings.LOCAL_RUNNER_UID + i, settings.LOCAL_RUNNER_GID)
+            for i in range(settings.LOCAL_RUNNER_WORKERS)
+        ]
+        check_isolation(users[0][0])
+        self._users = queue.Queue()
+        for user in users:
+            self._users.put(user)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.LOCAL_RUNNER_WORKERS,
+            thread_name_prefix="local-runner",
+        )
+        self._futures = {}
+        # Как остановить выполняющийся запуск, по токену
+        self._running = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        if settings.LOCAL_RUNNER_WARM_POOL:
+            self._pool = InterpreterPool(
+                users,
+                self.limits,
+                self.wall_time,
+                settings.LOCAL_RUNNER_RECYCLE_AFTER,
+            )
+
+    def run(self, source_code, stdin=""):
+        return self._executor.submit(self.execute, source_code, stdin).result()
+
+    def submit(self, source_code, stdin=""):
+        token = uuid.uuid4().hex
+        future = self._executor.submit(self.execute, source_code, stdin, token)
+        with self._lock:
+            self.forget_stale()
+            self._futures[token] = (future, time.monotonic())
+        return token
+
+    def get_result(self, token):
+        with self._lock:
+            future, _ = self._futures.get(token, (None, None))
+            if future is None:
+                return {"status": STATUS_INTERNAL, "stderr": "Unknown token"}
+            if not future.done():
+                return {"status": STATUS_QUEUED}
+            del self._futures[token]
+        return future.result()
+
+    async def await_result(self, token):
+        with self._lock:
+            future, _ = self._futures.pop(token, (None, None))
+        if future is None:
+            return {"status": STATUS_INTERNAL, "stderr": "Unknown token"}
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), settings.CODE_RUN_TIMEOUT
+            )
+        except asyncio.CancelledError:
+            # Ещё не начатый запуск отменяется вместе с future,
+            # выполняющуюся программу завершаем
+            self.stop(token)
+            raise
+
+    def stop(self, token):
+        with self._lock:
+            stop = self._running.get(token)
+        if stop is not None:
+            stop()
+
+    def track(self, token, stop):
+        """
+        Запоминает, как остановить запуск token; stop=None — запуск завершён
+        """
+
+        if token is None:
+            return
+        with self._lock:
+            if stop is None:
+                self._running.pop(token, None)
+            else:
+                self._running[token] = stop
+
+    def forget_stale(self):
+        # Результаты, которые так и не забрали (например, отменённый запуск)
+        expired = time.monotonic() - RESULT_TTL
+        for token, (future, created) in list(self._futures.items()):
+            if future.done() and created < expired:
+                del self._futures[token]
+
+    def execute(self, source_code, stdin="", token=None):
+        track = functools.partial(self.track, token)
+        if self._pool is not None:
+            try:
+                run = self._pool.run(source_code, stdin, track)
+            except WorkerCrashed:
+                logger.exception("Warm interpreter failed")
+                return {"status": STATUS_INTERNAL, "stderr": "Sandbox failure"}
+            return self.build_result(
+                run["returncode"],
+                run["timed_out"],
+                run["stdout"],
+                run["stderr"],
+                run["time"],
+                run["output_exceeded"],
+            )
+        user = self._users.get()
+        try:
+            return self.execute_cold(source_code, stdin, user, track)
+        finally:
+            self._users.put(user)
+
+    def execute_cold(self, source_code, stdin, user, track):
+        """
+        Запуск программы в новом процессе Python. Вывод пишется в файлы,
+        размер которых ограничен RLIMIT_FSIZE, как в прогретом процессе
+        """
+
+        with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+            # Пользователь песочницы читает main.py, но не видит каталог
+            # и не пишет в него: stdin и вывод открывает родитель
+            os.chmod(workdir, 0o711)
+            path = os.path.join(workdir, "main.py")
+            with open(path, "w") as f:
+                f.write(source_code)
+            os.chmod(path, 0o644)
+            stdin_path = os.path.join(workdir, "stdin")
+            with open(stdin_path, "w", encoding="utf-8") as f:
+                f.write(stdin or "")
+            stdout_path = os.path.join(workdir, "stdout")
+            stderr_path = os.path.join(workdir, "stderr")
+
+            started = time.monotonic()
+            with (
+                open(stdin_path, "rb") as stdin_file,
+                open(stdout_path, "wb") as stdout_file,
+                open(stderr_path, "wb") as stderr_file,
+            ):
+                proc = subprocess.Popen(
+                    [sys.executable, "-I", "-S", path],
+                    cwd=workdir,
+                    stdin=stdin_file,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    env={"PYTHONIOENCODING": "utf-8", "PYTHONDONTWRITEBYTECODE": "1"},
+                    preexec_fn=functools.partial(
+                        warm_worker.apply_limits, self.limits, user
+                    ),
+                    start_new_session=True,
+                )
+            track(proc.kill)
+            try:
+                proc.wait(timeout=self.wall_time)
+                timed_out = False
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                timed_out = True
+            finally:
+                track(None)
+            elapsed = time.monotonic() - started
+
+            return self.build_result(
+                proc.returncode,
+                timed_out,
+                warm_worker.read_output(stdout_path, self.output_limit),
+                warm_worker.read_output(stderr_path, self.output_limit),
+                elapsed,
+                warm_worker.output_exceeded(
+                    (stdout_path, stderr_path), self.output_limit
+                ),
+            )
+
+    def build_result(
+        self, returncode, timed_out, stdout, stderr, elapsed, output_exceeded=False
+    ):
+        return {
+            "status": self.status_for(returncode, timed_out, output_exceeded),
+            "stdout": stdout,
+            "stderr": stderr or None,
+            "compile_output": None,
+            "message": None,
+            "time": f"{elapsed:.3f}",
+            "memory": None,
+        }
+
+    @staticmethod
+    def status_for(returncode, timed_out, output_exceeded=False):
+        if timed_out or returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+            return STATUS_TIME_LIMIT
+        # Python игнорирует SIGXFSZ, поэтому переполнение вывода определяется
+        # по размеру файлов; вердикт совпадает с Judge0
+        if output_exceeded:
+            return STATUS_BY_SIGNAL[signal.SIGXFSZ]
+        if returncode == 0:
+            return STATUS_ACCEPTED
+        if returncode > 0:
+            return STATUS_NZEC
+        return STATUS_BY_SIGNAL.get(-returncode, STATUS_OTHER)
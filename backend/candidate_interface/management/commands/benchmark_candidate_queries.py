@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from candidate_interface.models import Candidate, Invitation
+from interviewer_interface.models import Question, TestTemplate, TestTemplateQuestion
+
+CONFIGURATIONS = (
+    ("db sessions", "django.contrib.sessions.backends.db", False),
+    ("cached_db sessions", "django.contrib.sessions.backends.cached_db", False),
+    ("sessionless candidate API", "django.contrib.sessions.backends.cached_db", True),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Count database queries per candidate request for each session "
+        "configuration. Test data is created inside a rolled back transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                invitation, question_ids = self.create_test(options["questions"])
+                for name, engine, sessionless in CONFIGURATIONS:
+                    with override_settings(
+                        SESSION_ENGINE=engine, CANDIDATE_API_SESSIONLESS=sessionless
+                    ):
+                        counts = self.measure(
+                            invitation, question_ids, options["requests"]
+                        )
+                    self.stdout.write(
+                        f"{name:<28} "
+                        + ", ".join(f"{k}: {v:.1f}" for k, v in counts.items())
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_test(self, questions_count):
+        template = TestTemplate.objects.create(name="Benchmark", description="")
+        question_ids = []
+        for order in range(questions_count):
+            question = Question.objects.create(
+                text=f"Question {order}", question_type="text", correct_answer="yes"
+            )
+            TestTemplateQuestion.objects.create(
+                template=template, question=question, order=order
+            )
+            question_ids.append(question.id)
+        candidate = Candidate.objects.create(
+            email="benchmark@example.com", full_name="Benchmark"
+        )
+        invitation = Invitation.objects.create(
+            candidate=candidate, test_template=template
+        )
+        return invitation, question_ids
+
+    def measure(self, invitation, question_ids, requests):
+        # У кандидата уже есть cookie сессии, как после входа сотрудника
+        # в том же браузере или после старых версий с таймером в сессии
+        client = Client()
+        session = client.session
+        session["benchmark"] = True
+        session.save()
+        client.cookies["sessionid"] = session.session_key
+
+        base = f"/api/candidate/test/{invitation.unique_link}"
+        calls = {
+            "bootstrap": lambda i: client.get(f"{base}/bootstrap/"),
+            "question": lambda i: client.get(
+                f"{base}/question/{question_ids[i % len(question_ids)]}/"
+            ),
+            "answer": lambda i: client.post(
+                f"{base}/question/{question_ids[i % len(question_ids)]}/answer/",
+                {"response": f"answer {i}"},
+                content_type="application/json",
+            ),
+        }
+        for call in calls.values():
+            call(0)  # прогрев снимка теста и кешей
+
+        counts = {}
+        for name, call in calls.items():
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(requests):
+                    call(i)
+            counts[name] = len(queries) / requests
+        return counts
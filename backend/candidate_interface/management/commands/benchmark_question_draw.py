@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from candidate_interface.models import Candidate, Invitation
+from interviewer_interface.models import Question, Tag, TemplateDrawRule, TestTemplate
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bulk creation of invitations with questions drawn from tagged "
+        "pools. Test data is created inside a rolled back transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invitations", type=int, default=2000)
+        parser.add_argument("--pool", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                template = self.create_template(options["pool"])
+                candidates = Candidate.objects.bulk_create(
+                    Candidate(email=f"draw{i}@example.com", full_name=f"Draw {i}")
+                    for i in range(options["invitations"])
+                )
+
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    invitations = Invitation.create_many(candidates, template)
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{len(invitations)} invitations, {len(queries)} queries, "
+                    f"{elapsed * 1000:.0f} ms "
+                    f"({elapsed / len(invitations) * 1e6:.0f} us per invitation)"
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_template(self, pool_size):
+        tag = Tag.objects.create(name="benchmark-draw")
+        questions = Question.objects.bulk_create(
+            Question(
+                text=f"Question {i}",
+                question_type="text",
+                complexity=("easy", "medium", "hard")[i % 3],
+                correct_answer="yes",
+            )
+            for i in range(pool_size)
+        )
+        tag.questions.add(*questions)
+
+        template = TestTemplate.objects.create(name="Benchmark draw", description="")
+        TemplateDrawRule.objects.create(
+            template=template, tag=tag, complexity="easy", count=3
+        )
+        TemplateDrawRule.objects.create(
+            template=template, tag=tag, complexity="hard", count=2, order=1
+        )
+        template.refresh_from_db(fields=["version"])
+        return template
@@ -0,0 +1,48 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from candidate_interface import sandbox
+
+PROGRAMS = {
+    "trivial": ("print(input())", "hello"),
+    "loop": ("print(sum(range(10 ** 6)))", ""),
+}
+
+
+class Command(BaseCommand):
+    help = "Measure code execution throughput: benchmark_sandbox [--runs N] [--concurrency C]"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--program", choices=PROGRAMS, default="trivial")
+
+    def handle(self, *args, **options):
+        backend = sandbox.get_backend()
+        source_code, stdin = PROGRAMS[options["program"]]
+
+        def timed_run(_):
+            started = time.perf_counter()
+            result = backend.run(source_code, stdin)
+            return time.perf_counter() - started, result["status"]["id"]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            runs = list(executor.map(timed_run, range(options["runs"])))
+        total = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in runs)
+        failed = sum(1 for _, status in runs if status != 3)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        self.stdout.write(f"Backend: {type(backend).__name__}")
+        self.stdout.write(
+            f"Runs: {len(runs)}, failed: {failed}, "
+            f"throughput: {len(runs) / total:.1f} runs/s"
+        )
+        self.stdout.write(
+            f"Latency ms: median {statistics.median(latencies) * 1000:.1f}, "
+            f"p95 {p95 * 1000:.1f}, max {latencies[-1] * 1000:.1f}"
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from candidate_interface.tab_compaction import compact_invitations, delete_expired_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact tab switch events of completed invitations into away intervals "
+        "and delete raw events past retention: compact_tab_switches [--once]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=60 * 60)
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Tab switch compactor started"))
+        while True:
+            close_old_connections()
+            compacted = compact_invitations()
+            while compacted:
+                self.stdout.write(f"Compacted tab switches of {compacted} invitations")
+                compacted = compact_invitations()
+            deleted = delete_expired_logs()
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} raw tab switch events")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from candidate_interface.expiry import expire_invitations
+
+
+class Command(BaseCommand):
+    help = "Complete invitations past their deadline: expire_invitations [--once]"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=5)
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Invitation sweeper started"))
+        while True:
+            close_old_connections()
+            expired = expire_invitations()
+            if expired:
+                self.stdout.write(f"Completed {expired} expired invitations")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from candidate_interface.answer_buffer import flush_all
+
+
+class Command(BaseCommand):
+    help = "Flush buffered answer drafts to the database: flush_answers [--once]"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=settings.ANSWER_FLUSH_INTERVAL
+        )
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Answer flusher started"))
+        while True:
+            close_old_connections()
+            flushed = flush_all()
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} answers")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
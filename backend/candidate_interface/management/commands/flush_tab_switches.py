@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from candidate_interface.tab_switch_buffer import flush_switches
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush buffered tab switch events to the database: flush_tab_switches [--once]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=settings.TAB_SWITCH_FLUSH_INTERVAL
+        )
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Tab switch flusher started"))
+        while True:
+            close_old_connections()
+            flushed = flush_switches()
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} tab switch events")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,50 @@
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from candidate_interface.grading import (
+    ack_grading_job,
+    grade_invitation,
+    next_grading_job,
+    reap_lost_callbacks,
+    recover_grading_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = "Run background grading worker: grading_worker [--name NAME] [--once]"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=socket.gethostname())
+        parser.add_argument("--timeout", type=int, default=5)
+        parser.add_argument("--once", action="store_true")
+        parser.add_argument("--reap-interval", type=float, default=60)
+
+    def handle(self, *args, **options):
+        worker = options["name"]
+        recovered = recover_grading_jobs(worker)
+        if recovered:
+            self.stdout.write(f"Requeued {recovered} grading jobs")
+        self.stdout.write(self.style.SUCCESS(f"Grading worker {worker} started"))
+
+        next_reap = 0
+        while True:
+            if time.monotonic() >= next_reap:
+                close_old_connections()
+                reaped = reap_lost_callbacks()
+                if reaped:
+                    self.stdout.write(f"Failed {reaped} test cases without callback")
+                next_reap = time.monotonic() + options["reap_interval"]
+
+            invitation_id = next_grading_job(worker, options["timeout"])
+            if invitation_id is None:
+                if options["once"]:
+                    return
+                continue
+
+            close_old_connections()
+            grade_invitation(invitation_id)
+            ack_grading_job(worker, invitation_id)
+            self.stdout.write(f"Graded invitation {invitation_id}")
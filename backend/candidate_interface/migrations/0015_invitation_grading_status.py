@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0014_manualgrade"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="graded_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Время автопроверки"
+            ),
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="grading_status",
+            field=models.CharField(
+                choices=[
+                    ("not_started", "Не запускалась"),
+                    ("queued", "В очереди"),
+                    ("running", "Выполняется"),
+                    ("done", "Завершена"),
+                    ("failed", "Ошибка"),
+                ],
+                default="not_started",
+                max_length=20,
+                verbose_name="Статус автопроверки",
+            ),
+        ),
+    ]
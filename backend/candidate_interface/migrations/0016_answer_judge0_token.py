@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0015_invitation_grading_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="judge0_token",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=64,
+                verbose_name="Токен проверки Judge0",
+            ),
+        ),
+    ]
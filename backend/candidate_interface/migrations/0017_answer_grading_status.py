@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0016_answer_judge0_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="graded_fingerprint",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Отпечаток проверенного ответа"
+            ),
+        ),
+        migrations.AddField(
+            model_name="answer",
+            name="grading_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает проверки"),
+                    ("running", "Проверяется"),
+                    ("graded", "Проверен"),
+                    ("failed", "Ошибка проверки"),
+                ],
+                default="pending",
+                max_length=10,
+                verbose_name="Статус проверки",
+            ),
+        ),
+    ]
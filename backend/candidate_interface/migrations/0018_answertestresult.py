@@ -0,0 +1,92 @@
+# Generated by Django 6.0 on 2026-10-18 10:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0017_answer_grading_status"),
+        ("interviewer_interface", "0011_questiontestcase"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="answer",
+            name="judge0_token",
+        ),
+        migrations.CreateModel(
+            name="AnswerTestResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("weight", models.PositiveIntegerField(default=1, verbose_name="Вес")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Выполняется"),
+                            ("passed", "Пройден"),
+                            ("failed", "Не пройден"),
+                            ("skipped", "Пропущен"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "verdict",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Вердикт песочницы"
+                    ),
+                ),
+                (
+                    "time",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="Время выполнения (с)"
+                    ),
+                ),
+                (
+                    "judge0_token",
+                    models.CharField(
+                        blank=True,
+                        db_index=True,
+                        max_length=64,
+                        verbose_name="Токен проверки Judge0",
+                    ),
+                ),
+                (
+                    "answer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="test_results",
+                        to="candidate_interface.answer",
+                        verbose_name="Ответ",
+                    ),
+                ),
+                (
+                    "test_case",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="interviewer_interface.questiontestcase",
+                        verbose_name="Тестовый случай",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Результат тестового случая",
+                "verbose_name_plural": "Результаты тестовых случаев",
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0018_answertestresult"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="answers_revision",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Увеличивается при каждом сохранении ответа",
+                verbose_name="Ревизия ответов",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 10:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    # Остаётся последний сохранённый ответ на каждый вопрос
+    Answer = apps.get_model("candidate_interface", "Answer")
+    duplicates = (
+        Answer.objects.values("invitation_id", "question_id")
+        .annotate(last_id=Max("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        Answer.objects.filter(
+            invitation_id=row["invitation_id"], question_id=row["question_id"]
+        ).exclude(id=row["last_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0019_invitation_answers_revision"),
+        ("interviewer_interface", "0012_testtemplate_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="answer",
+            constraint=models.UniqueConstraint(
+                fields=("invitation", "question"), name="unique_answer_per_question"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0020_answer_unique_answer_per_question"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="started_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Начало теста"
+            ),
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="deadline",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Пусто — без ограничения по времени",
+                null=True,
+                verbose_name="Срок окончания",
+            ),
+        ),
+    ]
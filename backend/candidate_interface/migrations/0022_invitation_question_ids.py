@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0021_invitation_started_at_deadline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="question_ids",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                help_text="Выбираются по правилам шаблона при создании. Пусто — вопросы шаблона",
+                null=True,
+                verbose_name="Вопросы приглашения",
+            ),
+        ),
+    ]
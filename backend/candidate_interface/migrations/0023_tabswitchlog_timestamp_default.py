@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 10:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0022_invitation_question_ids"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tabswitchlog",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Время события"
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-18 10:46
+
+import datetime
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+def backfill_tab_counters(apps, schema_editor):
+    # Счётчики и время вне вкладки по уже сохранённым событиям
+    Invitation = apps.get_model("candidate_interface", "Invitation")
+    TabSwitchLog = apps.get_model("candidate_interface", "TabSwitchLog")
+    logs = (
+        TabSwitchLog.objects.order_by("invitation_id", "timestamp", "id")
+        .values_list("invitation_id", "event_type", "timestamp")
+        .iterator()
+    )
+    for invitation_id, events in groupby(logs, key=lambda log: log[0]):
+        hidden = visible = 0
+        away = datetime.timedelta()
+        away_since = None
+        for _, event_type, timestamp in events:
+            if event_type == "hidden":
+                hidden += 1
+                away_since = away_since or timestamp
+            else:
+                visible += 1
+                if away_since:
+                    away += max(timestamp - away_since, datetime.timedelta())
+                    away_since = None
+        Invitation.objects.filter(id=invitation_id).update(
+            tab_hidden_count=hidden,
+            tab_visible_count=visible,
+            time_away=away,
+            away_since=away_since,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0023_tabswitchlog_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="away_since",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Время последнего ухода без возврата",
+                null=True,
+                verbose_name="Вне вкладки с",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="tab_hidden_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Уходов с вкладки"
+            ),
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="tab_visible_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Возвратов на вкладку"
+            ),
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="time_away",
+            field=models.DurationField(
+                default=datetime.timedelta,
+                editable=False,
+                verbose_name="Время вне вкладки",
+            ),
+        ),
+        migrations.RunPython(backfill_tab_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0024_invitation_tab_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tabswitchlog",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("hidden", "Ушёл"),
+                    ("visible", "Вернулся"),
+                    ("blur", "Окно потеряло фокус"),
+                    ("paste", "Вставка из буфера"),
+                    ("fullscreen_exit", "Выход из полноэкранного режима"),
+                ],
+                max_length=20,
+                verbose_name="Тип события",
+            ),
+        ),
+    ]
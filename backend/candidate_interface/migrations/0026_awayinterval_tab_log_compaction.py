@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 10:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0025_tabswitchlog_event_types"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AwayInterval",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField(verbose_name="Начало")),
+                (
+                    "duration",
+                    models.DurationField(
+                        blank=True,
+                        help_text="Пусто — кандидат не вернулся на вкладку",
+                        null=True,
+                        verbose_name="Длительность",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Период вне вкладки",
+                "verbose_name_plural": "Периоды вне вкладки",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="tabswitchlog",
+            options={"verbose_name": "Лог ухода/возврата"},
+        ),
+        migrations.AddField(
+            model_name="invitation",
+            name="tab_log_compacted_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="События ухода/возврата перенесены в периоды вне вкладки",
+                null=True,
+                verbose_name="Лог вкладок свёрнут",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tabswitchlog",
+            index=models.Index(
+                fields=["invitation", "event_type", "timestamp"],
+                name="tabswitch_inv_type_time",
+            ),
+        ),
+        migrations.AddField(
+            model_name="awayinterval",
+            name="invitation",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="away_intervals",
+                to="candidate_interface.invitation",
+                verbose_name="Приглашение",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="awayinterval",
+            index=models.Index(
+                fields=["invitation", "started_at"], name="away_interval_inv_start"
+            ),
+        ),
+    ]
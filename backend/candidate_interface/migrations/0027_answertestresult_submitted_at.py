@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0026_awayinterval_tab_log_compaction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answertestresult",
+            name="submitted_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Отправлен в Judge0"
+            ),
+        ),
+    ]
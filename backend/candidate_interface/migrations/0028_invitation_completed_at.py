@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("candidate_interface", "0027_answertestresult_submitted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invitation",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Время завершения"
+            ),
+        ),
+    ]
@@ -1,12 +1,17 @@
+import hashlib
 import json
-import time
 import uuid
+from datetime import timedelta
 
-import requests
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
 from interviewer_interface.models import Question, TestTemplate
 
+from . import code_runner, invitation_cache
+from .template_snapshot import draw_question_ids
+
 
 class Candidate(models.Model):
     """
@@ -57,6 +62,12 @@ class Invitation(models.Model):
         default=False,
         verbose_name="Пройден",
         )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Время завершения",
+        )
     INTERVIEW_TYPES = (
         ("general", "Общий тест (HR)"),
         ("technical", "Техническое собеседование (Tech Lead)"),
@@ -84,10 +95,195 @@ class Invitation(models.Model):
         blank=True, 
         verbose_name="Итоговый балл от Tech Lead",
         )
+    GRADING_STATUSES = (
+        ("not_started", "Не запускалась"),
+        ("queued", "В очереди"),
+        ("running", "Выполняется"),
+        ("done", "Завершена"),
+        ("failed", "Ошибка"),
+        )
+    grading_status = models.CharField(
+        max_length=20,
+        choices=GRADING_STATUSES,
+        default="not_started",
+        verbose_name="Статус автопроверки",
+        )
+    graded_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Время автопроверки",
+        )
+    answers_revision = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Ревизия ответов",
+        help_text="Увеличивается при каждом сохранении ответа",
+        )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Начало теста",
+        )
+    deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Срок окончания",
+        help_text="Пусто — без ограничения по времени",
+        )
+    question_ids = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Вопросы приглашения",
+        help_text="Выбираются по правилам шаблона при создании. Пусто — вопросы шаблона",
+        )
+    tab_hidden_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Уходов с вкладки",
+        )
+    tab_visible_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Возвратов на вкладку",
+        )
+    time_away = models.DurationField(
+        default=timedelta,
+        editable=False,
+        verbose_name="Время вне вкладки",
+        )
+    away_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Вне вкладки с",
+        help_text="Время последнего ухода без возврата",
+        )
+    tab_log_compacted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Лог вкладок свёрнут",
+        help_text="События ухода/возврата перенесены в периоды вне вкладки",
+        )
 
     def __str__(self):
         return f"Приглашение для {self.candidate.email}-{self.test_template.name}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.question_ids is None:
+            self.question_ids = draw_question_ids(self.test_template)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def create_many(cls, candidates, test_template, **fields):
+        """
+        Приглашения для списка кандидатов одним INSERT. Индекс пулов
+        загружается один раз, выбор вопросов не обращается к БД
+        """
+
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    candidate=candidate,
+                    test_template=test_template,
+                    question_ids=draw_question_ids(test_template),
+                    **fields,
+                )
+                for candidate in candidates
+            ]
+        )
+
+    def start(self):
+        """
+        Фиксирует начало теста при первом обращении кандидата.
+        Условное обновление: при одновременных запросах побеждает первый
+        """
+
+        if self.started_at:
+            return
+        now = timezone.now()
+        time_limit = self.test_template.time_limit
+        deadline = now + timedelta(minutes=time_limit) if time_limit > 0 else None
+        started = {"started_at": now, "deadline": deadline}
+        if self.question_ids is None:
+            # Приглашение создано до появления правил выбора в шаблоне
+            question_ids = draw_question_ids(self.test_template)
+            if question_ids is not None:
+                started["question_ids"] = question_ids
+        updated = Invitation.objects.filter(id=self.id, started_at__isnull=True).update(
+            **started
+        )
+        if updated:
+            for field, value in started.items():
+                setattr(self, field, value)
+        else:
+            self.refresh_from_db(fields=["started_at", "deadline", "question_ids"])
+        invitation_cache.invalidate(self.unique_link)
+
+    def complete(self):
+        """
+        Завершает тест условным UPDATE. True только для вызова, который
+        его завершил: повторные и одновременные вызовы получают False
+        """
+
+        now = timezone.now()
+        updated = Invitation.objects.filter(id=self.id, completed=False).update(
+            completed=True, completed_at=now
+        )
+        self.completed = True
+        if updated:
+            self.completed_at = now
+        # После фиксации транзакции, чтобы кеш не заполнился старым состоянием
+        transaction.on_commit(lambda: invitation_cache.invalidate(self.unique_link))
+        return bool(updated)
+
+    def remaining_seconds(self):
+        if self.deadline is None:
+            return None
+        return max(0, int((self.deadline - timezone.now()).total_seconds()))
+
+    def is_expired(self, grace=0):
+        return (
+            self.deadline is not None
+            and timezone.now() >= self.deadline + timedelta(seconds=grace)
+        )
+
+    def record_tab_switches(self, events):
+        """
+        Учитывает уходы и возвраты из событий [(event_type, timestamp)]
+        в счётчиках приглашения одним UPDATE. self.away_since должен быть
+        текущим значением из БД
+        """
+
+        hidden = visible = 0
+        away = timedelta()
+        away_since = self.away_since
+        for event_type, timestamp in sorted(events, key=lambda event: event[1]):
+            if event_type == "hidden":
+                hidden += 1
+                away_since = away_since or timestamp
+            elif event_type == "visible":
+                visible += 1
+                if away_since:
+                    away += max(timestamp - away_since, timedelta())
+                    away_since = None
+
+        Invitation.objects.filter(id=self.id).update(
+            tab_hidden_count=F("tab_hidden_count") + hidden,
+            tab_visible_count=F("tab_visible_count") + visible,
+            time_away=F("time_away") + away,
+            away_since=away_since,
+        )
+        self.away_since = away_since
+
+    def touch_answers(self):
+        Invitation.objects.filter(id=self.id).update(
+            answers_revision=F("answers_revision") + 1
+        )
+        invitation_cache.invalidate(self.unique_link)
+
     class Meta:
         permissions = [
             (
@@ -139,27 +335,72 @@ class TabSwitchLog(models.Model):
         related_name="tab_switches",
         verbose_name="Приглашение",
         )
+    EVENT_TYPES = (
+        ("hidden", "Ушёл"),
+        ("visible", "Вернулся"),
+        ("blur", "Окно потеряло фокус"),
+        ("paste", "Вставка из буфера"),
+        ("fullscreen_exit", "Выход из полноэкранного режима"),
+        )
     event_type = models.CharField(
-        max_length=10,
-        choices=(
-            ("hidden", "Ушёл"), 
-            ("visible", "Вернулся")
-            ),
+        max_length=20,
+        choices=EVENT_TYPES,
         verbose_name="Тип события",
         )
     timestamp = models.DateTimeField(
-        auto_now_add=True, 
+        default=timezone.now,
         verbose_name="Время события",
         )
 
     class Meta:
-        ordering = ["timestamp"]
         verbose_name = "Лог ухода/возврата"
+        indexes = [
+            models.Index(
+                fields=["invitation", "event_type", "timestamp"],
+                name="tabswitch_inv_type_time",
+            ),
+            ]
 
     def __str__(self):
         return f"{self.invitation} — {self.get_event_type_display()} ({self.timestamp})"
 
 
+class AwayInterval(models.Model):
+    """
+    Период вне вкладки, собранный из пары событий ухода и возврата
+    после завершения теста
+    """
+
+    invitation = models.ForeignKey(
+        Invitation,
+        on_delete=models.CASCADE,
+        related_name="away_intervals",
+        verbose_name="Приглашение",
+        )
+    started_at = models.DateTimeField(
+        verbose_name="Начало",
+        )
+    duration = models.DurationField(
+        null=True,
+        blank=True,
+        verbose_name="Длительность",
+        help_text="Пусто — кандидат не вернулся на вкладку",
+        )
+
+    class Meta:
+        verbose_name = "Период вне вкладки"
+        verbose_name_plural = "Периоды вне вкладки"
+        indexes = [
+            models.Index(
+                fields=["invitation", "started_at"],
+                name="away_interval_inv_start",
+            ),
+            ]
+
+    def __str__(self):
+        return f"{self.invitation} — {self.started_at} ({self.duration})"
+
+
 class Answer(models.Model):
     """
     Ответ на вопрос кандидатом
@@ -183,15 +424,71 @@ class Answer(models.Model):
         default=0,
         verbose_name="Баллы (автооценка)",
         )
+    GRADING_STATUSES = (
+        ("pending", "Ожидает проверки"),
+        ("running", "Проверяется"),
+        ("graded", "Проверен"),
+        ("failed", "Ошибка проверки"),
+        )
+    grading_status = models.CharField(
+        max_length=10,
+        choices=GRADING_STATUSES,
+        default="pending",
+        verbose_name="Статус проверки",
+        )
+    graded_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Отпечаток проверенного ответа",
+        )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invitation", "question"],
+                name="unique_answer_per_question",
+            ),
+            ]
+
+    def response_fingerprint(self):
+        payload = [
+            self.response,
+            self.question.question_type,
+            self.question.correct_answer,
+            self.question.stdin,
+        ]
+        if self.question.question_type == "code":
+            payload.append(
+                [
+                    (case.stdin, case.expected_output, case.weight)
+                    for case in self.question.grading_cases()
+                ]
+            )
+        return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+    def needs_grading(self):
+        return not (
+            self.grading_status == "graded"
+            and self.graded_fingerprint == self.response_fingerprint()
+        )
+
+    def mark_graded(self):
+        self.grading_status = "graded"
+        self.graded_fingerprint = self.response_fingerprint()
 
     def auto_evaluate(self):
+        q_type = self.question.question_type
+        user_response = self.response.strip()
+
+        if q_type == "code":
+            self.evaluate_code()
+            return
+
         if not self.question.correct_answer:
             self.score = 0
+            self.mark_graded()
             return
 
-        q_type = self.question.question_type
-        user_response = self.response.strip()
-
         if q_type == "text":
             correct = self.question.correct_answer.strip()
             self.score = 10 if user_response == correct else 0
@@ -212,48 +509,117 @@ class Answer(models.Model):
             except:
                 self.score = 0
 
-        elif q_type == "code":
-            try:
-                submit_resp = requests.post(
-                    "http://localhost:2358/submissions",
-                    json={
-                        "source_code": user_response,
-                        "language_id": 71,  # Python 3
-                        "stdin": self.question.stdin or "",
-                    },
-                )
-                if submit_resp.status_code != 201:
-                    self.score = 0
-                    return
-
-                token = submit_resp.json()["token"]
-
-                for _ in range(10):
-                    time.sleep(1)
-                    result_resp = requests.get(
-                        f"http://localhost:2358/submissions/{token}"
-                    )
-                    if result_resp.status_code == 200:
-                        result = result_resp.json()
-                        if result["status"]["id"] in [1, 2]:
-                            continue
-                        output = (result["stdout"] or "").strip()
-                        error = result["stderr"] or ""
-                        if error:
-                            self.score = 0
-                            break
-                        correct_output = self.question.correct_answer.strip()
-                        self.score = 10 if output == correct_output else 0
-                        break
-                else:
-                    self.score = 0
-            except Exception:
-                self.score = 0
+        self.mark_graded()
 
-    def save(self, *args, **kwargs):
-        if not self.id:
-            self.auto_evaluate()
-        super().save(*args, **kwargs)
+    def evaluate_code(self):
+        cases = self.question.grading_cases()
+        try:
+            results = code_runner.run_cases(self.response.strip(), cases)
+        except Exception:
+            self.score = 0
+            self.grading_status = "failed"
+            return
+
+        self.test_results.all().delete()
+        test_results = AnswerTestResult.objects.bulk_create(
+            AnswerTestResult.from_result(self, case, result)
+            for case, result in zip(cases, results)
+        )
+        self.score_test_results(test_results)
+
+    def score_test_results(self, test_results):
+        """
+        Частичная оценка кода: доля веса пройденных тестовых случаев
+        """
+
+        total = sum(r.weight for r in test_results)
+        passed = sum(r.weight for r in test_results if r.status == "passed")
+        self.score = round(10 * passed / total) if total else 0
+        self.mark_graded()
+
+
+class AnswerTestResult(models.Model):
+    """
+    Результат прогона ответа с кодом на тестовом случае
+    """
+
+    answer = models.ForeignKey(
+        Answer,
+        on_delete=models.CASCADE,
+        related_name="test_results",
+        verbose_name="Ответ",
+        )
+    test_case = models.ForeignKey(
+        "interviewer_interface.QuestionTestCase",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        verbose_name="Тестовый случай",
+        )
+    weight = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Вес",
+        )
+    STATUSES = (
+        ("pending", "Выполняется"),
+        ("passed", "Пройден"),
+        ("failed", "Не пройден"),
+        ("skipped", "Пропущен"),
+        )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default="pending",
+        verbose_name="Статус",
+        )
+    verdict = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Вердикт песочницы",
+        )
+    time = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Время выполнения (с)",
+        )
+    judge0_token = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name="Токен проверки Judge0",
+        )
+    submitted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Отправлен в Judge0",
+        )
+
+    class Meta:
+        verbose_name = "Результат тестового случая"
+        verbose_name_plural = "Результаты тестовых случаев"
+
+    @classmethod
+    def from_result(cls, answer, case, result, pending=False):
+        test_result = cls(
+            answer=answer,
+            test_case=case if case.pk else None,
+            weight=case.weight,
+        )
+        if not pending:
+            test_result.apply_result(case, result)
+        return test_result
+
+    def get_case(self):
+        return self.test_case or self.answer.question.grading_cases()[0]
+
+    def apply_result(self, case, result):
+        self.judge0_token = ""
+        if result is None:
+            self.status = "skipped"
+            return
+        self.status = "passed" if code_runner.case_passed(case, result) else "failed"
+        self.verdict = result["status"].get("description", "")[:100]
+        self.time = float(result["time"]) if result.get("time") else None
 
 
 class ManualGrade(models.Model):
@@ -6,4 +6,5 @@ websocket_urlpatterns = [
     re_path(
         r"ws/interview/(?P<unique_link>[^/]+)/$", consumers.InterviewConsumer.as_asgi()
     ),
+    re_path(r"ws/grading/$", consumers.GradingConsumer.as_asgi()),
 ]
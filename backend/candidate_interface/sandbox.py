@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import judge0
+
+
+class ExecutionBackend:
+    """
+    Контракт песочницы для выполнения кода. Результат — словарь в формате
+    Judge0: status {id, description}, stdout, stderr, compile_output, time, memory
+    """
+
+    # Может ли бэкенд сам доставлять результаты на callback_url
+    supports_callbacks = False
+
+    def run(self, source_code, stdin=""):
+        """
+        Выполнить программу и дождаться результата
+        """
+
+        raise NotImplementedError
+
+    def submit(self, source_code, stdin=""):
+        """
+        Поставить программу в очередь, вернуть токен
+        """
+
+        raise NotImplementedError
+
+    def get_result(self, token):
+        """
+        Результат по токену; до завершения status.id в judge0.PENDING_STATUSES
+        """
+
+        raise NotImplementedError
+
+    def submit_batch(self, submissions):
+        return [self.submit(s["source_code"], s.get("stdin", "")) for s in submissions]
+
+    async def asubmit(self, source_code, stdin=""):
+        return await sync_to_async(self.submit, thread_sensitive=False)(
+            source_code, stdin
+        )
+
+    async def aget_result(self, token):
+        return await sync_to_async(self.get_result, thread_sensitive=False)(token)
+
+    async def await_result(self, token):
+        """
+        Ожидание результата опросом раз в CODE_RUN_POLL_INTERVAL
+        """
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CODE_RUN_TIMEOUT
+        while True:
+            await asyncio.sleep(settings.CODE_RUN_POLL_INTERVAL)
+            result = await self.aget_result(token)
+            if result["status"]["id"] not in judge0.PENDING_STATUSES:
+                return result
+            if loop.time() > deadline:
+                raise judge0.Judge0Error("Execution timed out")
+
+
+class Judge0Backend(ExecutionBackend):
+    supports_callbacks = True
+
+    def __init__(self):
+        self.client = judge0.get_client()
+
+    def run(self, source_code, stdin=""):
+        return self.client.run_submission(source_code, stdin)
+
+    def submit(self, source_code, stdin=""):
+        return self.client.submit_batch([judge0.build_submission(source_code, stdin)])[
+            0
+        ]
+
+    def get_result(self, token):
+        resp = self.client.request(
+            "GET", f"/submissions/{token}", params={"base64_encoded": "false"}
+        )
+        if resp.status_code != 200:
+            raise judge0.Judge0Error(f"Judge0 returned {resp.status_code}")
+        return resp.json()
+
+    def submit_batch(self, submissions):
+        return self.client.submit_batch(submissions)
+
+    async def asubmit(self, source_code, stdin=""):
+        return await self.client.asubmit(source_code, stdin)
+
+    async def aget_result(self, token):
+        return await self.client.aget_submission(token)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.CODE_EXECUTION_BACKEND)()
+    return _backend
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import invitation_cache
+from .models import Candidate, Invitation
+
+# Кеш приглашений для API кандидата сбрасывается при любом сохранении
+# приглашения или кандидата. Массовые update() сбрасывают его явно
+
+
+@receiver(post_save, sender=Invitation)
+@receiver(post_delete, sender=Invitation)
+def invitation_changed(sender, instance, **kwargs):
+    invitation_cache.invalidate(instance.unique_link)
+
+
+@receiver(post_save, sender=Candidate)
+def candidate_saved(sender, instance, created, **kwargs):
+    if not created:
+        invitation_cache.invalidate(
+            *instance.invitations.values_list("unique_link", flat=True)
+        )
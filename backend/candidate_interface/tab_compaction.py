@@ -0,0 +1,103 @@
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import tab_switch_buffer
+from .models import AwayInterval, Invitation, TabSwitchLog
+
+logger = logging.getLogger(__name__)
+
+
+def build_intervals(invitation_id, events):
+    """
+    Периоды вне вкладки из событий [(event_type, timestamp)] по времени:
+    повторный уход без возврата продолжает текущий период
+    """
+
+    intervals = []
+    away_since = None
+    for event_type, timestamp in events:
+        if event_type == "hidden":
+            away_since = away_since or timestamp
+        elif away_since:
+            intervals.append(
+                AwayInterval(
+                    invitation_id=invitation_id,
+                    started_at=away_since,
+                    duration=max(timestamp - away_since, timedelta()),
+                )
+            )
+            away_since = None
+    if away_since:
+        intervals.append(
+            AwayInterval(invitation_id=invitation_id, started_at=away_since)
+        )
+    return intervals
+
+
+def compact_invitations(batch_size=500):
+    """
+    Сворачивает события ухода/возврата завершённых приглашений в периоды
+    вне вкладки. Приглашение берётся через TAB_SWITCH_COMPACTION_DELAY
+    секунд после завершения (для завершённых до появления completed_at —
+    после срока) и только когда его событий нет в потоке Redis:
+    поздние события и sendBeacon успевают попасть в БД
+    """
+
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.TAB_SWITCH_COMPACTION_DELAY)
+    invitation_ids = list(
+        Invitation.objects.filter(completed=True, tab_log_compacted_at__isnull=True)
+        .filter(
+            Q(completed_at__lte=cutoff)
+            | Q(completed_at__isnull=True, deadline__lte=cutoff)
+            | Q(completed_at__isnull=True, deadline__isnull=True)
+        )
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if settings.TAB_SWITCH_BUFFER and invitation_ids:
+        try:
+            buffered = tab_switch_buffer.buffered_invitations(invitation_ids)
+        except redis.RedisError:
+            logger.exception("Tab switch buffer unavailable, compaction postponed")
+            return 0
+        invitation_ids = [i for i in invitation_ids if i not in buffered]
+    if not invitation_ids:
+        return 0
+
+    events = (
+        TabSwitchLog.objects.filter(
+            invitation_id__in=invitation_ids, event_type__in=("hidden", "visible")
+        )
+        .order_by("invitation_id", "timestamp", "id")
+        .values_list("invitation_id", "event_type", "timestamp")
+    )
+    intervals = []
+    for invitation_id, rows in groupby(events, key=lambda row: row[0]):
+        intervals.extend(build_intervals(invitation_id, (row[1:] for row in rows)))
+
+    with transaction.atomic():
+        AwayInterval.objects.bulk_create(intervals)
+        Invitation.objects.filter(id__in=invitation_ids).update(
+            tab_log_compacted_at=now
+        )
+    return len(invitation_ids)
+
+
+def delete_expired_logs():
+    """
+    Удаляет сырые события свёрнутых приглашений старше
+    TAB_SWITCH_RETENTION_DAYS
+    """
+
+    cutoff = timezone.now() - timedelta(days=settings.TAB_SWITCH_RETENTION_DAYS)
+    deleted, _ = TabSwitchLog.objects.filter(
+        invitation__tab_log_compacted_at__isnull=False, timestamp__lt=cutoff
+    ).delete()
+    return deleted
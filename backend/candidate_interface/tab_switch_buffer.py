@@ -0,0 +1,255 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.redis_client import get_redis
+
+from .models import Invitation, TabSwitchLog
+
+logger = logging.getLogger(__name__)
+
+# Поток событий прокторинга, переносимый в БД пакетами,
+# и счётчики уходов/возвратов {event_type: количество} на каждое приглашение
+STREAM_KEY = "tab_switches:stream"
+COUNT_KEY = "tab_switches:count:{invitation_id}"
+# Номера событий, принятых от вкладки кандидата
+SEEN_KEY = "proctoring:seen:{invitation_id}:{client_id}"
+
+# События, которые учитываются в счётчиках приглашения
+COUNTED_EVENTS = ("hidden", "visible")
+
+
+def log_switch(invitation, event_type):
+    return log_events(invitation, [(event_type, timezone.now())])
+
+
+def log_events(invitation, events):
+    """
+    Записывает события [(event_type, timestamp)] и возвращает число уходов
+    и возвратов приглашения. С TAB_SWITCH_BUFFER события добавляются
+    в поток Redis, а число берётся из счётчика, иначе — сразу пишутся в БД
+    """
+
+    if settings.TAB_SWITCH_BUFFER:
+        try:
+            return buffer_events(invitation.id, events)
+        except redis.RedisError:
+            logger.exception(
+                f"Tab switch buffer unavailable for invitation {invitation.id}"
+            )
+    return write_events(invitation, events)
+
+
+def write_events(invitation, events):
+    away_since, hidden, visible = Invitation.objects.values_list(
+        "away_since", "tab_hidden_count", "tab_visible_count"
+    ).get(id=invitation.id)
+    with transaction.atomic():
+        TabSwitchLog.objects.bulk_create(
+            TabSwitchLog(
+                invitation=invitation, event_type=event_type, timestamp=timestamp
+            )
+            for event_type, timestamp in events
+        )
+        Invitation(id=invitation.id, away_since=away_since).record_tab_switches(events)
+    counted = sum(event_type in COUNTED_EVENTS for event_type, _ in events)
+    return hidden + visible + counted
+
+
+def buffer_events(invitation_id, events):
+    client = get_redis()
+    key = prepare_counter(client, invitation_id)
+    pipe = client.pipeline()
+    add_to_stream(pipe, invitation_id, key, events)
+    pipe.hvals(key)
+    return sum(int(count) for count in pipe.execute()[-1])
+
+
+def prepare_counter(client, invitation_id):
+    key = COUNT_KEY.format(invitation_id=invitation_id)
+    if not client.exists(key):
+        seed_counter(client, key, invitation_id)
+    return key
+
+
+def add_to_stream(pipe, invitation_id, count_key, events):
+    for event_type, timestamp in events:
+        pipe.xadd(
+            STREAM_KEY,
+            {
+                "invitation_id": invitation_id,
+                "event_type": event_type,
+                "timestamp": timestamp.isoformat(),
+            },
+        )
+        if event_type in COUNTED_EVENTS:
+            pipe.hincrby(count_key, event_type, 1)
+    pipe.expire(count_key, settings.TAB_SWITCH_COUNTER_TTL)
+
+
+def log_client_events(invitation, client_id, events):
+    """
+    Записывает события вкладки [(seq, event_type, timestamp)], отбрасывая
+    уже принятые: клиент повторяет неподтверждённые события, номер seq
+    уникален в пределах client_id. Номер считается принятым только вместе
+    с записью события, поэтому повтор после сбоя не теряется.
+    Возвращает число принятых событий
+    """
+
+    seen_key = SEEN_KEY.format(invitation_id=invitation.id, client_id=client_id)
+    if settings.TAB_SWITCH_BUFFER:
+        try:
+            return buffer_client_events(invitation.id, seen_key, events)
+        except redis.RedisError:
+            logger.exception(
+                f"Tab switch buffer unavailable for invitation {invitation.id}"
+            )
+
+    events = claim_events(seen_key, events)
+    if events:
+        try:
+            write_events(invitation, [(event_type, ts) for _, event_type, ts in events])
+        except Exception:
+            release_events(seen_key, events)
+            raise
+    return len(events)
+
+
+def buffer_client_events(invitation_id, seen_key, events):
+    """
+    Отметка номеров и добавление событий в поток — одна транзакция MULTI.
+    WATCH повторяет её, если те же номера одновременно принял другой запрос
+    """
+
+    client = get_redis()
+    count_key = prepare_counter(client, invitation_id)
+    with client.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(seen_key)
+                seen = pipe.smismember(seen_key, [seq for seq, _, _ in events])
+                fresh = {}
+                for event, is_seen in zip(events, seen):
+                    if not is_seen:
+                        fresh.setdefault(event[0], event)
+                pipe.multi()
+                if fresh:
+                    pipe.sadd(seen_key, *fresh)
+                    pipe.expire(seen_key, settings.TAB_SWITCH_COUNTER_TTL)
+                    add_to_stream(
+                        pipe,
+                        invitation_id,
+                        count_key,
+                        [(event_type, ts) for _, event_type, ts in fresh.values()],
+                    )
+                pipe.execute()
+                return len(fresh)
+            except redis.WatchError:
+                continue
+
+
+def claim_events(seen_key, events):
+    """
+    Отмечает номера событий принятыми и возвращает новые события.
+    Без Redis повторы не отбрасываются
+    """
+
+    try:
+        pipe = get_redis().pipeline()
+        for seq, _, _ in events:
+            pipe.sadd(seen_key, seq)
+        pipe.expire(seen_key, settings.TAB_SWITCH_COUNTER_TTL)
+        added = pipe.execute()[:-1]
+    except redis.RedisError:
+        logger.exception(f"Proctoring dedupe unavailable for {seen_key}")
+        return events
+    return [event for event, is_new in zip(events, added) if is_new]
+
+
+def release_events(seen_key, events):
+    # Запись не удалась: повтор клиента должен быть принят
+    try:
+        get_redis().srem(seen_key, *[seq for seq, _, _ in events])
+    except redis.RedisError:
+        logger.exception(f"Failed to release proctoring events for {seen_key}")
+
+
+def seed_counter(client, key, invitation_id):
+    """
+    Счётчик начинается со значений, уже сохранённых в приглашении
+    (приглашение начато до включения буфера или счётчик истёк)
+    """
+
+    hidden, visible = Invitation.objects.values_list(
+        "tab_hidden_count", "tab_visible_count"
+    ).get(id=invitation_id)
+    pipe = client.pipeline()
+    pipe.hsetnx(key, "hidden", hidden)
+    pipe.hsetnx(key, "visible", visible)
+    pipe.execute()
+
+
+def buffered_invitations(invitation_ids, batch_size=1000):
+    """
+    Приглашения из invitation_ids, события которых ещё ждут в потоке
+    """
+
+    ids = {str(invitation_id) for invitation_id in invitation_ids}
+    buffered = set()
+    client = get_redis()
+    start = "-"
+    while True:
+        entries = client.xrange(STREAM_KEY, min=start, count=batch_size)
+        for _, fields in entries:
+            if fields["invitation_id"] in ids:
+                buffered.add(int(fields["invitation_id"]))
+        if len(entries) < batch_size:
+            return buffered
+        start = "(" + entries[-1][0]
+
+
+def flush_switches(batch_size=1000):
+    """
+    Переносит события из потока в БД через bulk_create и обновляет
+    счётчики приглашений. События удаляются из потока только после вставки
+    """
+
+    client = get_redis()
+    flushed = 0
+    while True:
+        entries = client.xrange(STREAM_KEY, count=batch_size)
+        if not entries:
+            return flushed
+
+        events = defaultdict(list)
+        for _, fields in entries:
+            events[int(fields["invitation_id"])].append(
+                (fields["event_type"], datetime.fromisoformat(fields["timestamp"]))
+            )
+        # Приглашение могли удалить, пока событие ждало в потоке
+        invitations = list(
+            Invitation.objects.filter(id__in=events).only("id", "away_since")
+        )
+        with transaction.atomic():
+            TabSwitchLog.objects.bulk_create(
+                [
+                    TabSwitchLog(
+                        invitation=invitation,
+                        event_type=event_type,
+                        timestamp=timestamp,
+                    )
+                    for invitation in invitations
+                    for event_type, timestamp in events[invitation.id]
+                ]
+            )
+            for invitation in invitations:
+                invitation.record_tab_switches(events[invitation.id])
+        client.xdel(STREAM_KEY, *[entry_id for entry_id, _ in entries])
+        flushed += len(entries)
+        if len(entries) < batch_size:
+            return flushed
@@ -0,0 +1,180 @@
+import random
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from interviewer_interface.models import (
+    Question,
+    TemplateDrawRule,
+    TestTemplateQuestion,
+)
+
+SNAPSHOT_KEY = "template:snapshot:{template_id}:{version}"
+POOL_KEY = "template:pool:{template_id}:{version}"
+
+
+class TemplateSnapshot:
+    """
+    Неизменяемый снимок теста для кандидата: упорядоченные вопросы
+    в сериализованном виде и индекс позиции по id вопроса
+    """
+
+    def __init__(self, template_id, version, questions):
+        self.template_id = template_id
+        self.version = version
+        self.questions = questions
+        self.positions = {q["id"]: i for i, q in enumerate(questions)}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def position(self, question_id):
+        return self.positions.get(question_id)
+
+    def get(self, question_id):
+        position = self.positions.get(question_id)
+        return None if position is None else self.questions[position]
+
+
+def get_snapshot(template):
+    """
+    Снимок текущей версии теста. Версия меняется при любом изменении
+    теста, поэтому старые снимки просто перестают запрашиваться
+    """
+
+    return _load_snapshot(template.id, template.version)
+
+
+@lru_cache(maxsize=256)
+def _load_snapshot(template_id, version):
+    key = SNAPSHOT_KEY.format(template_id=template_id, version=version)
+    questions = cache.get(key)
+    if questions is None:
+        questions = build_questions(template_id)
+        cache.set(key, questions, timeout=settings.TEMPLATE_SNAPSHOT_TTL)
+    return TemplateSnapshot(template_id, version, questions)
+
+
+def build_questions(template_id):
+    ordered = (
+        TestTemplateQuestion.objects.filter(template_id=template_id)
+        .order_by("order")
+        .select_related("question")
+        .prefetch_related("question__choices", "question__test_cases")
+    )
+    return serialize_questions([tq.question for tq in ordered])
+
+
+def serialize_questions(questions):
+    from .api.serializers import QuestionSerializer
+
+    return list(QuestionSerializer(questions, many=True).data)
+
+
+class QuestionPool:
+    """
+    Индекс случайного выбора для версии теста: по каждому правилу —
+    количество и id подходящих вопросов, а также сериализованные вопросы
+    всех пулов. Выбор по индексу не обращается к БД
+    """
+
+    def __init__(self, template_id, version, rules, questions):
+        self.template_id = template_id
+        self.version = version
+        self.rules = rules
+        self.questions = questions
+
+
+def get_pool(template):
+    return _load_pool(template.id, template.version)
+
+
+@lru_cache(maxsize=256)
+def _load_pool(template_id, version):
+    key = POOL_KEY.format(template_id=template_id, version=version)
+    data = cache.get(key)
+    if data is None:
+        data = build_pool(template_id)
+        cache.set(key, data, timeout=settings.TEMPLATE_SNAPSHOT_TTL)
+    return QuestionPool(template_id, version, *data)
+
+
+def build_pool(template_id):
+    fixed = TestTemplateQuestion.objects.filter(template_id=template_id).values(
+        "question_id"
+    )
+    rules = []
+    for rule in TemplateDrawRule.objects.filter(template_id=template_id):
+        pool = Question.objects.exclude(id__in=fixed)
+        if rule.tag_id:
+            pool = pool.filter(tags=rule.tag_id)
+        if rule.complexity:
+            pool = pool.filter(complexity=rule.complexity)
+        rules.append(
+            (rule.count, list(pool.order_by("id").values_list("id", flat=True)))
+        )
+
+    pool_ids = {question_id for _, ids in rules for question_id in ids}
+    questions = serialize_questions(
+        Question.objects.filter(id__in=pool_ids).prefetch_related(
+            "choices", "test_cases"
+        )
+    )
+    return rules, {q["id"]: q for q in questions}
+
+
+def draw_question_ids(template, rng=random):
+    """
+    Список вопросов для нового приглашения: вопросы шаблона по порядку,
+    затем случайные вопросы по каждому правилу без повторов.
+    None, если у шаблона нет правил выбора
+    """
+
+    pool = get_pool(template)
+    if not pool.rules:
+        return None
+
+    question_ids = [q["id"] for q in get_snapshot(template).questions]
+    taken = set()
+    for count, ids in pool.rules:
+        # Префикс случайной перестановки длиной count + len(taken) содержит
+        # не меньше count ещё не выбранных вопросов, весь пул не перебирается
+        sample = rng.sample(ids, min(len(ids), count + len(taken)))
+        drawn = [question_id for question_id in sample if question_id not in taken][
+            :count
+        ]
+        taken.update(drawn)
+        question_ids.extend(drawn)
+    return question_ids
+
+
+def get_invitation_snapshot(invitation):
+    """
+    Снимок теста для приглашения. Если вопросы выбраны случайно,
+    снимок собирается из снимка шаблона и индекса пулов
+    """
+
+    template = invitation.test_template
+    snapshot = get_snapshot(template)
+    if invitation.question_ids is None:
+        return snapshot
+
+    pool = get_pool(template).questions
+    known = {
+        qid: pool[qid] if qid in pool else snapshot.get(qid)
+        for qid in invitation.question_ids
+    }
+    missing = [qid for qid, question in known.items() if question is None]
+    if missing:
+        # Вопрос выпал из пула после выбора — кандидат всё равно его видит
+        known.update(
+            (q["id"], q)
+            for q in serialize_questions(
+                Question.objects.filter(id__in=missing).prefetch_related(
+                    "choices", "test_cases"
+                )
+            )
+        )
+    questions = [question for question in known.values() if question is not None]
+    return TemplateSnapshot(template.id, template.version, questions)
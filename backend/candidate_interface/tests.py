@@ -1,3 +1,1382 @@
-from django.test import TestCase
+import asyncio
+import base64
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+import httpx
+import redis
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from interviewer_interface.models import (
+    InterviewerUser,
+    Question,
+    QuestionTestCase,
+    Tag,
+    TemplateDrawRule,
+    TestTemplate,
+    TestTemplateQuestion,
+)
+
+from . import (
+    answer_buffer,
+    code_runner,
+    consumers,
+    execution_cache,
+    grading,
+    invitation_cache,
+    judge0,
+    local_runner,
+    sandbox,
+    tab_compaction,
+    tab_switch_buffer,
+    template_snapshot,
+)
+from .routing import websocket_urlpatterns
+from .api.views import MAX_BATCH_ANSWERS
+from .expiry import complete_invitation, expire_invitations
+from .models import (
+    Answer,
+    AnswerTestResult,
+    AwayInterval,
+    Candidate,
+    Invitation,
+    QuestionFeedback,
+    TabSwitchLog,
+)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+}
+
+
+def create_invitation(template=None, **fields):
+    template = template or TestTemplate.objects.create(name="Test", description="")
+    number = Candidate.objects.count()
+    candidate = Candidate.objects.create(
+        email=f"invited{number}@example.com", full_name=f"Invited {number}"
+    )
+    return Invitation.objects.create(
+        candidate=candidate, test_template=template, **fields
+    )
+
+
+class RecordingBackend(sandbox.ExecutionBackend):
+    """
+    Песочница с callback, запоминающая отправленные пакеты
+    """
+
+    supports_callbacks = True
+
+    def __init__(self):
+        self.batches = []
+
+    def submit_batch(self, submissions):
+        self.batches.append(submissions)
+        return [f"token-{i}" for i in range(len(submissions))]
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    JUDGE0_CALLBACK_URL="http://django:8000",
+)
+class Judge0BatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.backend = RecordingBackend()
+        patcher = mock.patch.object(sandbox, "get_backend", return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.question = Question.objects.create(
+            text="Double", question_type="code", correct_answer=""
+        )
+        self.cases = [
+            QuestionTestCase.objects.create(
+                question=self.question, stdin=str(i), expected_output=str(i * 2)
+            )
+            for i in range(1, 4)
+        ]
+        self.invitation = create_invitation()
+        self.answer = Answer.objects.create(
+            invitation=self.invitation,
+            question=self.question,
+            response="print(int(input()) * 2)",
+        )
+        self.text_answer = Answer.objects.create(
+            invitation=self.invitation,
+            question=Question.objects.create(
+                text="Text", question_type="text", correct_answer="yes"
+            ),
+            response="yes",
+        )
+
+    def test_code_cases_are_sent_in_one_batch_with_callbacks(self):
+        # Результат первого случая уже известен
+        execution_cache.store_result(
+            code_runner.case_key(self.answer.response, self.cases[0]),
+            {"status": {"id": 3, "description": "Accepted"}, "stdout": "2\n"},
+        )
+
+        grading.grade_invitation(self.invitation.id)
+
+        self.assertEqual(len(self.backend.batches), 1)
+        batch = self.backend.batches[0]
+        self.assertEqual([s["stdin"] for s in batch], ["2", "3"])
+        for submission in batch:
+            self.assertTrue(
+                submission["callback_url"].startswith(
+                    "http://django:8000/api/candidate/judge0/callback/"
+                )
+            )
+
+        rows = AnswerTestResult.objects.filter(answer=self.answer).order_by("id")
+        self.assertEqual(
+            [(r.status, r.judge0_token) for r in rows],
+            [("passed", ""), ("pending", "token-0"), ("pending", "token-1")],
+        )
+        self.assertTrue(all(r.submitted_at for r in rows[1:]))
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.grading_status, "running")
+        self.text_answer.refresh_from_db()
+        self.assertEqual(self.text_answer.grading_status, "graded")
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.grading_status, "running")
+
+    def test_cached_results_skip_the_batch(self):
+        for case in self.cases:
+            execution_cache.store_result(
+                code_runner.case_key(self.answer.response, case),
+                {
+                    "status": {"id": 3, "description": "Accepted"},
+                    "stdout": case.expected_output,
+                },
+            )
+
+        grading.grade_invitation(self.invitation.id)
+
+        self.assertEqual(self.backend.batches, [])
+        self.answer.refresh_from_db()
+        self.assertEqual(
+            (self.answer.grading_status, self.answer.score), ("graded", 10)
+        )
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.grading_status, "done")
+
+    def test_score_is_the_passed_share_of_case_weights(self):
+        self.cases[2].weight = 2
+        self.cases[2].save()
+        for case, stdout in zip(self.cases, ("2", "4", "7")):
+            execution_cache.store_result(
+                code_runner.case_key(self.answer.response, case),
+                {"status": {"id": 3, "description": "Accepted"}, "stdout": stdout},
+            )
+
+        grading.grade_invitation(self.invitation.id)
+
+        rows = AnswerTestResult.objects.filter(answer=self.answer).order_by("id")
+        self.assertEqual(
+            [(r.status, r.weight) for r in rows],
+            [("passed", 1), ("passed", 1), ("failed", 2)],
+        )
+        self.answer.refresh_from_db()
+        self.assertEqual((self.answer.grading_status, self.answer.score), ("graded", 5))
+
+
+class Judge0ClientTests(TestCase):
+    def client_with(self, error):
+        requests = []
+
+        def handler(request):
+            requests.append(request.method)
+            raise error("failed", request=request)
+
+        client = judge0.Judge0Client("http://judge0:2358", retries=2, backoff=0)
+        client._client = httpx.Client(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+        return client, requests
+
+    def test_post_is_not_repeated_after_broken_response(self):
+        client, requests = self.client_with(httpx.RemoteProtocolError)
+        with self.assertRaises(judge0.Judge0Error):
+            client.request("POST", "/submissions")
+        self.assertEqual(requests, ["POST"])
+
+    def test_post_is_repeated_when_not_sent(self):
+        client, requests = self.client_with(httpx.ConnectError)
+        with self.assertRaises(judge0.Judge0Error):
+            client.request("POST", "/submissions")
+        self.assertEqual(requests, ["POST"] * 3)
+
+    def test_get_is_repeated_after_broken_response(self):
+        client, requests = self.client_with(httpx.RemoteProtocolError)
+        with self.assertRaises(judge0.Judge0Error):
+            client.request("GET", "/submissions/token")
+        self.assertEqual(requests, ["GET"] * 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QuestionDrawTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_snapshot._load_snapshot.cache_clear()
+        template_snapshot._load_pool.cache_clear()
+        self.template = TestTemplate.objects.create(name="Drawn", description="")
+        self.fixed = Question.objects.create(text="Fixed", complexity="hard")
+        TestTemplateQuestion.objects.create(template=self.template, question=self.fixed)
+
+        # Тегированный сложный вопрос входит в оба пула, вопрос шаблона — ни в один
+        python = Tag.objects.create(name="python")
+        self.tagged, self.hard = set(), set()
+        for complexity in ("easy", "easy", "medium", "hard"):
+            question = Question.objects.create(text="Tagged", complexity=complexity)
+            question.tags.add(python)
+            self.tagged.add(question.id)
+            if complexity == "hard":
+                self.hard.add(question.id)
+        for _ in range(2):
+            self.hard.add(Question.objects.create(text="Hard", complexity="hard").id)
+        TemplateDrawRule.objects.create(template=self.template, tag=python, count=2)
+        TemplateDrawRule.objects.create(
+            template=self.template, complexity="hard", count=2, order=1
+        )
+
+    def test_draw_respects_rule_counts(self):
+        for seed in range(20):
+            self.template.refresh_from_db()
+            question_ids = template_snapshot.draw_question_ids(
+                self.template, random.Random(seed)
+            )
+
+            self.assertEqual(len(question_ids), 5)
+            self.assertEqual(len(set(question_ids)), 5)
+            self.assertEqual(question_ids[0], self.fixed.id)
+            self.assertLessEqual(set(question_ids[1:3]), self.tagged)
+            self.assertLessEqual(set(question_ids[3:]), self.hard)
+
+    def test_draw_is_stable_across_saves(self):
+        invitation = create_invitation(self.template)
+        question_ids = invitation.question_ids
+        self.assertEqual(len(question_ids), 5)
+
+        invitation.save()
+        invitation.start()
+        self.fixed.text = "Fixed again"
+        self.fixed.save()
+        TemplateDrawRule.objects.filter(template=self.template).update(count=1)
+
+        invitation = Invitation.objects.get(id=invitation.id)
+        self.assertEqual(invitation.question_ids, question_ids)
+        snapshot = template_snapshot.get_invitation_snapshot(invitation)
+        self.assertEqual([q["id"] for q in snapshot.questions], question_ids)
+        self.assertEqual(snapshot.questions[0]["text"], "Fixed again")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExecutionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_only_verdicts_are_cached(self):
+        for status_id, cached in ((2, False), (3, True), (12, True), (13, False)):
+            key = execution_cache.execution_key(f"print({status_id})")
+            execution_cache.store_result(key, {"status": {"id": status_id}})
+            self.assertEqual(cache.get(key) is not None, cached, status_id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TemplateSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Откат транзакции теста повторяет id шаблонов, снимки процесса сбрасываются
+        template_snapshot._load_snapshot.cache_clear()
+        template_snapshot._load_pool.cache_clear()
+        self.template = TestTemplate.objects.create(name="Snapshot", description="")
+        self.question = Question.objects.create(
+            text="Sum", question_type="code", correct_answer="3"
+        )
+        TestTemplateQuestion.objects.create(
+            template=self.template, question=self.question
+        )
+        self.case = QuestionTestCase.objects.create(
+            question=self.question, stdin="1 2", expected_output="3"
+        )
+
+    def snapshot_question(self):
+        self.template.refresh_from_db()
+        return template_snapshot.get_snapshot(self.template).get(self.question.id)
+
+    def test_question_edits_are_reflected(self):
+        self.assertEqual(self.snapshot_question()["text"], "Sum")
+
+        self.question.text = "Sum of two"
+        self.question.save()
+        self.assertEqual(self.snapshot_question()["text"], "Sum of two")
+
+        Question.objects.filter(id=self.question.id).update(text="Sum of numbers")
+        self.assertEqual(self.snapshot_question()["text"], "Sum of numbers")
+
+        self.question.test_cases.update(stdin="2 2")
+        self.assertEqual(self.snapshot_question()["examples"][0]["stdin"], "2 2")
+
+        QuestionTestCase.objects.bulk_create(
+            [
+                QuestionTestCase(
+                    question=self.question, stdin="5 5", expected_output="10"
+                )
+            ]
+        )
+        self.assertEqual(len(self.snapshot_question()["examples"]), 2)
+
+    def test_pool_question_edits_are_reflected(self):
+        pooled = Question.objects.create(text="Pooled", complexity="hard")
+        template = TestTemplate.objects.create(name="Drawn", description="")
+        TemplateDrawRule.objects.create(template=template, complexity="hard")
+
+        def pooled_text():
+            template.refresh_from_db()
+            return template_snapshot.get_pool(template).questions[pooled.id]["text"]
+
+        self.assertEqual(pooled_text(), "Pooled")
+        Question.objects.filter(id=pooled.id).update(text="Pooled again")
+        self.assertEqual(pooled_text(), "Pooled again")
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class Judge0CallbackTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        question = Question.objects.create(
+            text="Sum", question_type="code", correct_answer=""
+        )
+        self.case = QuestionTestCase.objects.create(
+            question=question, stdin="1 2", expected_output="3"
+        )
+        self.invitation = create_invitation(grading_status="running")
+        self.answer = Answer.objects.create(
+            invitation=self.invitation,
+            question=question,
+            response="print(3)",
+            grading_status="running",
+        )
+        self.test_result = AnswerTestResult.objects.create(
+            answer=self.answer,
+            test_case=self.case,
+            judge0_token="token",
+            submitted_at=timezone.now(),
+        )
+
+    def callback(self, **fields):
+        signature = signing.dumps(
+            self.test_result.id, salt=grading.JUDGE0_CALLBACK_SALT
+        )
+        result = {
+            "token": "token",
+            "status": {"id": 3, "description": "Accepted"},
+            "time": "0.01",
+            **fields,
+        }
+        return self.client.put(
+            reverse("judge0_callback", kwargs={"signature": signature}),
+            result,
+            content_type="application/json",
+        )
+
+    def test_callback_output_is_decoded(self):
+        response = self.callback(stdout=base64.b64encode(b"3\n").decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.test_result.refresh_from_db()
+        self.assertEqual(self.test_result.status, "passed")
+        self.answer.refresh_from_db()
+        self.assertEqual(
+            (self.answer.grading_status, self.answer.score), ("graded", 10)
+        )
+        cached = execution_cache.get_result(code_runner.case_key("print(3)", self.case))
+        self.assertEqual(cached["stdout"], "3\n")
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.grading_status, "done")
+
+    def test_malformed_callback_is_rejected(self):
+        with self.assertLogs("candidate_interface.grading", "WARNING"):
+            response = self.callback(stdout="3\n")
+
+        self.assertEqual(response.status_code, 404)
+        self.test_result.refresh_from_db()
+        self.assertEqual(self.test_result.status, "pending")
+
+    def test_lost_callback_fails_answer_and_finishes_grading(self):
+        timeout = timedelta(seconds=settings.JUDGE0_CALLBACK_TIMEOUT + 1)
+        AnswerTestResult.objects.filter(id=self.test_result.id).update(
+            submitted_at=timezone.now() - timeout
+        )
+
+        self.assertEqual(grading.reap_lost_callbacks(), 1)
+
+        self.test_result.refresh_from_db()
+        self.assertEqual(self.test_result.status, "failed")
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.grading_status, "failed")
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.grading_status, "failed")
+        self.assertIsNotNone(self.invitation.graded_at)
+        # Опоздавший callback не меняет итог
+        response = self.callback(stdout=base64.b64encode(b"3\n").decode())
+        self.assertEqual(response.status_code, 404)
+
+    def test_waiting_callback_is_not_reaped(self):
+        self.assertEqual(grading.reap_lost_callbacks(), 0)
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.grading_status, "running")
+
+
+class FakeRedisMixin:
+    """
+    Подменяет общий клиент Redis на fakeredis
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch("config.redis_client._client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    ANSWER_WRITE_BEHIND=True,
+    GRADING_EAGER=False,
+)
+class AnswerBufferTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.question = Question.objects.create(
+            text="Question", question_type="text", correct_answer="yes"
+        )
+        self.invitation = create_invitation()
+
+    def test_answers_are_buffered_until_flush(self):
+        self.assertTrue(
+            answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+        )
+
+        self.assertFalse(Answer.objects.exists())
+        self.assertEqual(
+            answer_buffer.get_answers(self.invitation.id), {self.question.id: "yes"}
+        )
+        self.assertEqual(answer_buffer.flush_all(), 1)
+        self.assertEqual(Answer.objects.get(invitation=self.invitation).response, "yes")
+        self.assertFalse(self.redis.smembers(answer_buffer.DIRTY_KEY))
+
+    def test_failed_flush_keeps_drafts(self):
+        answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+
+        with (
+            mock.patch.object(
+                answer_buffer, "upsert_answers", side_effect=Exception("db down")
+            ),
+            self.assertLogs("candidate_interface.answer_buffer", "ERROR"),
+        ):
+            self.assertEqual(answer_buffer.flush_all(), 0)
+
+        self.assertFalse(Answer.objects.exists())
+        self.assertEqual(answer_buffer.flush_all(), 1)
+        self.assertTrue(Answer.objects.exists())
+
+    def test_completed_invitation_rejects_answers(self):
+        self.invitation.complete()
+
+        self.assertFalse(
+            answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+        )
+        self.assertFalse(self.redis.exists(answer_buffer.DIRTY_KEY))
+
+    def test_drafts_saved_after_finish_are_not_flushed(self):
+        # Запрос с устаревшим приглашением из кеша записал черновик
+        # уже после завершения теста
+        stale = Invitation.objects.get(id=self.invitation.id)
+        self.invitation.complete()
+        answer_buffer.save_answers(stale, {self.question.id: "late"})
+
+        with self.assertLogs("candidate_interface.answer_buffer", "WARNING"):
+            self.assertEqual(answer_buffer.flush_all(), 0)
+        self.assertFalse(Answer.objects.exists())
+
+    def test_finish_waits_for_running_flush(self):
+        answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+        upsert_answers = answer_buffer.upsert_answers
+
+        def finish_during_flush(invitation_id, drafts):
+            # Завершение не может начаться, пока перенос держит блокировку
+            with self.assertRaises(redis.exceptions.LockError):
+                complete_invitation(Invitation.objects.get(id=invitation_id))
+            upsert_answers(invitation_id, drafts)
+
+        with (
+            mock.patch.object(answer_buffer, "LOCK_WAIT", 0.1),
+            mock.patch.object(
+                answer_buffer, "upsert_answers", side_effect=finish_during_flush
+            ),
+        ):
+            self.assertEqual(answer_buffer.flush_all(), 1)
+
+        self.assertEqual(Answer.objects.get(invitation=self.invitation).response, "yes")
+        self.invitation.refresh_from_db()
+        self.assertFalse(self.invitation.completed)
+
+    def test_flush_skips_invitation_being_finished(self):
+        answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+
+        with answer_buffer.drafts_lock(self.invitation.id):
+            self.assertEqual(answer_buffer.flush_all(), 0)
+
+        self.assertEqual(
+            answer_buffer.get_drafts(self.invitation.id), {self.question.id: "yes"}
+        )
+        self.assertEqual(answer_buffer.flush_all(), 1)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    ANSWER_WRITE_BEHIND=True,
+    GRADING_EAGER=False,
+)
+class ExpiryTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.question = Question.objects.create(
+            text="Question", question_type="text", correct_answer="yes"
+        )
+        self.invitation = create_invitation(
+            deadline=timezone.now() - timedelta(minutes=5)
+        )
+        answer_buffer.save_answers(self.invitation, {self.question.id: "yes"})
+
+    def test_expired_invitation_is_flushed_and_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_invitations(), 1)
+
+        self.invitation.refresh_from_db()
+        self.assertTrue(self.invitation.completed)
+        self.assertEqual(self.invitation.grading_status, "queued")
+        self.assertTrue(Answer.objects.filter(invitation=self.invitation).exists())
+        self.assertEqual(
+            self.redis.lrange(grading.GRADING_QUEUE, 0, -1), [str(self.invitation.id)]
+        )
+        self.assertEqual(expire_invitations(), 0)
+        self.assertFalse(
+            self.redis.exists(
+                answer_buffer.DRAFTS_KEY.format(invitation_id=self.invitation.id)
+            )
+        )
+        self.assertFalse(self.redis.smembers(answer_buffer.DIRTY_KEY))
+
+    def test_failed_finish_keeps_drafts(self):
+        with (
+            mock.patch(
+                "candidate_interface.expiry.enqueue_grading",
+                side_effect=redis.ConnectionError("redis down"),
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+            self.assertRaises(redis.ConnectionError),
+        ):
+            complete_invitation(self.invitation)
+
+        self.assertFalse(Invitation.objects.get(id=self.invitation.id).completed)
+        self.assertFalse(Answer.objects.exists())
+        self.assertEqual(
+            answer_buffer.get_drafts(self.invitation.id), {self.question.id: "yes"}
+        )
+
+    def test_flush_failure_leaves_invitation_open(self):
+        with (
+            mock.patch.object(
+                self.redis, "hgetall", side_effect=redis.ConnectionError("redis down")
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+            self.assertLogs("candidate_interface.expiry", "ERROR"),
+        ):
+            self.assertEqual(expire_invitations(), 0)
+
+        self.invitation.refresh_from_db()
+        self.assertFalse(self.invitation.completed)
+        self.assertEqual(self.invitation.grading_status, "not_started")
+        self.assertFalse(self.redis.exists(grading.GRADING_QUEUE))
+
+        # Следующий проход сборщика завершает тест вместе с ответами
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_invitations(), 1)
+        self.assertTrue(Answer.objects.filter(invitation=self.invitation).exists())
+
+    def test_finish_view_reports_flush_failure(self):
+        with mock.patch.object(
+            self.redis, "hgetall", side_effect=redis.ConnectionError("redis down")
+        ):
+            response = self.client.post(
+                f"/api/candidate/test/{self.invitation.unique_link}/finish/"
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.invitation.refresh_from_db()
+        self.assertFalse(self.invitation.completed)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    GRADING_EAGER=False,
+)
+class InvitationCacheTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.invitation = create_invitation()
+        self.link = self.invitation.unique_link
+
+    def test_complete_invalidates_cached_state(self):
+        self.assertFalse(invitation_cache.get_invitation(self.link).completed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.invitation.complete())
+
+        self.assertTrue(invitation_cache.get_invitation(self.link).completed)
+
+    def test_touch_answers_invalidates_cached_state(self):
+        self.assertEqual(invitation_cache.get_invitation(self.link).answers_revision, 0)
+
+        self.invitation.touch_answers()
+
+        self.assertEqual(invitation_cache.get_invitation(self.link).answers_revision, 1)
+
+    def test_sweeper_expires_overdue_invitation(self):
+        Invitation.objects.filter(id=self.invitation.id).update(
+            started_at=timezone.now() - timedelta(hours=2),
+            deadline=timezone.now() - timedelta(hours=1),
+        )
+        self.assertFalse(invitation_cache.get_invitation(self.link).completed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_invitations(), 1)
+
+        self.assertTrue(invitation_cache.get_invitation(self.link).completed)
+        response = self.client.get(f"/api/candidate/test/{self.link}/bootstrap/")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data["completed"])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    ANSWER_WRITE_BEHIND=False,
+    GRADING_EAGER=False,
+)
+class GradingQueueTests(FakeRedisMixin, TestCase):
+    def test_job_stays_in_processing_list_until_ack(self):
+        self.redis.lpush(grading.GRADING_QUEUE, 1, 2)
+
+        self.assertEqual(grading.next_grading_job("w1", timeout=1), 1)
+        self.assertEqual(self.redis.lrange("grading:processing:w1", 0, -1), ["1"])
+        grading.ack_grading_job("w1", 1)
+        self.assertFalse(self.redis.exists("grading:processing:w1"))
+        self.assertEqual(self.redis.lrange(grading.GRADING_QUEUE, 0, -1), ["2"])
+
+    def test_unacked_jobs_are_recovered_on_restart(self):
+        self.redis.lpush(grading.GRADING_QUEUE, 1, 2)
+        grading.next_grading_job("w1", timeout=1)
+        grading.next_grading_job("w1", timeout=1)
+        # Воркер остановился, не подтвердив задачи
+
+        self.assertEqual(grading.recover_grading_jobs("w1"), 2)
+
+        self.assertFalse(self.redis.exists("grading:processing:w1"))
+        # Восстановленные задачи берутся первыми и в прежнем порядке
+        self.assertEqual(grading.next_grading_job("w2", timeout=1), 1)
+        self.assertEqual(grading.next_grading_job("w2", timeout=1), 2)
+
+    def test_queued_invitations_missing_from_queue_are_requeued(self):
+        queued = create_invitation(grading_status="queued")
+        in_queue = create_invitation(grading_status="queued")
+        create_invitation(grading_status="done")
+        self.redis.lpush(grading.GRADING_QUEUE, in_queue.id)
+
+        self.assertEqual(grading.recover_grading_jobs("w1"), 1)
+
+        self.assertCountEqual(
+            self.redis.lrange(grading.GRADING_QUEUE, 0, -1),
+            [str(queued.id), str(in_queue.id)],
+        )
+
+    def test_repeated_finish_enqueues_grading_once(self):
+        invitation = create_invitation()
+        url = f"/api/candidate/test/{invitation.unique_link}/finish/"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.post(url)
+            second = self.client.post(url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["grading_status"], "queued")
+        self.assertEqual(
+            self.redis.lrange(grading.GRADING_QUEUE, 0, -1), [str(invitation.id)]
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TAB_SWITCH_BUFFER=True)
+class TabSwitchBufferTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.invitation = create_invitation()
+        self.started = timezone.now() - timedelta(minutes=10)
+
+    def at(self, seconds):
+        return self.started + timedelta(seconds=seconds)
+
+    def test_events_are_buffered_and_counted(self):
+        count = tab_switch_buffer.log_events(
+            self.invitation, [("hidden", self.at(0)), ("visible", self.at(30))]
+        )
+
+        self.assertEqual(count, 2)
+        self.assertEqual(self.redis.xlen(tab_switch_buffer.STREAM_KEY), 2)
+        self.assertFalse(TabSwitchLog.objects.exists())
+
+    def test_flush_moves_events_and_updates_counters(self):
+        tab_switch_buffer.log_events(
+            self.invitation,
+            [("hidden", self.at(0)), ("visible", self.at(30)), ("hidden", self.at(60))],
+        )
+
+        self.assertEqual(tab_switch_buffer.flush_switches(), 3)
+
+        self.assertEqual(self.redis.xlen(tab_switch_buffer.STREAM_KEY), 0)
+        self.assertEqual(
+            TabSwitchLog.objects.filter(invitation=self.invitation).count(), 3
+        )
+        self.invitation.refresh_from_db()
+        self.assertEqual(
+            (self.invitation.tab_hidden_count, self.invitation.tab_visible_count),
+            (2, 1),
+        )
+        self.assertEqual(self.invitation.time_away, timedelta(seconds=30))
+        self.assertEqual(self.invitation.away_since, self.at(60))
+
+    def test_counter_is_seeded_from_invitation(self):
+        Invitation.objects.filter(id=self.invitation.id).update(
+            tab_hidden_count=4, tab_visible_count=3
+        )
+
+        count = tab_switch_buffer.log_switch(self.invitation, "visible")
+
+        self.assertEqual(count, 8)
+
+    def test_events_of_deleted_invitation_are_dropped(self):
+        tab_switch_buffer.log_switch(self.invitation, "hidden")
+        self.invitation.delete()
+
+        self.assertEqual(tab_switch_buffer.flush_switches(), 1)
+        self.assertEqual(self.redis.xlen(tab_switch_buffer.STREAM_KEY), 0)
+        self.assertFalse(TabSwitchLog.objects.exists())
+
+    def test_events_are_written_directly_without_redis(self):
+        with (
+            mock.patch.object(
+                tab_switch_buffer,
+                "buffer_events",
+                side_effect=redis.ConnectionError("redis down"),
+            ),
+            self.assertLogs("candidate_interface.tab_switch_buffer", "ERROR"),
+        ):
+            count = tab_switch_buffer.log_switch(self.invitation, "hidden")
+
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            TabSwitchLog.objects.filter(invitation=self.invitation).count(), 1
+        )
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.tab_hidden_count, 1)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    TAB_SWITCH_BUFFER=True,
+    TAB_SWITCH_COMPACTION_DELAY=600,
+    TAB_SWITCH_RETENTION_DAYS=30,
+)
+class TabCompactionTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.invitation = create_invitation()
+        self.invitation.complete()
+        self.finished = timezone.now() - timedelta(minutes=11)
+        Invitation.objects.filter(id=self.invitation.id).update(
+            completed_at=self.finished
+        )
+
+    def at(self, seconds):
+        return self.finished - timedelta(minutes=30) + timedelta(seconds=seconds)
+
+    def log(self, *events):
+        TabSwitchLog.objects.bulk_create(
+            TabSwitchLog(
+                invitation=self.invitation, event_type=event_type, timestamp=ts
+            )
+            for event_type, ts in events
+        )
+
+    def intervals(self):
+        return list(
+            AwayInterval.objects.filter(invitation=self.invitation)
+            .order_by("started_at")
+            .values_list("started_at", "duration")
+        )
+
+    def test_events_are_compacted_into_intervals(self):
+        self.log(
+            ("hidden", self.at(0)),
+            ("hidden", self.at(10)),
+            ("visible", self.at(30)),
+            ("hidden", self.at(60)),
+        )
+
+        self.assertEqual(tab_compaction.compact_invitations(), 1)
+
+        self.assertEqual(
+            self.intervals(),
+            [(self.at(0), timedelta(seconds=30)), (self.at(60), None)],
+        )
+        self.invitation.refresh_from_db()
+        self.assertIsNotNone(self.invitation.tab_log_compacted_at)
+        self.assertEqual(tab_compaction.compact_invitations(), 0)
+
+    def test_settle_window_counts_from_completion(self):
+        # Последнее событие давно, но тест завершён только что
+        self.log(("hidden", self.at(0)))
+        Invitation.objects.filter(id=self.invitation.id).update(
+            completed_at=timezone.now()
+        )
+
+        self.assertEqual(tab_compaction.compact_invitations(), 0)
+        self.assertEqual(self.intervals(), [])
+
+    def test_buffered_events_postpone_compaction(self):
+        self.log(("hidden", self.at(0)))
+        tab_switch_buffer.log_events(self.invitation, [("visible", self.at(30))])
+
+        self.assertEqual(tab_compaction.compact_invitations(), 0)
+
+        tab_switch_buffer.flush_switches()
+        self.assertEqual(tab_compaction.compact_invitations(), 1)
+        self.assertEqual(self.intervals(), [(self.at(0), timedelta(seconds=30))])
+
+    def test_expired_raw_events_of_compacted_invitations_are_deleted(self):
+        old = timezone.now() - timedelta(days=31)
+        self.log(("hidden", old), ("visible", self.at(0)))
+        open_invitation = create_invitation()
+        TabSwitchLog.objects.create(
+            invitation=open_invitation, event_type="hidden", timestamp=old
+        )
+
+        self.assertEqual(tab_compaction.delete_expired_logs(), 0)
+        tab_compaction.compact_invitations()
+        self.assertEqual(tab_compaction.delete_expired_logs(), 1)
+
+        self.assertEqual(
+            list(
+                TabSwitchLog.objects.order_by("id").values_list(
+                    "invitation_id", "timestamp"
+                )
+            ),
+            [(self.invitation.id, self.at(0)), (open_invitation.id, old)],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TAB_SWITCH_BUFFER=True)
+class ProctoringEventsTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.invitation = create_invitation()
+        now = timezone.now()
+        self.events = [
+            (1, "hidden", now - timedelta(seconds=20)),
+            (2, "visible", now - timedelta(seconds=10)),
+        ]
+
+    def post(self, events):
+        return self.client.post(
+            f"/api/candidate/test/{self.invitation.unique_link}/events/",
+            {
+                "client_id": "tab",
+                "events": [
+                    {"seq": seq, "type": event_type, "timestamp": ts.timestamp() * 1000}
+                    for seq, event_type, ts in events
+                ],
+            },
+            content_type="application/json",
+        )
+
+    def test_resent_events_are_accepted_once(self):
+        self.assertEqual(self.post(self.events).data["accepted"], 2)
+        self.assertEqual(self.post(self.events).data["accepted"], 0)
+        self.assertEqual(self.post(self.events + self.events).data["accepted"], 0)
+
+        self.assertEqual(self.redis.xlen(tab_switch_buffer.STREAM_KEY), 2)
+
+    def test_events_are_not_marked_seen_when_buffering_fails(self):
+        with (
+            mock.patch.object(
+                tab_switch_buffer, "add_to_stream", side_effect=RuntimeError
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            tab_switch_buffer.log_client_events(self.invitation, "tab", self.events)
+
+        self.assertEqual(
+            tab_switch_buffer.log_client_events(self.invitation, "tab", self.events), 2
+        )
+        self.assertEqual(self.redis.xlen(tab_switch_buffer.STREAM_KEY), 2)
+
+    @override_settings(TAB_SWITCH_BUFFER=False)
+    def test_events_are_released_when_database_write_fails(self):
+        with (
+            mock.patch.object(
+                tab_switch_buffer, "write_events", side_effect=RuntimeError
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            tab_switch_buffer.log_client_events(self.invitation, "tab", self.events)
+
+        self.assertEqual(
+            tab_switch_buffer.log_client_events(self.invitation, "tab", self.events), 2
+        )
+        self.assertEqual(
+            TabSwitchLog.objects.filter(invitation=self.invitation).count(), 2
+        )
+        self.assertEqual(
+            tab_switch_buffer.log_client_events(self.invitation, "tab", self.events), 0
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    ANSWER_WRITE_BEHIND=True,
+)
+class SubmitAnswersBatchTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        template = TestTemplate.objects.create(name="Batch", description="")
+        self.text = Question.objects.create(
+            text="Text", question_type="text", correct_answer="yes"
+        )
+        self.choice = Question.objects.create(
+            text="Choice", question_type="multiple_choice", correct_answer="[1]"
+        )
+        for order, question in enumerate((self.text, self.choice)):
+            TestTemplateQuestion.objects.create(
+                template=template, question=question, order=order
+            )
+        self.invitation = create_invitation(template)
+        self.url = f"/api/candidate/test/{self.invitation.unique_link}/answers/"
+
+    def submit(self, answers):
+        return self.client.post(
+            self.url, {"answers": answers}, content_type="application/json"
+        )
+
+    def test_valid_answers_are_saved_together(self):
+        response = self.submit(
+            [
+                {"question_id": self.text.id, "response": " first "},
+                {"question_id": self.choice.id, "response": [1]},
+                {"question_id": self.text.id, "response": "last"},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]], ["ok", "ok", "ok"]
+        )
+        self.assertEqual(
+            answer_buffer.get_answers(self.invitation.id),
+            {self.text.id: "last", self.choice.id: "[1]"},
+        )
+
+    def test_invalid_items_are_reported_per_answer(self):
+        response = self.submit(
+            [
+                {"question_id": self.text.id, "response": "yes"},
+                {"question_id": 999999, "response": "yes"},
+                {"question_id": self.choice.id, "response": "not json"},
+                "not an object",
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["ok", "error", "error", "error"],
+        )
+        self.assertEqual(
+            answer_buffer.get_answers(self.invitation.id), {self.text.id: "yes"}
+        )
+
+    def test_empty_and_oversized_batches_are_rejected(self):
+        self.assertEqual(self.submit([]).status_code, 400)
+        answer = {"question_id": self.text.id, "response": "yes"}
+        self.assertEqual(
+            self.submit([answer] * (MAX_BATCH_ANSWERS + 1)).status_code, 400
+        )
+        self.assertEqual(answer_buffer.get_answers(self.invitation.id), {})
+
+    def test_boolean_question_id_is_rejected(self):
+        # true == 1: без проверки ответ попал бы в вопрос с id 1
+        Question.objects.filter(id=1).delete()
+        template = TestTemplate.objects.create(name="First", description="")
+        question = Question.objects.create(
+            id=1, text="First", question_type="text", correct_answer="yes"
+        )
+        TestTemplateQuestion.objects.create(template=template, question=question)
+        invitation = create_invitation(template)
+
+        response = self.client.post(
+            f"/api/candidate/test/{invitation.unique_link}/answers/",
+            {"answers": [{"question_id": True, "response": "yes"}]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.data["results"][0]["status"], "error")
+        self.assertEqual(answer_buffer.get_answers(invitation.id), {})
+
+    def test_batch_after_deadline_is_rejected(self):
+        self.invitation.start()
+        grace = timedelta(seconds=settings.TEST_DEADLINE_GRACE + 1)
+        Invitation.objects.filter(id=self.invitation.id).update(
+            deadline=timezone.now() - grace
+        )
+        cache.clear()
+
+        response = self.submit([{"question_id": self.text.id, "response": "yes"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data["completed"])
+        self.assertEqual(answer_buffer.get_answers(self.invitation.id), {})
+
+    def test_completed_test_rejects_batch(self):
+        self.invitation.complete()
+
+        response = self.submit([{"question_id": self.text.id, "response": "yes"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(answer_buffer.get_answers(self.invitation.id), {})
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    ANSWER_WRITE_BEHIND=True,
+)
+class TestBootstrapViewTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        template = TestTemplate.objects.create(name="Bootstrap", description="")
+        self.question = Question.objects.create(
+            text="Text", question_type="text", correct_answer="yes"
+        )
+        TestTemplateQuestion.objects.create(template=template, question=self.question)
+        self.invitation = create_invitation(template)
+        self.url = f"/api/candidate/test/{self.invitation.unique_link}/bootstrap/"
+
+    def bootstrap(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(self.url, headers=headers)
+
+    def test_unchanged_test_is_not_modified(self):
+        answer_buffer.save_answer(self.invitation, self.question.id, "draft")
+        response = self.bootstrap()
+        self.assertEqual(response.status_code, 200)
+
+        not_modified = self.bootstrap(response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+        answer_buffer.save_answer(self.invitation, self.question.id, "changed")
+        changed = self.bootstrap(response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data["answers"], {str(self.question.id): "changed"})
+
+    def test_lost_drafts_do_not_repeat_etag(self):
+        answer_buffer.save_answer(self.invitation, self.question.id, "first")
+        etag = self.bootstrap()["ETag"]
+        answer_buffer.flush_all()
+
+        # Redis потерял данные, следующий черновик начинается заново
+        self.redis.flushall()
+        answer_buffer.save_answer(self.invitation, self.question.id, "second")
+
+        response = self.bootstrap(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["answers"], {str(self.question.id): "second"})
+
+
+@unittest.skipUnless(sys.platform == "linux", "LocalBackend needs Linux")
+@override_settings(LOCAL_RUNNER_WORKERS=1, LOCAL_RUNNER_OUTPUT_LIMIT=1024)
+@unittest.skipIf(
+    os.getuid() == 0 and local_runner.is_private(sys.executable),
+    "интерпретатор недоступен пользователю песочницы",
+)
+class LocalBackendTests(TestCase):
+    def run_both(self, source_code):
+        results = []
+        for warm in (False, True):
+            with self.settings(LOCAL_RUNNER_WARM_POOL=warm):
+                results.append(local_runner.LocalBackend().execute(source_code))
+        return results
+
+    def test_output_limit_verdict_is_the_same_on_both_paths(self):
+        cold, warm = self.run_both("while True: print('x' * 100)")
+
+        self.assertEqual(cold["status"], warm["status"])
+        self.assertEqual(cold["status"]["description"], "Runtime Error (SIGXFSZ)")
+        self.assertEqual(len(cold["stdout"]), 1024)
+        self.assertEqual(len(warm["stdout"]), 1024)
+
+    def test_output_exactly_at_limit_is_accepted(self):
+        for result in self.run_both("import sys; sys.stdout.write('x' * 1024)"):
+            self.assertEqual(result["status"]["description"], "Accepted")
+
+    def test_warm_traceback_has_only_candidate_frames(self):
+        _, warm = self.run_both("def f():\n    1 / 0\nf()")
+
+        self.assertNotIn("warm_worker", warm["stderr"])
+        self.assertIn('File "main.py", line 2, in f', warm["stderr"])
+        self.assertIn("ZeroDivisionError", warm["stderr"])
+
+    def test_cancelled_run_is_stopped(self):
+        for warm in (False, True):
+            with self.settings(LOCAL_RUNNER_WARM_POOL=warm, LOCAL_RUNNER_WALL_TIME=30):
+                backend = local_runner.LocalBackend()
+            token = backend.submit("import time\ntime.sleep(30)")
+            future, _ = backend._futures[token]
+
+            async def cancel_run():
+                waiting = asyncio.ensure_future(backend.await_result(token))
+                await asyncio.sleep(0.5)
+                waiting.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiting
+
+            asyncio.run(cancel_run())
+            # Программа завершена сразу, а не по лимиту времени
+            self.assertLess(float(future.result(timeout=5)["time"]), 5)
+
+    def test_program_cannot_start_processes(self):
+        for result in self.run_both("import os\nos.fork()"):
+            self.assertEqual(result["status"]["description"], "Runtime Error (NZEC)")
+            self.assertIn("BlockingIOError", result["stderr"])
+
+    @unittest.skipUnless(os.getuid() == 0, "смена пользователя требует root")
+    def test_program_runs_as_unprivileged_user(self):
+        private = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, private)
+        secret = os.path.join(private, "db.sqlite3")
+        with open(secret, "w") as f:
+            f.write("secret")
+
+        for result in self.run_both(f"import os\nprint(os.getuid())\nopen({secret!r})"):
+            self.assertGreaterEqual(
+                int(result["stdout"]), settings.LOCAL_RUNNER_UID, result
+            )
+            self.assertIn("PermissionError", result["stderr"])
+
+
+class HangingBackend(sandbox.ExecutionBackend):
+    """
+    Песочница, запуски в которой не завершаются
+    """
+
+    async def asubmit(self, source_code, stdin=""):
+        return "token"
+
+    async def await_result(self, token):
+        await asyncio.Event().wait()
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class InterviewConsumerTests(FakeRedisMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = InterviewerUser.objects.create_user(username="candidate")
+        self.invitation = create_invitation(interview_type="technical")
+        self.room = f"interview_{self.invitation.unique_link}"
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns),
+            f"/ws/interview/{self.invitation.unique_link}/",
+        )
+        communicator.scope["user"] = self.user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # initial_data
+        return communicator
+
+    async def run_code(self, communicator, code):
+        await communicator.send_json_to({"type": "run_code", "code": code})
+
+    async def test_new_run_cancels_previous_with_terminal_status(self):
+        with mock.patch.object(sandbox, "get_backend", return_value=HangingBackend()):
+            communicator = await self.connect()
+            await self.run_code(communicator, "print(1)")
+            first = await communicator.receive_json_from()
+            self.assertEqual(first["status"], "queued")
+            self.assertEqual(
+                (await communicator.receive_json_from())["status"], "running"
+            )
+
+            await self.run_code(communicator, "print(2)")
+            cancelled = await communicator.receive_json_from()
+            queued = await communicator.receive_json_from()
+            await asyncio.sleep(0)
+            self.assertNotIn(first["run_id"], consumers.run_tasks)
+            consumers.run_tasks[queued["run_id"]].cancel()
+            await communicator.disconnect()
+
+        self.assertEqual(
+            (cancelled["run_id"], cancelled["status"]), (first["run_id"], "cancelled")
+        )
+        self.assertEqual(queued["status"], "queued")
+        self.assertNotEqual(queued["run_id"], first["run_id"])
+
+    async def test_run_in_another_process_is_superseded(self):
+        # Прежний запуск комнаты начат другим процессом Daphne
+        self.redis.set(consumers.ROOM_RUN_KEY.format(room=self.room), "remote")
+        remote = asyncio.ensure_future(asyncio.Event().wait())
+        consumers.run_tasks["remote"] = remote
+        self.addCleanup(consumers.run_tasks.pop, "remote", None)
+
+        with mock.patch.object(sandbox, "get_backend", return_value=HangingBackend()):
+            communicator = await self.connect()
+            await self.run_code(communicator, "print(1)")
+            cancelled = await communicator.receive_json_from()
+            queued = await communicator.receive_json_from()
+            consumers.run_tasks[queued["run_id"]].cancel()
+            await communicator.disconnect()
+
+        self.assertEqual(
+            (cancelled["run_id"], cancelled["status"]), ("remote", "cancelled")
+        )
+        self.assertTrue(remote.cancelled())
+
+    def test_superseded_run_does_not_report_result(self):
+        self.assertIsNone(consumers.replace_run(self.room, "first"))
+        self.assertEqual(consumers.replace_run(self.room, "second"), "first")
+
+        self.assertFalse(consumers.finish_run(self.room, "first"))
+        self.assertTrue(consumers.finish_run(self.room, "second"))
+        self.assertIsNone(consumers.replace_run(self.room, "third"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestResultsListViewTests(TestCase):
+    url = "/api/candidate/results/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = InterviewerUser.objects.create_user(username="hr", is_hr=True)
+        cls.template = TestTemplate.objects.create(name="Python", description="")
+        cls.questions = [
+            Question.objects.create(
+                text=f"Question {i}", question_type="text", correct_answer="yes"
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+
+    def create_results(self, count):
+        invitations = []
+        start = Candidate.objects.count()
+        for i in range(start, start + count):
+            candidate = Candidate.objects.create(
+                email=f"candidate{i}@example.com", full_name=f"Candidate {i}"
+            )
+            invitation = Invitation.objects.create(
+                candidate=candidate,
+                test_template=self.template,
+                completed=True,
+                tab_hidden_count=i,
+            )
+            for question in self.questions:
+                Answer.objects.create(
+                    invitation=invitation, question=question, response="yes", score=10
+                )
+                QuestionFeedback.objects.create(
+                    invitation=invitation, question=question, score=i
+                )
+            invitations.append(invitation)
+        return invitations
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.create_results(1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(self.url).data["results"]), 1)
+
+        self.create_results(5)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(self.url).data["results"]), 6)
+
+    def test_aggregates(self):
+        invitation = self.create_results(3)[-1]
+        Invitation.objects.create(
+            candidate=invitation.candidate, test_template=self.template
+        )
+
+        results = self.client.get(self.url).data["results"]
+
+        self.assertEqual(len(results), 3)
+        row = results[0]
+        self.assertEqual(row["id"], invitation.id)
+        self.assertEqual(row["auto_score"], 30)
+        self.assertEqual(row["manual_score"], 6)
+        self.assertEqual(row["tab_switches"], 2)
+        self.assertEqual(
+            row["completed_at"], invitation.answers.order_by("-id").first().id
+        )
+
+    def test_cursor_pagination(self):
+        invitations = self.create_results(3)
+
+        first = self.client.get(self.url, {"page_size": 2}).data
+        second = self.client.get(first["next"]).data
+
+        self.assertEqual(
+            [r["id"] for r in first["results"] + second["results"]],
+            [invitation.id for invitation in reversed(invitations)],
+        )
+        self.assertIsNone(second["next"])
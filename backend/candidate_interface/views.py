@@ -1,11 +1,15 @@
 import json
 
-from django.http import HttpResponse, JsonResponse
+import redis
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from .models import Answer, Invitation, TabSwitchLog
+from . import answer_buffer, tab_switch_buffer
+from .expiry import complete_invitation
+from .invitation_cache import get_invitation
+from .models import Answer, Invitation
+from .template_snapshot import get_invitation_snapshot
 
 
 @csrf_exempt
@@ -19,15 +23,23 @@ def log_tab_switch(request, unique_link):
     event_type = data.get("state")
 
     if event_type in ["hidden", "visible"]:
-        TabSwitchLog.objects.create(invitation=invitation, event_type=event_type)
-        count = invitation.tab_switches.count()
+        count = tab_switch_buffer.log_switch(invitation, event_type)
         return JsonResponse({"status": "ok", "count": count})
 
     return JsonResponse({"status": "error"}, status=400)
 
 
 def take_test(request, unique_link, question_id=None):
-    invitation = get_object_or_404(Invitation, unique_link=unique_link)
+    """
+    Серверная страница теста. Вопросы берутся из закешированного снимка
+    приглашения (ключ — версия теста), на каждый запрос рендерятся только
+    данные кандидата: сохранённый ответ и таймер
+    """
+
+    try:
+        invitation = get_invitation(unique_link)
+    except Invitation.DoesNotExist:
+        raise Http404
     if invitation.completed:
         return render(
             request,
@@ -38,38 +50,22 @@ def take_test(request, unique_link, question_id=None):
             },
         )
 
-    template = invitation.test_template
-    time_limit_seconds = template.time_limit * 60
-
-    time_limit_active = time_limit_seconds > 0
-    remaining_time = 0
-
-    if time_limit_active:
-        session_key = f"test_start_{unique_link}"
-        if session_key not in request.session:
-            request.session[session_key] = timezone.now().timestamp()
-            request.session.modified = True
-
-        start_timestamp = request.session[session_key]
-        elapsed = timezone.now().timestamp() - start_timestamp
-
-        if elapsed >= time_limit_seconds:
-            invitation.completed = True
-            invitation.save()
-            return render(
-                request,
-                "candidate_interface/test_completed.html",
-                {
-                    "candidate": invitation.candidate,
-                    "message": "Время на тест истекло. Результаты сохранены",
-                },
-            )
-
-        remaining_time = int(time_limit_seconds - elapsed)
+    invitation.start()
+    if invitation.is_expired():
+        return render(
+            request,
+            "candidate_interface/test_completed.html",
+            {
+                "candidate": invitation.candidate,
+                "message": "Время на тест истекло. Результаты сохранены",
+            },
+        )
 
-    template_questions = template.testtemplatequestion_set.all().order_by("order")
-    questions = [tq.question for tq in template_questions]
+    time_limit_active = invitation.deadline is not None
+    remaining_time = invitation.remaining_seconds() or 0
 
+    snapshot = get_invitation_snapshot(invitation)
+    questions = snapshot.questions
     if not questions:
         return HttpResponse("Нет вопросов в тесте")
 
@@ -77,37 +73,24 @@ def take_test(request, unique_link, question_id=None):
         return redirect(
             "candidate_interface:take_test",
             unique_link=unique_link,
-            question_id=questions[0].id,
+            question_id=questions[0]["id"],
         )
 
-    try:
-        current_index = next(i for i, q in enumerate(questions) if q.id == question_id)
-        current_question = questions[current_index]
-    except StopIteration:
+    current_index = snapshot.position(question_id)
+    if current_index is None:
         return HttpResponse("Вопрос не найден в этом тесте", status=404)
+    current_question = questions[current_index]
 
     if request.method == "POST":
-        response_key = f"question_{current_question.id}"
-        if current_question.question_type == "multiple_choice":
+        response_key = f"question_{question_id}"
+        if current_question["question_type"] == "multiple_choice":
             response_value = json.dumps(
                 [int(v) for v in request.POST.getlist(response_key)]
             )
         else:
             response_value = request.POST.get(response_key, "").strip()
 
-        answer_obj, created = Answer.objects.update_or_create(
-            invitation=invitation,
-            question=current_question,
-            defaults={"response": response_value},
-        )
-
-        switches = request.POST.get("switches")
-        if switches is not None:
-            try:
-                answer_obj.switches = int(switches)
-                answer_obj.save()
-            except (ValueError, TypeError):
-                pass
+        answer_buffer.save_answer(invitation, question_id, response_value)
 
         action = request.POST.get("action")
         if action == "next":
@@ -116,7 +99,7 @@ def take_test(request, unique_link, question_id=None):
                 return redirect(
                     "candidate_interface:take_test",
                     unique_link=unique_link,
-                    question_id=questions[next_index].id,
+                    question_id=questions[next_index]["id"],
                 )
             else:
                 return redirect(
@@ -129,15 +112,24 @@ def take_test(request, unique_link, question_id=None):
                 return redirect(
                     "candidate_interface:take_test",
                     unique_link=unique_link,
-                    question_id=questions[prev_index].id,
+                    question_id=questions[prev_index]["id"],
                 )
 
         elif action == "finish":
             return redirect("candidate_interface:finish_test", unique_link=unique_link)
 
+    current_answer = answer_buffer.get_drafts(invitation.id).get(question_id)
+    if current_answer is None:
+        current_answer = (
+            Answer.objects.filter(invitation_id=invitation.id, question_id=question_id)
+            .values_list("response", flat=True)
+            .first()
+        )
+
     context = {
         "invitation": invitation,
         "current_question": current_question,
+        "current_answer": current_answer or "",
         "questions": questions,
         "total_questions": len(questions),
         "current_index": current_index + 1,
@@ -153,20 +145,18 @@ def take_test(request, unique_link, question_id=None):
 def finish_test(request, unique_link):
     invitation = get_object_or_404(Invitation, unique_link=unique_link)
 
-    if invitation.completed:
+    try:
+        completed = complete_invitation(invitation)
+    except redis.RedisError:
+        return HttpResponse("Не удалось завершить тест, попробуйте ещё раз", status=503)
+
+    if not completed:
         return render(
             request,
             "candidate_interface/test_completed.html",
             {"candidate": invitation.candidate, "message": "Тест уже завершён."},
         )
 
-    invitation.completed = True
-    invitation.save()
-
-    for answer in invitation.answers.all():
-        answer.auto_evaluate()
-        answer.save()
-
     return render(
         request,
         "candidate_interface/test_completed.html",
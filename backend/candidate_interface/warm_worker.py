@@ -0,0 +1,213 @@
+"""
+Прогретый процесс-исполнитель для LocalBackend. Запускается как отдельный
+скрипт (python -I -S warm_worker.py <cpu> <memory> <output> <wall> <uid> <gid>),
+заранее импортирует частые модули стандартной библиотеки и на каждую
+программу делает fork: дочерний процесс получает лимиты, переключается
+на пользователя песочницы и выполняет код, родитель остаётся чистым.
+Задания и результаты — JSON с 4-байтным префиксом длины
+"""
+
+import builtins
+import json
+import linecache
+import os
+import resource
+import select
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+# Прогрев: модули, которые обычно нужны решениям
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import math  # noqa: F401
+import re  # noqa: F401
+import string  # noqa: F401
+
+HEADER = struct.Struct(">I")
+
+
+def read_message(stream):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    return json.loads(stream.read(HEADER.unpack(header)[0]))
+
+
+def write_message(fd, message):
+    data = json.dumps(message).encode()
+    os.write(fd, HEADER.pack(len(data)) + data)
+
+
+def apply_limits(limits, user):
+    """
+    Лимиты и пользователь песочницы для дочернего процесса. RLIMIT_NPROC
+    запрещает программе создавать процессы и потоки: у каждого слота
+    песочницы свой uid, и единственный его процесс — сама программа
+    """
+
+    cpu_time, memory_bytes, output_limit = limits
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_time, cpu_time + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    # На байт больше лимита, чтобы отличить переполнение от вывода ровно в лимит
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit + 1, output_limit + 1))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (1, 1))
+    # Без root пользователя сменить нельзя, лимит процессов при этом действует
+    if os.getuid() == 0:
+        uid, gid = user
+        os.setgroups([])
+        os.setgid(gid)
+        os.setuid(uid)
+
+
+def run_child(source_code, workdir, limits, user):
+    os.setsid()
+    os.chdir(workdir)
+    # Файлы открываются до смены пользователя: каталог ему недоступен
+    for fd, name, flags in (
+        (0, "stdin", os.O_RDONLY),
+        (1, "stdout", os.O_WRONLY | os.O_CREAT),
+        (2, "stderr", os.O_WRONLY | os.O_CREAT),
+    ):
+        os.dup2(os.open(name, flags, 0o600), fd)
+    apply_limits(limits, user)
+    sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+
+    # Исходный код для строк в traceback, файла main.py в каталоге нет
+    linecache.cache["main.py"] = (
+        len(source_code),
+        None,
+        source_code.splitlines(True),
+        "main.py",
+    )
+    exit_code = 0
+    try:
+        code = compile(source_code, "main.py", "exec")
+        exec(code, {"__name__": "__main__", "__builtins__": builtins})
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            exit_code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        print_user_traceback(e)
+        exit_code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        exit_code = exit_code or 1
+    os._exit(exit_code)
+
+
+def print_user_traceback(exc):
+    """
+    Traceback без кадров самого warm_worker: кандидат видит только свой код
+    """
+
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != "main.py":
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb)
+
+
+def wait_child(pid, wall_time, proto_in):
+    """
+    Ждёт завершения программы не дольше wall_time. Сообщение от родителя
+    во время ожидания — отмена запуска, программа завершается сразу
+    """
+
+    # pidfd позволяет ждать завершения с таймаутом без опроса
+    pidfd = os.pidfd_open(pid)
+    try:
+        ready, _, _ = select.select([pidfd, proto_in], [], [], wall_time)
+        exited = pidfd in ready
+    finally:
+        os.close(pidfd)
+    timed_out = not ready
+    if not exited:
+        if ready:
+            read_message(proto_in)
+        os.killpg(pid, signal.SIGKILL)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status), timed_out
+
+
+def read_output(path, limit):
+    with open(path, "rb") as f:
+        return f.read(limit).decode(errors="replace")
+
+
+def output_exceeded(paths, limit):
+    return any(os.path.getsize(path) > limit for path in paths)
+
+
+def execute(job, proto_in, proto_fds, limits, user, wall_time):
+    with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+        with open(os.path.join(workdir, "stdin"), "w", encoding="utf-8") as f:
+            f.write(job.get("stdin") or "")
+
+        started = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            for fd in proto_fds:
+                os.close(fd)
+            run_child(job["source_code"], workdir, limits, user)
+        returncode, timed_out = wait_child(pid, wall_time, proto_in)
+        elapsed = time.monotonic() - started
+
+        output_limit = limits[2]
+        stdout_path = os.path.join(workdir, "stdout")
+        stderr_path = os.path.join(workdir, "stderr")
+        return {
+            "returncode": returncode,
+            "timed_out": timed_out,
+            "output_exceeded": output_exceeded(
+                (stdout_path, stderr_path), output_limit
+            ),
+            "stdout": read_output(stdout_path, output_limit),
+            "stderr": read_output(stderr_path, output_limit),
+            "time": elapsed,
+        }
+
+
+def main():
+    cpu_time, memory_bytes, output_limit = (int(arg) for arg in sys.argv[1:4])
+    wall_time = float(sys.argv[4])
+    limits = (cpu_time, memory_bytes, output_limit)
+    user = tuple(int(arg) for arg in sys.argv[5:7])
+
+    # Протокол идёт через копии stdin/stdout, дочерним процессам они недоступны
+    proto_in_fd, proto_out_fd = os.dup(0), os.dup(1)
+    proto_in = os.fdopen(proto_in_fd, "rb")
+    null_fd = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null_fd, 0)
+    os.dup2(null_fd, 1)
+    os.close(null_fd)
+
+    write_message(proto_out_fd, {"ready": True})
+    while True:
+        job = read_message(proto_in)
+        if job is None:
+            break
+        if job.get("cancel"):
+            # Отмена запуска, который успел завершиться
+            continue
+        result = execute(
+            job, proto_in, (proto_in_fd, proto_out_fd), limits, user, wall_time
+        )
+        write_message(proto_out_fd, result)
+
+
+if __name__ == "__main__":
+    main()
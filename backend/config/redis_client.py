@@ -0,0 +1,15 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Общий клиент Redis (пул соединений потокобезопасен)
+    """
+
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
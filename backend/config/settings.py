@@ -51,6 +51,19 @@ INSTALLED_APPS = [
 
 ASGI_APPLICATION = "config.asgi.application"
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    },
+}
+# Снимки тестов ключуются версией шаблона, TTL только освобождает память
+TEMPLATE_SNAPSHOT_TTL = int(os.getenv("TEMPLATE_SNAPSHOT_TTL", 24 * 60 * 60))
+# Состояние приглашения для API кандидата; сбрасывается при изменении
+INVITATION_CACHE_TTL = int(os.getenv("INVITATION_CACHE_TTL", 5 * 60))
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -71,6 +84,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Сессии в Redis-кеше с записью в БД только при изменении (cached_db)
+# или только в кеше (cache). Сессии сотрудников, кандидатам они не нужны
+SESSION_ENGINE = os.getenv(
+    "SESSION_ENGINE", "django.contrib.sessions.backends.cached_db"
+)
+# API кандидата не читает и не создаёт сессию
+CANDIDATE_API_SESSIONLESS = os.getenv("CANDIDATE_API_SESSIONLESS", "1") == "1"
+
 # CSRF settings для API
 CSRF_TRUSTED_ORIGINS = ["http://localhost", "http://127.0.0.1"]
 CSRF_COOKIE_HTTPONLY = False
@@ -174,6 +195,66 @@ REST_FRAMEWORK = {
 
 from datetime import timedelta
 
+# Ответы кандидатов буферизуются в Redis и переносятся в БД пакетами
+# (manage.py flush_answers) и при завершении теста
+ANSWER_WRITE_BEHIND = os.getenv("ANSWER_WRITE_BEHIND", "1") == "1"
+ANSWER_FLUSH_INTERVAL = float(os.getenv("ANSWER_FLUSH_INTERVAL", 2))
+# Ответы принимаются ещё столько секунд после срока теста (задержка сети),
+# затем manage.py expire_invitations завершает приглашение
+TEST_DEADLINE_GRACE = int(os.getenv("TEST_DEADLINE_GRACE", 10))
+# События ухода с вкладки пишутся в поток Redis и переносятся в БД пакетами
+# (manage.py flush_tab_switches), число событий берётся из счётчика
+TAB_SWITCH_BUFFER = os.getenv("TAB_SWITCH_BUFFER", "1") == "1"
+TAB_SWITCH_FLUSH_INTERVAL = float(os.getenv("TAB_SWITCH_FLUSH_INTERVAL", 2))
+TAB_SWITCH_COUNTER_TTL = int(os.getenv("TAB_SWITCH_COUNTER_TTL", 24 * 60 * 60))
+# manage.py compact_tab_switches сворачивает события завершённых приглашений
+# в периоды вне вкладки и удаляет сырые события старше срока хранения
+TAB_SWITCH_COMPACTION_DELAY = int(os.getenv("TAB_SWITCH_COMPACTION_DELAY", 10 * 60))
+TAB_SWITCH_RETENTION_DAYS = int(os.getenv("TAB_SWITCH_RETENTION_DAYS", 30))
+
+# Автопроверка ответов выполняется фоновым воркером (manage.py grading_worker).
+# GRADING_EAGER=1 проверяет ответы сразу в запросе — только для разработки.
+GRADING_EAGER = os.getenv("GRADING_EAGER", "0") == "1"
+
+# Песочница для кода: Judge0Backend (внешний Judge0) или
+# candidate_interface.local_runner.LocalBackend (процессы с rlimit на этой машине)
+CODE_EXECUTION_BACKEND = os.getenv(
+    "CODE_EXECUTION_BACKEND", "candidate_interface.sandbox.Judge0Backend"
+)
+LOCAL_RUNNER_WORKERS = int(os.getenv("LOCAL_RUNNER_WORKERS", os.cpu_count() or 2))
+LOCAL_RUNNER_CPU_TIME = int(os.getenv("LOCAL_RUNNER_CPU_TIME", 2))
+LOCAL_RUNNER_WALL_TIME = float(os.getenv("LOCAL_RUNNER_WALL_TIME", 5))
+LOCAL_RUNNER_MEMORY_MB = int(os.getenv("LOCAL_RUNNER_MEMORY_MB", 256))
+LOCAL_RUNNER_OUTPUT_LIMIT = int(os.getenv("LOCAL_RUNNER_OUTPUT_LIMIT", 64 * 1024))
+# Код кандидата выполняется от непривилегированных uid LOCAL_RUNNER_UID ..
+# LOCAL_RUNNER_UID + LOCAL_RUNNER_WORKERS - 1 (для смены uid нужен root).
+# Каждому процессу с LocalBackend — свой диапазон
+LOCAL_RUNNER_UID = int(os.getenv("LOCAL_RUNNER_UID", 60000))
+LOCAL_RUNNER_GID = int(os.getenv("LOCAL_RUNNER_GID", 65534))
+# Прогретые интерпретаторы: fork уже запущенного процесса вместо старта Python
+LOCAL_RUNNER_WARM_POOL = os.getenv("LOCAL_RUNNER_WARM_POOL", "1") == "1"
+LOCAL_RUNNER_RECYCLE_AFTER = int(os.getenv("LOCAL_RUNNER_RECYCLE_AFTER", 100))
+
+JUDGE0_URL = os.getenv("JUDGE0_URL", "http://localhost:2358")
+# Пул соединений и ограничение одновременных запросов к Judge0 на процесс
+JUDGE0_MAX_CONNECTIONS = int(os.getenv("JUDGE0_MAX_CONNECTIONS", 10))
+JUDGE0_MAX_CONCURRENCY = int(os.getenv("JUDGE0_MAX_CONCURRENCY", 10))
+JUDGE0_TIMEOUT = float(os.getenv("JUDGE0_TIMEOUT", 30))
+JUDGE0_RETRIES = int(os.getenv("JUDGE0_RETRIES", 3))
+JUDGE0_RETRY_BACKOFF = float(os.getenv("JUDGE0_RETRY_BACKOFF", 0.5))
+# MAX_SUBMISSION_BATCH_SIZE в конфигурации Judge0
+JUDGE0_BATCH_SIZE = int(os.getenv("JUDGE0_BATCH_SIZE", 20))
+# Запуск кода в техническом интервью: интервал опроса и общий таймаут (секунды)
+CODE_RUN_POLL_INTERVAL = float(os.getenv("CODE_RUN_POLL_INTERVAL", 0.2))
+CODE_RUN_TIMEOUT = float(os.getenv("CODE_RUN_TIMEOUT", 30))
+# Адрес Django, доступный из Judge0. Если задан, код проверяется пакетом
+# с результатами через callback, иначе — синхронно по одной программе.
+JUDGE0_CALLBACK_URL = os.getenv("JUDGE0_CALLBACK_URL", "")
+# Сколько ждать callback, после чего тестовый случай считается ошибкой (секунды)
+JUDGE0_CALLBACK_TIMEOUT = int(os.getenv("JUDGE0_CALLBACK_TIMEOUT", 300))
+# Время жизни закешированных результатов выполнения (секунды)
+JUDGE0_CACHE_TTL = int(os.getenv("JUDGE0_CACHE_TTL", 60 * 60 * 24))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -2,7 +2,15 @@ from django.contrib import admin
 from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 
-from .models import Choice, Question, Tag, TestTemplate, TestTemplateQuestion
+from .models import (
+    Choice,
+    Question,
+    QuestionTestCase,
+    Tag,
+    TemplateDrawRule,
+    TestTemplate,
+    TestTemplateQuestion,
+)
 from .models import InterviewerUser
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
@@ -13,6 +21,12 @@ class ChoiceInline(admin.TabularInline):
     extra = 4
 
 
+class QuestionTestCaseInline(admin.TabularInline):
+    model = QuestionTestCase
+    extra = 1
+    fields = ("stdin", "expected_output", "is_hidden", "weight", "order")
+
+
 class TestTemplateQuestionInline(admin.TabularInline):
     model = TestTemplateQuestion
     extra = 1
@@ -20,6 +34,12 @@ class TestTemplateQuestionInline(admin.TabularInline):
     raw_id_fields = ("question",)
 
 
+class TemplateDrawRuleInline(admin.TabularInline):
+    model = TemplateDrawRule
+    extra = 0
+    fields = ("tag", "complexity", "count", "order")
+
+
 @admin.register(TestTemplate)
 class TestTemplateAdmin(admin.ModelAdmin):
     list_display = (
@@ -37,6 +57,7 @@ class TestTemplateAdmin(admin.ModelAdmin):
     )
     inlines = [
         TestTemplateQuestionInline,
+        TemplateDrawRuleInline,
     ]
 
     def question_count(self, obj):
@@ -77,6 +98,7 @@ class QuestionAdmin(admin.ModelAdmin):
     search_fields = ("text",)
     inlines = [
         ChoiceInline,
+        QuestionTestCaseInline,
     ]
 
     def text_truncated(self, obj):
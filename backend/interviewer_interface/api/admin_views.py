@@ -7,6 +7,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+from candidate_interface import execution_cache
 from candidate_interface.models import Candidate, Invitation
 from interviewer_interface.models import InterviewerUser, TestTemplate
 from django.contrib.auth import get_user_model
@@ -42,6 +43,7 @@ class AdminDashboardView(APIView):
                 "completed_invitations": completed_invitations,
                 "pending_invitations": pending_invitations,
                 "total_templates": total_templates,
+                "execution_cache": execution_cache.stats(),
             }
         )
 
@@ -1,6 +1,13 @@
 from rest_framework import serializers
 
-from ..models import Choice, Question, Tag, TestTemplate
+from ..models import (
+    Choice,
+    Question,
+    QuestionTestCase,
+    Tag,
+    TemplateDrawRule,
+    TestTemplate,
+)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -23,6 +30,12 @@ class ChoiceSerializer(serializers.ModelSerializer):
         fields = ("id", "text", "is_correct")
 
 
+class QuestionTestCaseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionTestCase
+        fields = ("id", "stdin", "expected_output", "is_hidden", "weight", "order")
+
+
 class QuestionCreateSerializer(serializers.ModelSerializer):
     tag_ids = serializers.ListField(
         child=serializers.IntegerField(), write_only=True, required=False
@@ -30,6 +43,9 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
     choices = ChoiceSerializer(
         many=True, write_only=True, required=False
         )
+    test_cases = QuestionTestCaseSerializer(
+        many=True, write_only=True, required=False
+        )
 
     class Meta:
         model = Question
@@ -42,31 +58,59 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
             "stdin",
             "tag_ids",
             "choices",
+            "test_cases",
             )
 
     def create(self, validated_data):
         tag_ids = validated_data.pop("tag_ids", [])
         choices_data = validated_data.pop("choices", [])
+        test_cases_data = validated_data.pop("test_cases", [])
         question = Question.objects.create(**validated_data)
         if tag_ids:
             question.tags.set(tag_ids)
         for choice in choices_data:
             Choice.objects.create(question=question, **choice)
+        for test_case in test_cases_data:
+            QuestionTestCase.objects.create(question=question, **test_case)
         return question
 
+    def update(self, instance, validated_data):
+        test_cases_data = validated_data.pop("test_cases", None)
+        question = super().update(instance, validated_data)
+        if test_cases_data is not None:
+            question.test_cases.all().delete()
+            QuestionTestCase.objects.bulk_create(
+                QuestionTestCase(question=question, **test_case)
+                for test_case in test_cases_data
+            )
+        return question
+
+
+class TemplateDrawRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TemplateDrawRule
+        fields = ("id", "tag", "complexity", "count", "order")
+
 
 class TestTemplateCreateSerializer(serializers.ModelSerializer):
     questions = serializers.ListField(
         child=serializers.DictField(), write_only=True
         )
+    draw_rules = TemplateDrawRuleSerializer(
+        many=True,
+        required=False,
+        )
 
     class Meta:
         model = TestTemplate
-        fields = ("id", "name", "description", "time_limit", "questions")
+        fields = ("id", "name", "description", "time_limit", "questions", "draw_rules")
 
     def create(self, validated_data):
         questions = validated_data.pop("questions", [])
+        draw_rules = validated_data.pop("draw_rules", [])
         template = TestTemplate.objects.create(**validated_data)
+        for rule in draw_rules:
+            TemplateDrawRule.objects.create(template=template, **rule)
         order = 0
         for item in questions:
             if isinstance(item, dict):
@@ -90,10 +134,14 @@ class TestTemplateCreateSerializer(serializers.ModelSerializer):
 
 class TestTemplateSerializer(serializers.ModelSerializer):
     questions = serializers.SerializerMethodField()
+    draw_rules = TemplateDrawRuleSerializer(
+        many=True,
+        read_only=True,
+        )
 
     class Meta:
         model = TestTemplate
-        fields = ("id", "name", "description", "time_limit", "questions")
+        fields = ("id", "name", "description", "time_limit", "questions", "draw_rules")
 
     def get_questions(self, obj):
         ordered = obj.testtemplatequestion_set.all().order_by("order")
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InterviewerInterfaceConfig(AppConfig):
     name = "interviewer_interface"
+
+    def ready(self):
+        from . import signals  # noqa: F401
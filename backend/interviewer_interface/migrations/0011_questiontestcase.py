@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 10:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "interviewer_interface",
+            "0010_intervieweruser_is_hr_intervieweruser_is_tech_lead",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionTestCase",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stdin", models.TextField(blank=True, verbose_name="Входные данные")),
+                ("expected_output", models.TextField(verbose_name="Ожидаемый вывод")),
+                (
+                    "is_hidden",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Скрытые случаи не показываются кандидату",
+                        verbose_name="Скрытый",
+                    ),
+                ),
+                ("weight", models.PositiveIntegerField(default=1, verbose_name="Вес")),
+                (
+                    "order",
+                    models.PositiveIntegerField(default=0, verbose_name="Порядок"),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="test_cases",
+                        to="interviewer_interface.question",
+                        verbose_name="Вопрос",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Тестовый случай",
+                "verbose_name_plural": "Тестовые случаи",
+                "ordering": ["order", "id"],
+            },
+        ),
+    ]
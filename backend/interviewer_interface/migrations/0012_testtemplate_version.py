@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interviewer_interface", "0011_questiontestcase"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testtemplate",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                editable=False,
+                help_text="Увеличивается при любом изменении теста или его вопросов",
+                verbose_name="Версия",
+            ),
+        ),
+    ]
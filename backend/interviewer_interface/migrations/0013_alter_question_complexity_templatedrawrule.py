@@ -0,0 +1,89 @@
+# Generated by Django 6.0 on 2026-10-18 10:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interviewer_interface", "0012_testtemplate_version"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="question",
+            name="complexity",
+            field=models.CharField(
+                choices=[("easy", "Легко"), ("medium", "Средне"), ("hard", "Сложно")],
+                db_index=True,
+                default="medium",
+                max_length=10,
+                verbose_name="Сложность вопроса",
+            ),
+        ),
+        migrations.CreateModel(
+            name="TemplateDrawRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "complexity",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("easy", "Легко"),
+                            ("medium", "Средне"),
+                            ("hard", "Сложно"),
+                        ],
+                        help_text="Пусто — любая сложность",
+                        max_length=10,
+                        verbose_name="Сложность",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Количество вопросов"
+                    ),
+                ),
+                (
+                    "order",
+                    models.PositiveIntegerField(default=0, verbose_name="Порядок"),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Пусто — любой тег",
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="draw_rules",
+                        to="interviewer_interface.tag",
+                        verbose_name="Тег",
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="draw_rules",
+                        to="interviewer_interface.testtemplate",
+                        verbose_name="Шаблон",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Правило выбора вопросов",
+                "verbose_name_plural": "Правила выбора вопросов",
+                "ordering": ["order", "id"],
+            },
+        ),
+    ]
@@ -1,5 +1,49 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+
+
+class QuestionContentQuerySet(models.QuerySet):
+    """
+    update() и bulk_create() проходят мимо сигналов: версии тестов
+    с затронутыми вопросами увеличиваются здесь
+    """
+
+    question_field = "question_id"
+
+    def update(self, **kwargs):
+        question_ids = set(self.values_list(self.question_field, flat=True))
+        updated = super().update(**kwargs)
+        if updated:
+            bump_question_versions(question_ids)
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_question_versions({getattr(obj, self.question_field) for obj in objs})
+        return objs
+
+
+class QuestionQuerySet(QuestionContentQuerySet):
+    question_field = "id"
+
+
+class TemplatePartQuerySet(models.QuerySet):
+    """
+    То же для частей теста: вопросов в шаблоне и правил выбора
+    """
+
+    def update(self, **kwargs):
+        template_ids = set(self.values_list("template_id", flat=True))
+        updated = super().update(**kwargs)
+        if updated:
+            bump_template_versions(template_ids)
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_template_versions({obj.template_id for obj in objs})
+        return objs
 
 
 class InterviewerUser(AbstractUser):
@@ -40,16 +84,58 @@ class TestTemplate(models.Model):
         verbose_name="Ограничение по времени (минуты)",
         help_text="0 — без ограничения. Например, 60 для часа.",
         )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name="Версия",
+        help_text="Увеличивается при любом изменении теста или его вопросов",
+        )
 
     def __str__(self):
         return f"{self.name}"
 
+    def bump_version(self):
+        TestTemplate.objects.filter(id=self.id).update(version=F("version") + 1)
+
+    @staticmethod
+    def bump_drawing_versions():
+        """
+        Состав пулов случайного выбора изменился: новая версия для всех
+        шаблонов с правилами выбора
+        """
+
+        TestTemplate.objects.filter(
+            id__in=TemplateDrawRule.objects.values("template_id")
+        ).update(version=F("version") + 1)
+
+
+def bump_template_versions(template_ids):
+    TestTemplate.objects.filter(id__in=template_ids).update(version=F("version") + 1)
+
+
+def bump_question_versions(question_ids):
+    """
+    Вопросы изменились: новая версия для тестов, в которые они входят,
+    и для шаблонов с правилами выбора — пулы хранят вопросы целиком
+    """
+
+    if not question_ids:
+        return
+    bump_template_versions(
+        TestTemplateQuestion.objects.filter(question_id__in=question_ids).values(
+            "template_id"
+        )
+    )
+    TestTemplate.bump_drawing_versions()
+
 
 class TestTemplateQuestion(models.Model):
     """
     Модель для связывания наборов вопросов и вопросов внутри наборов
     """
 
+    objects = TemplatePartQuerySet.as_manager()
+
     template = models.ForeignKey(TestTemplate, on_delete=models.CASCADE)
     question = models.ForeignKey("Question", on_delete=models.CASCADE)
     order = models.PositiveIntegerField(
@@ -88,6 +174,8 @@ class Question(models.Model):
     Модель вопросов
     """
 
+    objects = QuestionQuerySet.as_manager()
+
     QUESTION_TYPES = (
         ("text", "Свободный текст"),
         ("single_choice", "Выбор одного варианта"),
@@ -103,6 +191,7 @@ class Question(models.Model):
         max_length=10,
         choices=QUESTION_COMPLEXITY,
         default="medium",
+        db_index=True,
         verbose_name="Сложность вопроса",
         )
     text = models.TextField(verbose_name="Текст вопроса")
@@ -126,12 +215,135 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.text[:50]}{'...' if len(self.text) > 50 else ''}"
 
+    def bump_template_versions(self):
+        TestTemplate.objects.filter(
+            id__in=TestTemplateQuestion.objects.filter(question_id=self.id).values(
+                "template_id"
+            )
+        ).update(version=F("version") + 1)
+
+    def grading_cases(self):
+        """
+        Тестовые случаи для проверки кода. Вопрос без них проверяется
+        одним неявным случаем из stdin/correct_answer
+        """
+
+        cases = list(self.test_cases.all())
+        if cases or not self.correct_answer:
+            return cases
+        return [
+            QuestionTestCase(
+                question=self,
+                stdin=self.stdin,
+                expected_output=self.correct_answer,
+            )
+        ]
+
+
+class TemplateDrawRule(models.Model):
+    """
+    Правило случайного выбора вопросов в шаблоне: count вопросов
+    с тегом и сложностью. Вопросы выбираются один раз для каждого приглашения
+    """
+
+    objects = TemplatePartQuerySet.as_manager()
+
+    template = models.ForeignKey(
+        TestTemplate,
+        on_delete=models.CASCADE,
+        related_name="draw_rules",
+        verbose_name="Шаблон",
+        )
+    tag = models.ForeignKey(
+        Tag,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="draw_rules",
+        verbose_name="Тег",
+        help_text="Пусто — любой тег",
+        )
+    complexity = models.CharField(
+        max_length=10,
+        choices=Question.QUESTION_COMPLEXITY,
+        blank=True,
+        verbose_name="Сложность",
+        help_text="Пусто — любая сложность",
+        )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Количество вопросов",
+        )
+    order = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Порядок",
+        )
+
+    class Meta:
+        ordering = [
+            "order",
+            "id",
+            ]
+        verbose_name = "Правило выбора вопросов"
+        verbose_name_plural = "Правила выбора вопросов"
+
+    def __str__(self):
+        return f"{self.template}: {self.count} × {self.tag or 'любой тег'} {self.complexity}"
+
+
+class QuestionTestCase(models.Model):
+    """
+    Тестовый случай для вопроса с кодом
+    """
+
+    objects = QuestionContentQuerySet.as_manager()
+
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name="test_cases",
+        verbose_name="Вопрос",
+        )
+    stdin = models.TextField(
+        blank=True,
+        verbose_name="Входные данные",
+        )
+    expected_output = models.TextField(
+        verbose_name="Ожидаемый вывод",
+        )
+    is_hidden = models.BooleanField(
+        default=False,
+        verbose_name="Скрытый",
+        help_text="Скрытые случаи не показываются кандидату",
+        )
+    weight = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Вес",
+        )
+    order = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Порядок",
+        )
+
+    class Meta:
+        ordering = [
+            "order",
+            "id",
+            ]
+        verbose_name = "Тестовый случай"
+        verbose_name_plural = "Тестовые случаи"
+
+    def __str__(self):
+        return f"{self.question} — случай {self.order}"
+
 
 class Choice(models.Model):
     """
     Модель ответов на вопрос с типом "выбор" 
     """
 
+    objects = QuestionContentQuerySet.as_manager()
+
     question = models.ForeignKey(
         Question,
         on_delete=models.CASCADE,
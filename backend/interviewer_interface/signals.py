@@ -0,0 +1,62 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Choice,
+    Question,
+    QuestionTestCase,
+    TemplateDrawRule,
+    TestTemplate,
+    TestTemplateQuestion,
+    bump_question_versions,
+)
+
+# Любое изменение теста или его вопросов увеличивает версию теста,
+# по которой кешируются снимки для кандидатов
+
+
+@receiver(post_save, sender=TestTemplate)
+def template_saved(sender, instance, created, **kwargs):
+    if not created:
+        instance.bump_version()
+
+
+@receiver(post_save, sender=TestTemplateQuestion)
+@receiver(post_delete, sender=TestTemplateQuestion)
+def template_question_changed(sender, instance, **kwargs):
+    TestTemplate(id=instance.template_id).bump_version()
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    if not created:
+        instance.bump_template_versions()
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+@receiver(post_save, sender=QuestionTestCase)
+@receiver(post_delete, sender=QuestionTestCase)
+def question_part_changed(sender, instance, **kwargs):
+    bump_question_versions([instance.question_id])
+
+
+@receiver(post_save, sender=TemplateDrawRule)
+@receiver(post_delete, sender=TemplateDrawRule)
+def draw_rule_changed(sender, instance, **kwargs):
+    TestTemplate(id=instance.template_id).bump_version()
+
+
+# Пулы случайного выбора зависят от сложности и тегов всех вопросов
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_pool_changed(sender, instance, **kwargs):
+    TestTemplate.bump_drawing_versions()
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def question_tags_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        TestTemplate.bump_drawing_versions()
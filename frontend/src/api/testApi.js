@@ -5,6 +5,33 @@ export const getTestSession = async(uniqueLink) => {
     return response.data
 }
 
+// The bootstrap payload is cached with its ETag; repeat loads get 304 and reuse it.
+// Remaining time always comes from the X-Remaining-Time header.
+export const getTestBootstrap = async(uniqueLink) => {
+    const cacheKey = `test_bootstrap_${uniqueLink}`
+    let cached = null
+    try {
+        cached = JSON.parse(sessionStorage.getItem(cacheKey))
+    } catch (e) {}
+
+    const response = await apiClient.get(`/candidate/test/${uniqueLink}/bootstrap/`, {
+        headers: cached ? { 'If-None-Match': cached.etag } : {},
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    })
+
+    let data = response.data
+    if (response.status === 304) {
+        data = cached.data
+    } else if (response.headers.etag) {
+        try {
+            sessionStorage.setItem(cacheKey, JSON.stringify({ etag: response.headers.etag, data }))
+        } catch (e) {}
+    }
+
+    const remaining = response.headers['x-remaining-time']
+    return { ...data, remaining_time: remaining !== undefined ? Number(remaining) : null }
+}
+
 export const getQuestion = async(uniqueLink, questionId) => {
     const response = await apiClient.get(`/candidate/test/${uniqueLink}/question/${questionId}/`)
     return response.data
@@ -18,6 +45,11 @@ export const submitAnswer = async(uniqueLink, questionId, answer, switches = 0)
     return response.data
 }
 
+export const submitAnswers = async(uniqueLink, answers) => {
+    const response = await apiClient.post(`/candidate/test/${uniqueLink}/answers/`, { answers })
+    return response.data
+}
+
 export const finishTest = async(uniqueLink) => {
     const response = await apiClient.post(`/candidate/test/${uniqueLink}/finish/`)
     return response.data
@@ -30,13 +62,29 @@ export const logTabSwitch = async(uniqueLink, state) => {
     return response.data
 }
 
+export const sendProctoringEvents = async(uniqueLink, clientId, events) => {
+    const response = await apiClient.post(`/candidate/test/${uniqueLink}/events/`, {
+        client_id: clientId,
+        events
+    })
+    return response.data
+}
+
+// Last flush while the page unloads: the browser delivers the beacon after the page is gone
+export const beaconProctoringEvents = (uniqueLink, clientId, events) => {
+    const body = new Blob([JSON.stringify({ client_id: clientId, events })], { type: 'application/json' })
+    return navigator.sendBeacon(`${apiClient.defaults.baseURL}/candidate/test/${uniqueLink}/events/`, body)
+}
+
 export const getInterviewSession = async(uniqueLink) => {
     const response = await apiClient.get(`/candidate/session/${uniqueLink}/`)
     return response.data
 }
 
-export const getTestResults = async() => {
-    const response = await apiClient.get(`/candidate/results/`)
+// Results are cursor-paginated: pass the `next` URL of the previous page to load more
+export const getTestResults = async(nextUrl = null) => {
+    const cursor = nextUrl ? new URL(nextUrl, window.location.origin).searchParams.get('cursor') : null
+    const response = await apiClient.get(`/candidate/results/`, { params: cursor ? { cursor } : {} })
     return response.data
 }
 
@@ -162,7 +162,9 @@ export default function AdminPanel({ initialTab = null }) {
   const [error, setError] = useState(null)
   const [showCreateModal, setShowCreateModal] = useState(false)
   const [results, setResults] = useState([])
+  const [resultsNext, setResultsNext] = useState(null)
   const [selectedResult, setSelectedResult] = useState(null)
+  const [gradingEvent, setGradingEvent] = useState(null)
   const [user, setUser] = useState(null)
   const [users, setUsers] = useState([])
   const [editQuestion, setEditQuestion] = useState(null)
@@ -200,6 +202,31 @@ export default function AdminPanel({ initialTab = null }) {
     setPage(p => ({ ...p, [activeTab]: 1 }))
   }, [activeTab])
 
+  // Grading progress is pushed over WebSocket while the results tab is open
+  useEffect(() => {
+    if (activeTab !== 'results') return
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
+    const ws = new WebSocket(`${protocol}//${window.location.host}/ws/grading/`)
+
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data)
+      if (data.type !== 'grading_progress' && data.type !== 'grading_finished') return
+      setResults(prev => prev.map(r => {
+        if (r.id !== data.invitation_id) return r
+        const updated = { ...r, grading_status: data.status }
+        if (data.type === 'grading_progress') updated.grading_progress = `${data.graded}/${data.total}`
+        else {
+          updated.auto_score = data.auto_score
+          updated.grading_progress = null
+        }
+        return updated
+      }))
+      setGradingEvent(data)
+    }
+
+    return () => ws.close()
+  }, [activeTab])
+
   const loadData = async () => {
     try {
       setLoading(true)
@@ -232,7 +259,8 @@ export default function AdminPanel({ initialTab = null }) {
         setTechLeads(techLeadsData)
       } else if (activeTab === 'results') {
         const data = await getTestResults()
-        setResults(data)
+        setResults(data.results)
+        setResultsNext(data.next)
         setSelectedResult(null)
       } else if (activeTab === 'users') {
         const list = await getUsers()
@@ -246,6 +274,17 @@ export default function AdminPanel({ initialTab = null }) {
     }
   }
 
+  const loadMoreResults = async () => {
+    try {
+      const data = await getTestResults(resultsNext)
+      setResults(prev => [...prev, ...data.results])
+      setResultsNext(data.next)
+    } catch (err) {
+      console.error('Error loading results:', err)
+      setError('Ошибка загрузки данных')
+    }
+  }
+
   const handleCreateInvitation = async (invitationData) => {
     await createInvitation(invitationData)
     setShowCreateModal(false)
@@ -631,9 +670,9 @@ export default function AdminPanel({ initialTab = null }) {
           {activeTab === 'results' && (
             <div>
               {selectedResult ? (
-                <ResultsDetailView result={selectedResult} onBack={()=>setSelectedResult(null)} onSaveScore={loadData} />
+                <ResultsDetailView result={selectedResult} gradingEvent={gradingEvent} onBack={()=>setSelectedResult(null)} onSaveScore={loadData} />
               ) : (
-                <ResultsListView results={results} loading={loading} onSelectResult={(id)=>setSelectedResult(id)} />
+                <ResultsListView results={results} loading={loading} hasMore={!!resultsNext} onLoadMore={loadMoreResults} onSelectResult={(id)=>setSelectedResult(id)} />
               )}
             </div>
           )}
@@ -1116,7 +1155,7 @@ function CandidateDetailView({ id, onClose }) {
   )
 }
 
-function ResultsListView({ results, loading, onSelectResult }) {
+function ResultsListView({ results, loading, hasMore, onLoadMore, onSelectResult }) {
   const [filterCandidate, setFilterCandidate] = useState('')
   const [filterEmail, setFilterEmail] = useState('')
   const [filterTemplate, setFilterTemplate] = useState('')
@@ -1217,6 +1256,7 @@ function ResultsListView({ results, loading, onSelectResult }) {
               <th className="p-2 text-center">Score %</th>
               <th className="p-2 text-center">Auto</th>
               <th className="p-2 text-center">Manual</th>
+              <th className="p-2 text-center">Grading</th>
               <th className="p-2 text-center">Actions</th>
             </tr>
           </thead>
@@ -1231,6 +1271,7 @@ function ResultsListView({ results, loading, onSelectResult }) {
                 <td className="p-2 font-semibold text-center" style={{color: r.percent >= 70 ? '#16a34a' : r.percent >= 50 ? '#eab308' : '#dc2626'}}>{r.percent}%</td>
                 <td className="p-2 text-center">{r.auto_score}</td>
                 <td className="p-2 text-center">{r.manual_score ?? '—'}</td>
+                <td className="p-2 text-center">{r.grading_status}{r.grading_progress ? ` ${r.grading_progress}` : ''}</td>
                 <td className="p-2 text-center"><button className="px-2 py-1 text-white rounded bg-primary" onClick={()=>onSelectResult(r.id)}>View</button></td>
               </tr>
             ))}
@@ -1238,17 +1279,42 @@ function ResultsListView({ results, loading, onSelectResult }) {
         </table>
       </div>
       {sorted.length === 0 && <div className="mt-4 text-gray-500">No results match your filters</div>}
+      {hasMore && (
+        <div className="mt-4 text-center">
+          <button className="px-4 py-2 border rounded" onClick={onLoadMore}>Load more</button>
+        </div>
+      )}
     </div>
   )
 }
 
-function ResultsDetailView({ result, onBack, onSaveScore }) {
+function ResultsDetailView({ result, gradingEvent, onBack, onSaveScore }) {
   const [detail, setDetail] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [answersLocal, setAnswersLocal] = useState([])
 
   useEffect(()=>{ load() }, [result])
+
+  // Refresh auto scores when grading finishes, keeping unsaved manual edits
+  useEffect(()=>{
+    if (!gradingEvent || gradingEvent.invitation_id !== result) return
+    if (gradingEvent.type !== 'grading_finished') {
+      setDetail(d => d ? { ...d, grading_status: gradingEvent.status } : d)
+      return
+    }
+    ;(async ()=>{
+      try {
+        const data = await getTestResultDetail(result)
+        setDetail(data)
+        const fresh = {}
+        for (const a of data.answers || []) fresh[a.question_id] = a
+        setAnswersLocal(prev => prev.map(a => fresh[a.question_id]
+          ? { ...a, auto_score: fresh[a.question_id].auto_score, test_results: fresh[a.question_id].test_results }
+          : a))
+      } catch (e) { setError('Error loading') }
+    })()
+  }, [gradingEvent])
   const load = async ()=>{
     try { setLoading(true); const data = await getTestResultDetail(result); setDetail(data); setAnswersLocal(data && data.answers ? data.answers.map(a=>({ ...a })) : []) } catch (e) { setError('Error loading') } finally { setLoading(false) }
   }
@@ -1277,7 +1343,7 @@ function ResultsDetailView({ result, onBack, onSaveScore }) {
       </div>
 
       <div className="grid grid-cols-2 gap-3 mb-4">
-        <div className="p-3 text-center bg-white border rounded">Auto: {detail.total_auto_score}</div>
+        <div className="p-3 text-center bg-white border rounded">Auto: {detail.total_auto_score}{detail.grading_status && detail.grading_status !== 'done' ? ` (${detail.grading_status})` : ''}</div>
         <div className="p-3 text-center bg-white border rounded">Manual (saved): {detail.total_manual_score ?? '—'}</div>
       </div>
 
@@ -84,11 +84,17 @@ function TechnicalInterview() {
           timestamp: new Date()
         }])
       } else if (data.type === 'code_result') {
-        setCodeOutput({
-          stdout: data.stdout,
-          stderr: data.stderr,
-          time: data.time,
-          status: data.status
+        // Результаты вытесненных запусков игнорируются
+        setCodeOutput(prev => {
+          if (prev && prev.runId !== data.run_id && data.status !== 'queued') return prev
+          return {
+            runId: data.run_id,
+            stdout: data.stdout,
+            stderr: data.stderr,
+            time: data.time,
+            status: data.status,
+            verdict: data.verdict
+          }
         })
       }
     }
@@ -225,7 +231,17 @@ function TechnicalInterview() {
               
               {codeOutput && (
                 <div className="mt-4">
-                  {codeOutput.stderr ? (
+                  {(codeOutput.status === 'queued' || codeOutput.status === 'running') ? (
+                    <div className="p-4 border rounded-lg border-border bg-gray-50">
+                      <strong className="text-sm text-secondary">
+                        {codeOutput.status === 'queued' ? '⏳ В очереди...' : '⚙️ Выполняется...'}
+                      </strong>
+                    </div>
+                  ) : codeOutput.status === 'cancelled' ? (
+                    <div className="p-4 border rounded-lg border-border bg-gray-50">
+                      <strong className="text-sm text-secondary">Запуск отменён</strong>
+                    </div>
+                  ) : codeOutput.stderr ? (
                     <div className="p-4 border border-red-200 rounded-lg bg-red-50">
                       <strong className="text-sm text-red-700">❌ Ошибка:</strong>
                       <pre className="mt-3 overflow-x-auto font-mono text-xs leading-relaxed text-red-600">{codeOutput.stderr}</pre>
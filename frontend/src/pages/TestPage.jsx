@@ -1,18 +1,22 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { getTestSession, getQuestion, submitAnswer, logTabSwitch, finishTest as finishTestApi } from '../api/testApi'
+import { getTestBootstrap, submitAnswers, sendProctoringEvents, beaconProctoringEvents, finishTest as finishTestApi } from '../api/testApi'
+
+const PROCTORING_FLUSH_MS = 5000
 
 function TestPage() {
   const { uniqueLink, questionId } = useParams()
   const navigate = useNavigate()
   const [session, setSession] = useState(null)
   const [question, setQuestion] = useState(null)
+  const [savedAnswers, setSavedAnswers] = useState({})
   const [answer, setAnswer] = useState('')
   const [selectedChoices, setSelectedChoices] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [remainingTime, setRemainingTime] = useState(null)
-  const [switches, setSwitches] = useState(0)
+  // Answers not yet confirmed by the server, resent together with the next save
+  const pendingAnswers = useRef({})
 
   useEffect(() => {
     loadSession()
@@ -20,22 +24,99 @@ function TestPage() {
 
   useEffect(() => {
     if (questionId && session) {
-      loadQuestion()
+      showQuestion()
     }
   }, [questionId, session])
 
+  // Proctoring events are queued and sent in batches; unacknowledged events are
+  // resent with the next batch and the server drops repeats by (client_id, seq)
   useEffect(() => {
+    const clientId = Math.random().toString(36).slice(2) + Date.now().toString(36)
+    let queue = []
+    let seq = 0
+    let sending = false
+
+    const record = (type) => {
+      seq += 1
+      queue.push({ seq, type, timestamp: Date.now() })
+    }
+
+    const flush = async () => {
+      if (sending || queue.length === 0) return
+      sending = true
+      const batch = queue.slice()
+      try {
+        await sendProctoringEvents(uniqueLink, clientId, batch)
+        const lastSeq = batch[batch.length - 1].seq
+        queue = queue.filter(event => event.seq > lastSeq)
+      } catch (err) {
+        // Kept in the queue and retried on the next flush
+      } finally {
+        sending = false
+      }
+    }
+
     const handleVisibilityChange = () => {
-      const state = document.hidden ? 'hidden' : 'visible'
-      logTabSwitch(uniqueLink, state).then(() => {
-        if (state === 'hidden') {
-          setSwitches(prev => prev + 1)
-        }
-      })
+      record(document.hidden ? 'hidden' : 'visible')
+      if (document.hidden && queue.length > 0) {
+        // The tab may never come back: send now, fetch can be throttled in background tabs
+        if (beaconProctoringEvents(uniqueLink, clientId, queue)) queue = []
+      }
+    }
+    const handleBlur = () => record('blur')
+    const handlePaste = () => record('paste')
+    const handleFullscreenChange = () => {
+      if (!document.fullscreenElement) record('fullscreen_exit')
+    }
+    const handlePageHide = () => {
+      if (queue.length > 0) beaconProctoringEvents(uniqueLink, clientId, queue)
+      queue = []
     }
 
     document.addEventListener('visibilitychange', handleVisibilityChange)
-    return () => document.removeEventListener('visibilitychange', handleVisibilityChange)
+    window.addEventListener('blur', handleBlur)
+    document.addEventListener('paste', handlePaste)
+    document.addEventListener('fullscreenchange', handleFullscreenChange)
+    window.addEventListener('pagehide', handlePageHide)
+    const timer = setInterval(flush, PROCTORING_FLUSH_MS)
+    return () => {
+      clearInterval(timer)
+      document.removeEventListener('visibilitychange', handleVisibilityChange)
+      window.removeEventListener('blur', handleBlur)
+      document.removeEventListener('paste', handlePaste)
+      document.removeEventListener('fullscreenchange', handleFullscreenChange)
+      window.removeEventListener('pagehide', handlePageHide)
+      handlePageHide()
+    }
+  }, [uniqueLink])
+
+  const saveAnswer = useCallback(async (qid, value) => {
+    pendingAnswers.current[qid] = value
+    const sent = { ...pendingAnswers.current }
+    let data
+    try {
+      data = await submitAnswers(
+        uniqueLink,
+        Object.entries(sent).map(([id, response]) => ({ question_id: Number(id), response }))
+      )
+    } catch (err) {
+      // No connection: keep the answers queued and retry with the next save
+      if (err.response) throw err
+      setSavedAnswers(prev => ({ ...prev, [qid]: value }))
+      return
+    }
+
+    let currentError = null
+    for (const result of data.results) {
+      if (pendingAnswers.current[result.question_id] === sent[result.question_id]) {
+        delete pendingAnswers.current[result.question_id]
+      }
+      if (result.status !== 'ok' && String(result.question_id) === String(qid)) {
+        currentError = result.error
+      }
+    }
+    if (currentError) throw new Error(currentError)
+    setSavedAnswers(prev => ({ ...prev, [qid]: value }))
   }, [uniqueLink])
 
   const finishTest = useCallback(async () => {
@@ -45,14 +126,17 @@ function TestPage() {
         if (question?.question_type === 'multiple_choice' || question?.question_type === 'single_choice') {
           answerValue = JSON.stringify(selectedChoices)
         }
-        await submitAnswer(uniqueLink, questionId, answerValue, switches)
+        await saveAnswer(questionId, answerValue)
+      }
+      if (Object.keys(pendingAnswers.current).length > 0) {
+        throw new Error('Нет соединения с сервером, ответы не сохранены')
       }
       await finishTestApi(uniqueLink)
       navigate(`/completed/${uniqueLink}`)
     } catch (err) {
-      setError(err.response?.data?.error || 'Ошибка завершения теста')
+      setError(err.response?.data?.error || err.message || 'Ошибка завершения теста')
     }
-  }, [uniqueLink, questionId, answer, question, selectedChoices, switches, navigate])
+  }, [uniqueLink, questionId, answer, question, selectedChoices, saveAnswer, navigate])
 
   useEffect(() => {
     if (session?.remaining_time !== null && session?.remaining_time !== undefined && remainingTime !== null) {
@@ -72,7 +156,8 @@ function TestPage() {
 
   const loadSession = async () => {
     try {
-      const data = await getTestSession(uniqueLink)
+      const data = await getTestBootstrap(uniqueLink)
+      setSavedAnswers(data.answers || {})
       setSession(data)
       setRemainingTime(data.remaining_time)
       
@@ -91,22 +176,24 @@ function TestPage() {
     }
   }
 
-  const loadQuestion = async () => {
-    try {
-      const data = await getQuestion(uniqueLink, questionId)
-      setQuestion(data.question)
-      setAnswer(data.current_answer?.response || '')
-      
-      if (data.question?.question_type === 'multiple_choice' || data.question?.question_type === 'single_choice') {
-        try {
-          const saved = JSON.parse(data.current_answer?.response || '[]')
-          setSelectedChoices(Array.isArray(saved) ? saved : [])
-        } catch {
-          setSelectedChoices([])
-        }
+  // Questions and saved answers come from the bootstrap payload, navigation needs no requests
+  const showQuestion = () => {
+    const current = session.questions.find(q => q.id === parseInt(questionId))
+    if (!current) {
+      setError('Вопрос не найден в этом тесте')
+      return
+    }
+    const savedResponse = savedAnswers[current.id] || ''
+    setQuestion(current)
+    setAnswer(savedResponse)
+
+    if (current.question_type === 'multiple_choice' || current.question_type === 'single_choice') {
+      try {
+        const saved = JSON.parse(savedResponse || '[]')
+        setSelectedChoices(Array.isArray(saved) ? saved : [])
+      } catch {
+        setSelectedChoices([])
       }
-    } catch (err) {
-      setError(err.response?.data?.error || 'Ошибка загрузки вопроса')
     }
   }
 
@@ -129,7 +216,7 @@ function TestPage() {
         answerValue = JSON.stringify(selectedChoices)
       }
 
-      await submitAnswer(uniqueLink, questionId, answerValue, switches)
+      await saveAnswer(questionId, answerValue)
 
       if (action === 'next') {
         const currentIndex = session.questions.findIndex(q => q.id === parseInt(questionId))
@@ -147,7 +234,7 @@ function TestPage() {
         finishTest()
       }
     } catch (err) {
-      setError(err.response?.data?.error || 'Ошибка сохранения ответа')
+      setError(err.response?.data?.error || err.message || 'Ошибка сохранения ответа')
     }
   }
 